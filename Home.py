@@ -43,6 +43,7 @@ st.markdown(
     - **`Hobbies`:** Manage the master list of hobbies and assign them to members.
     - **`Emails`:** Generate and log weekly schedule emails for all members with upcoming sessions.
     - **`Reports`:** View pre-defined, complex reports on the club's operations.
+    - **`Performance`:** See how long each database call and page takes, and any slow queries.
     """
 )
 
@@ -0,0 +1,71 @@
+"""
+Measures email_delivery throughput (messages per minute) against a local DebugSMTPServer,
+without touching the database.
+
+    python benchmarks/email_throughput.py                         # 2,000 messages, 4 connections
+    python benchmarks/email_throughput.py --messages 10000 --connections 1 2 4 8
+    python benchmarks/email_throughput.py --fail-rate 0.05        # exercise the retries
+
+Each run sends the same synthetic weekly-schedule messages; --connections compares worker
+pool sizes, and 0 sends them one at a time over a new connection each, as a naive loop would.
+"""
+import argparse
+import asyncio
+import os
+import smtplib
+import sys
+import time
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import email_delivery
+
+def synthetic_messages(count):
+    body = "Hello,\n\nYou are playing on Saturday at 18:00 as Setter. Your coach is Jane Doe.\n" * 8
+    return [
+        (email_id, 0, email_delivery.build_message({
+            'email_id': email_id, 'sender_name': 'MVC Location 1',
+            'receiver_email': f"person{email_id}@example.com",
+            'email_subject': 'Your schedule for this week', 'body': body
+        }, email_delivery.delivery_config['from_address']))
+        for email_id in range(1, count + 1)
+    ]
+
+def _send_one_per_connection(host, port, messages):
+    for _, _, message in messages:
+        with smtplib.SMTP(host, port) as connection:
+            connection.send_message(message)
+
+async def run(messages, connections, fail_rate):
+    server = email_delivery.DebugSMTPServer('localhost', 0, fail_rate=fail_rate)
+    await server.start()
+    try:
+        started = time.perf_counter()
+        if connections == 0:
+            await asyncio.to_thread(_send_one_per_connection, server.host, server.port, messages)
+            statuses = Counter({'Sent': len(messages)})
+        else:
+            backend = email_delivery.SMTPBackend(server.host, server.port)
+            results = await email_delivery.deliver(messages, backend, {
+                'connections_per_host': connections, 'backoff_seconds': 0.01, 'max_backoff_seconds': 0.1
+            })
+            statuses = Counter(r['status'] for r in results)
+        elapsed = time.perf_counter() - started
+    finally:
+        await server.stop()
+    return elapsed, statuses, server.connections, server.rejected
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark email delivery against a local SMTP sink.")
+    parser.add_argument('--messages', type=int, default=2000)
+    parser.add_argument('--connections', type=int, nargs='+', default=[4], help="Worker pool sizes; 0 for one connection per message.")
+    parser.add_argument('--fail-rate', type=float, default=0.0, help="Share of messages the sink answers with a 451.")
+    args = parser.parse_args()
+
+    messages = synthetic_messages(args.messages)
+    print(f"{'connections':>11} {'seconds':>8} {'msg/min':>9} {'opened':>7} {'451s':>6}  outcome")
+    for connections in args.connections:
+        elapsed, statuses, opened, rejected = asyncio.run(run(messages, connections, args.fail_rate))
+        label = 'naive' if connections == 0 else connections
+        print(f"{label:>11} {elapsed:>8.2f} {statuses['Sent'] / elapsed * 60:>9.0f} {opened:>7} {rejected:>6}  {dict(statuses)}")
@@ -0,0 +1,109 @@
+"""
+Compares the memory held by one result set in four shapes:
+dict rows (cursor(dictionary=True)), slotted models.py dataclasses (row_mapping.map_rows),
+a columnar DataFrame (row_mapping.rows_to_frame) and a typed pyarrow.Table built in
+batches (row_mapping.rows_to_record_batch, as used by ops.search(result_format='arrow')).
+
+    python benchmarks/row_memory.py               # 50,000 synthetic person rows
+    python benchmarks/row_memory.py --rows 200000
+    python benchmarks/row_memory.py --from-db     # the real person table
+
+Synthetic rows are generated deterministically, so runs are comparable across machines.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+import tracemalloc
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import models
+import row_mapping
+
+PERSON_COLUMNS = ('person_id', 'first_name', 'last_name', 'dob', 'ssn', 'medicare_number', 'phone_number',
+                  'address', 'city', 'province', 'postal_code', 'email_address', 'gender')
+
+def synthetic_person_rows(count, seed=42):
+    """Tuples shaped like `SELECT * FROM person`, as a plain cursor returns them."""
+    rng = random.Random(seed)
+    first_names = ['Alex', 'Sam', 'Jordan', 'Taylor', 'Morgan', 'Casey', 'Riley', 'Jamie']
+    last_names = ['Tremblay', 'Gagnon', 'Roy', 'Cote', 'Bouchard', 'Gauthier', 'Morin', 'Lavoie']
+    cities = ['Montreal', 'Laval', 'Quebec', 'Sherbrooke', 'Gatineau']
+    rows = []
+    for i in range(1, count + 1):
+        rows.append((
+            i,
+            rng.choice(first_names),
+            rng.choice(last_names),
+            date(1960, 1, 1) + timedelta(days=rng.randrange(20000)),
+            f"{rng.randrange(1000):03d}-{rng.randrange(1000):03d}-{rng.randrange(1000):03d}",
+            f"MED{i:08d}",
+            f"514-555-{rng.randrange(10000):04d}",
+            f"{rng.randrange(1, 9999)} Rue Principale",
+            rng.choice(cities),
+            'Quebec',
+            f"H{rng.randrange(10)}A {rng.randrange(10)}B{rng.randrange(10)}",
+            f"person{i}@example.com",
+            rng.choice(('Male', 'Female')),
+        ))
+    return rows
+
+def db_person_rows():
+    from db_connector import pooled_connection
+    with pooled_connection() as conn:
+        cursor = conn.cursor()
+        try:
+            cursor.execute("SELECT * FROM person")
+            return tuple(cursor.column_names), cursor.fetchall()
+        finally:
+            cursor.close()
+
+def measure(label, build):
+    """Runs build() and reports the memory still allocated by its result, and the time taken."""
+    tracemalloc.start()
+    started = time.perf_counter()
+    result = build()
+    elapsed = time.perf_counter() - started
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<22} retained={current / 1_048_576:8.2f} MiB  peak={peak / 1_048_576:8.2f} MiB  time={elapsed * 1000:8.1f} ms")
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description="Memory used by dict rows vs. slotted models vs. a DataFrame vs. Arrow.")
+    parser.add_argument('--rows', type=int, default=50_000, help="Number of synthetic rows (ignored with --from-db).")
+    parser.add_argument('--from-db', action='store_true', help="Use the person table instead of synthetic rows.")
+    args = parser.parse_args()
+
+    if args.from_db:
+        columns, rows = db_person_rows()
+    else:
+        columns, rows = PERSON_COLUMNS, synthetic_person_rows(args.rows)
+    print(f"{len(rows)} person rows, {len(columns)} columns")
+
+    # The source tuples are shared by every variant, so only the per-shape overhead is measured.
+    measure("dict rows", lambda: [dict(zip(columns, row)) for row in rows])
+    measure("slotted models", lambda: row_mapping.map_rows(models.Person, columns, rows))
+    try:
+        import pandas  # noqa: F401
+    except ImportError:
+        print("pandas is not installed; skipping the DataFrame variant.")
+        return
+    frame = measure("DataFrame", lambda: row_mapping.rows_to_frame(columns, rows, {'gender': models.Gender}))
+    print(f"{'':<22} DataFrame.memory_usage(deep=True)={frame.memory_usage(deep=True).sum() / 1_048_576:.2f} MiB")
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        print("pyarrow is not installed; skipping the Arrow variant.")
+        return
+    plan = row_mapping.arrow_column_plan('person', tuple(columns))
+    table = measure("Arrow table", lambda: row_mapping.record_batches_to_table(plan, [
+        row_mapping.rows_to_record_batch(plan, rows[i:i + 1000]) for i in range(0, len(rows), 1000)
+    ]))
+    print(f"{'':<22} Table.nbytes={table.nbytes / 1_048_576:.2f} MiB")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,268 @@
+"""
+Times every public db_operations function against a local MySQL loaded with synthetic data.
+
+    python benchmarks/run_benchmarks.py --scale 10                 # load x10 data, then benchmark
+    python benchmarks/run_benchmarks.py --scale 100 --skip-load    # reuse what is already loaded
+    python benchmarks/run_benchmarks.py --scale 10 --compare benchmarks/results/abc1234-x10.json
+
+Each function runs once to warm up and then --rounds times. Every round runs inside a unit
+of work that is rolled back, so write functions leave the data unchanged and every round
+sees the same rows. Results (min/max/mean/median/stddev in ms, like pytest-benchmark) are
+saved as JSON under benchmarks/results/, named after the current commit and scale.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import date, datetime, timedelta
+from inspect import getmembers, isfunction
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCHMARK_DIR))
+sys.path.insert(0, BENCHMARK_DIR)
+
+import db
+import db_operations as ops
+import profiling
+import synthetic_data
+
+RESULTS_DIR = os.path.join(BENCHMARK_DIR, 'results')
+
+# Functions that commit on connections of their own and cannot be rolled back here.
+SKIPPED = {
+    'bulk_import_members': "Commits each batch on an exclusive connection.",
+    'record_email_deliveries': "Commits each batch on an exclusive connection.",
+}
+
+# =================================================================
+# CONTEXT
+# =================================================================
+
+def build_context(data):
+    """Picks the ids the benchmark cases use from the generated data."""
+    people = data['person'][1]
+    members = [row[0] for row in data['club_member'][1]]
+    genders = {row[0]: row[12] for row in people}
+    linked = {row[0] for row in data['club_member_family_link'][1]}
+    formations = data['formations'][1]
+    sessions = {row[0]: row for row in data['sessions'][1]}
+    teams = {row[0]: row for row in data['teams'][1]}
+    hobbies_by_member = {}
+    for member_id, hobby_id in data['club_member_hobbies'][1]:
+        hobbies_by_member.setdefault(member_id, set()).add(hobby_id)
+
+    session_id, team_id = formations[0][1], formations[0][2]
+    session_day = sessions[session_id][2].date()
+    busy = {(f[3], sessions[f[1]][2].date()) for f in formations}
+    free_players = [m for m in members if genders[m] == teams[team_id][3] and (m, session_day) not in busy]
+    unlinked = [m for m in members if m not in linked]
+    today = date.today()
+
+    return {
+        'member_id': members[0],
+        'unlinked_member_id': unlinked[0] if unlinked else members[-1],
+        'contact_id': people[-1][0],
+        'session_id': session_id,
+        'session_time': sessions[session_id][2],
+        'team_id': team_id,
+        'location_id': teams[team_id][1],
+        'free_players': free_players[:6],
+        'new_hobby_id': next(h for h in range(1, 7) if h not in hobbies_by_member.get(members[0], set())),
+        'year': today.year,
+        'today': today,
+    }
+
+def _new_person(ssn=None):
+    return {'first_name': 'Bench', 'last_name': 'Mark', 'dob': date(2000, 1, 1), 'gender': 'Male',
+            'ssn': ssn, 'email_address': 'bench.mark@example.com'}
+
+# =================================================================
+# CASES
+# =================================================================
+
+# name -> function(ctx) making one call. Names must match the db_operations function they time;
+# extra variants use "function[variant]".
+CASES = {
+    # --- Reads ---
+    'search': lambda c: ops.search('person', page_size=50),
+    'search[arrow]': lambda c: ops.search('person', page_size=50, result_format='arrow'),
+    'get_all_locations_with_phones': lambda c: ops.get_all_locations_with_phones(),
+    'get_all_members_with_details': lambda c: ops.get_all_members_with_details(page_size=50),
+    'get_all_members_with_details[all]': lambda c: ops.get_all_members_with_details(),
+    'find_members': lambda c: ops.find_members('Sm'),
+    'get_member_profile': lambda c: ops.get_member_profile(c['member_id']),
+    'get_all_sessions_with_details': lambda c: ops.get_all_sessions_with_details(),
+    'get_teams_for_session': lambda c: ops.get_teams_for_session(c['session_id']),
+    'get_roster_for_formation': lambda c: ops.get_roster_for_formation(c['session_id'], c['team_id']),
+    'get_eligible_players_for_team': lambda c: ops.get_eligible_players_for_team(c['team_id']),
+    'get_eligible_players_for_team[session]': lambda c: ops.get_eligible_players_for_team(c['team_id'], c['session_id']),
+    'get_payments_and_fees_for_member': lambda c: ops.get_payments_and_fees_for_member(c['member_id']),
+    'get_donations_and_arrears_report': lambda c: ops.get_donations_and_arrears_report(c['year']),
+    'get_family_links_for_member': lambda c: ops.get_family_links_for_member(c['member_id']),
+    'get_all_teams_with_details': lambda c: ops.get_all_teams_with_details(),
+    'get_all_sessions_for_dashboard': lambda c: ops.get_all_sessions_for_dashboard(page_size=50),
+    'find_sessions': lambda c: ops.find_sessions('2025-01-06'),
+    'get_current_personnel_assignments': lambda c: ops.get_current_personnel_assignments(),
+    'get_hobbies_for_member': lambda c: ops.get_hobbies_for_member(c['member_id']),
+    'get_dashboard_metrics': lambda c: ops.get_dashboard_metrics(),
+    'get_free_slots': lambda c: ops.get_free_slots(c['location_id'], c['today']),
+    'get_reschedule_conflicts': lambda c: ops.get_reschedule_conflicts(c['session_id'], c['session_time'] + timedelta(hours=1)),
+    'get_pending_emails': lambda c: ops.get_pending_emails(),
+
+    # --- Writes (rolled back after each round) ---
+    'update': lambda c: ops.update('person', {'person_id': c['member_id']}, {'phone_number': '514-000-0000'}),
+    'delete': lambda c: ops.delete('club_member_hobbies', club_member_id=c['member_id']),
+    'add_person': lambda c: ops.add_person(**_new_person()),
+    'add_club_member': lambda c: ops.add_club_member(ops.add_person(**_new_person('999999999')), c['today']),
+    'add_location': lambda c: ops.add_location('Benchmark Location', 'Branch'),
+    'add_hobby': lambda c: ops.add_hobby('Benchmarking'),
+    'add_payment': lambda c: ops.add_payment(c['member_id'], c['today'], 10.00, 'Cash', c['year'] + 1),
+    'add_team': lambda c: ops.add_team('Benchmark Team', c['location_id'], 'Male'),
+    'add_session': lambda c: ops.add_session('Training', datetime.combine(c['today'], datetime.min.time()) + timedelta(hours=8), c['location_id']),
+    'add_sessions_bulk': lambda c: ops.add_sessions_bulk([
+        {'session_type': 'Training', 'date_time': datetime.combine(c['today'] + timedelta(days=d), datetime.min.time()) + timedelta(hours=7),
+         'location_id': c['location_id'], 'team_ids': [c['team_id']]}
+        for d in range(20)]),
+    'add_formation': lambda c: ops.add_formation(c['session_id'], c['team_id'], c['free_players'][0], 'Setter'),
+    'add_formations_bulk': lambda c: ops.add_formations_bulk(
+        c['session_id'], c['team_id'], [(p, 'Libero') for p in c['free_players']]),
+    'add_formations_batch': lambda c: ops.add_formations_batch(
+        [(c['session_id'], c['team_id'], p, 'Libero') for p in c['free_players']]),
+    'add_email': lambda c: ops.add_email('Benchmark', 'bench@example.com', 'Benchmark', 'Body', c['session_id']),
+    'link_family_to_member': lambda c: ops.link_family_to_member(c['unlinked_member_id'], c['contact_id'], 'Friend', 'Secondary'),
+    'assign_person_to_location': lambda c: ops.assign_person_to_location(c['member_id'], c['location_id'], c['today']),
+    'add_hobby_to_member': lambda c: ops.add_hobby_to_member(c['member_id'], c['new_hobby_id']),
+    'add_team_to_session': lambda c: ops.add_team_to_session(
+        ops.add_session('Training', datetime.combine(c['today'], datetime.min.time()) + timedelta(hours=7), c['location_id']), c['team_id']),
+    'add_location_phone_number': lambda c: ops.add_location_phone_number(c['location_id'], '000-000-0000'),
+    'register_new_club_member': lambda c: ops.register_new_club_member(_new_person('999999999'), {'join_date': c['today']}),
+    'update_member_profile': lambda c: ops.update_member_profile(c['member_id'], {'city': 'Laval'}, {'weight': 70}),
+    'create_and_link_family_member': lambda c: ops.create_and_link_family_member(
+        c['unlinked_member_id'], _new_person(), {'relationship_type': 'Friend', 'contact_priority': 'Secondary'}),
+    'reschedule_session': lambda c: ops.reschedule_session(c['session_id'], c['session_time'] + timedelta(minutes=30)),
+    'detach_team_from_session': lambda c: ops.detach_team_from_session(c['session_id'], c['team_id']),
+    'recalculate_all_member_statuses': lambda c: ops.recalculate_all_member_statuses(c['year']),
+    'generate_and_log_weekly_emails': lambda c: ops.generate_and_log_weekly_emails(c['today'], c['today'] + timedelta(days=7)),
+}
+
+# =================================================================
+# RUNNER
+# =================================================================
+
+class _RollBack(Exception):
+    pass
+
+def _timed_round(case, ctx):
+    """Runs one call inside a unit of work that is rolled back. Returns (seconds, rows)."""
+    elapsed, rows = None, None
+    try:
+        with db.unit_of_work(label='benchmark'):
+            started = time.perf_counter()
+            result = case(ctx)
+            elapsed = time.perf_counter() - started
+            if isinstance(result, tuple) and len(result) == 2 and not isinstance(result[1], (int, float)):
+                result = result[0]  # A (rows, next_cursor) page
+            rows = len(result) if hasattr(result, '__len__') and not isinstance(result, (str, dict)) else None
+            raise _RollBack()
+    except _RollBack:
+        pass
+    return elapsed, rows
+
+def run_case(case, ctx, rounds):
+    _timed_round(case, ctx)  # Warm-up: connections, prepared statements, server caches
+    timings, rows = [], None
+    for _ in range(rounds):
+        elapsed, rows = _timed_round(case, ctx)
+        timings.append(elapsed * 1000)
+    return {
+        'rounds': rounds,
+        'min_ms': min(timings),
+        'max_ms': max(timings),
+        'mean_ms': statistics.mean(timings),
+        'median_ms': statistics.median(timings),
+        'stddev_ms': statistics.stdev(timings) if len(timings) > 1 else 0.0,
+        'rows': rows,
+    }
+
+def public_functions():
+    return sorted(name for name, func in getmembers(ops, isfunction)
+                  if not name.startswith('_') and func.__module__ == ops.__name__)
+
+def current_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=BENCHMARK_DIR, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+def compare(results, baseline_path):
+    with open(baseline_path, encoding='utf-8') as f:
+        baseline = json.load(f)['results']
+    print(f"\n{'function':<40} {'baseline':>10} {'current':>10} {'change':>8}")
+    for name, stats in results.items():
+        if name in baseline:
+            before, after = baseline[name]['median_ms'], stats['median_ms']
+            change = (after - before) / before * 100 if before else 0.0
+            print(f"{name:<40} {before:>9.2f}ms {after:>9.2f}ms {change:>+7.1f}%")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark every public db_operations function.")
+    parser.add_argument('--scale', type=int, default=10, help="Synthetic data size as a multiple of the seed script.")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--rounds', type=int, default=5)
+    parser.add_argument('--skip-load', action='store_true', help="Benchmark the data already loaded with the same --scale/--seed.")
+    parser.add_argument('--only', nargs='*', help="Only run these cases.")
+    parser.add_argument('--output', help="Where to write the JSON results.")
+    parser.add_argument('--compare', metavar='FILE', help="Print the change against an earlier results file.")
+    args = parser.parse_args()
+
+    profiling.profiling_config['enabled'] = False  # Measure the functions, not the instrumentation
+
+    data = synthetic_data.generate(args.scale, args.seed)
+    if not args.skip_load:
+        print(f"Loading synthetic data at x{args.scale} (seed {args.seed})...")
+        synthetic_data.load(data)
+    ctx = build_context(data)
+
+    results = {}
+    for name, case in CASES.items():
+        if args.only and name not in args.only:
+            continue
+        results[name] = run_case(case, ctx, args.rounds)
+        stats = results[name]
+        print(f"{name:<40} median {stats['median_ms']:9.2f} ms  min {stats['min_ms']:9.2f} ms  rows {stats['rows']}")
+
+    covered = {name.split('[')[0] for name in CASES}
+    uncovered = [name for name in public_functions() if name not in covered and name not in SKIPPED]
+    if uncovered:
+        print(f"\nNo benchmark case for: {', '.join(uncovered)}")
+
+    commit = current_commit()
+    report = {
+        'meta': {
+            'commit': commit,
+            'created_at': datetime.now().isoformat(timespec='seconds'),
+            'scale': args.scale,
+            'seed': args.seed,
+            'rounds': args.rounds,
+            'row_counts': synthetic_data.row_counts(data),
+            'python': platform.python_version(),
+            'skipped': SKIPPED,
+            'uncovered': uncovered,
+        },
+        'results': results,
+    }
+    output = args.output or os.path.join(RESULTS_DIR, f"{commit}-x{args.scale}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults written to {output}")
+
+    if args.compare:
+        compare(results, args.compare)
+
+if __name__ == '__main__':
+    main()
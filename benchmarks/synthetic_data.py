@@ -0,0 +1,246 @@
+"""
+Deterministic synthetic data for benchmarking, at any multiple of the seed script's size.
+
+    python benchmarks/synthetic_data.py --scale 100            # about 2,500 people
+    python benchmarks/synthetic_data.py --scale 10000 --seed 7 # about 250,000 people
+
+The same (scale, seed) always produces the same rows. The data respects the schema's
+triggers: every club member has an SSN, players are only rostered on teams of their
+gender, no player has two sessions on the same day, no location hosts two sessions on
+the same day, sessions have at most two teams and members make at most four payments per year.
+
+Loading REPLACES the contents of every table, like seed_database.sql does.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import date, datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import mysql.connector
+from db_connector import db_config
+from models import PaymentMethod, PlayerPosition, RelationshipType
+
+# Rows per table in seed_database.sql, multiplied by the scale.
+BASE_PEOPLE = 25
+BASE_SESSIONS = 6
+MEMBER_SHARE = 0.8          # The rest are family contacts without an SSN
+PLAYERS_PER_TEAM = 4        # Formations per team per session
+EMAIL_SHARE = 0.5           # Share of formations with a logged reminder email
+
+FIRST_NAMES = {
+    'Male': ['Bob', 'Charlie', 'Edward', 'George', 'Ian', 'Kyle', 'Liam', 'Noah', 'Olivier', 'Samuel'],
+    'Female': ['Alice', 'Diana', 'Fiona', 'Hannah', 'Julia', 'Maya', 'Chloe', 'Emma', 'Lea', 'Sofia'],
+}
+LAST_NAMES = ['Tremblay', 'Gagnon', 'Roy', 'Bouchard', 'Leblanc', 'Lavoie', 'Cote', 'Simard', 'Gauthier',
+              'Morin', 'Bergeron', 'Pelletier', 'Lapointe', 'Fortin', 'Gagne', 'Ouellet', 'Girard', 'Caron']
+CITIES = ['Montreal', 'Laval', 'Brossard', 'Longueuil', 'Pointe-Claire', 'Vaudreuil-Dorion']
+HOBBIES = ['Swimming', 'Soccer', 'Tennis', 'Hockey', 'Reading', 'Gaming']
+
+# Tables filled by the generator, in foreign-key order.
+TABLES = ('locations', 'location_phone_numbers', 'hobbies', 'person', 'club_member', 'club_member_family_link',
+          'location_assignment', 'club_member_hobbies', 'teams', 'payments', 'sessions', 'session_teams',
+          'formations', 'emails')
+
+# Summary tables maintained by triggers. TRUNCATE does not fire triggers, so they are emptied
+# too; the triggers refill them while the base tables load.
+DERIVED_TABLES = ('member_year_ledger', 'current_location_assignment', 'player_schedule', 'location_occupancy')
+
+# =================================================================
+# GENERATION
+# =================================================================
+
+def generate(scale=1, seed=42, today=None):
+    """
+    Returns {table_name: (columns, rows)} in TABLES order.
+    `today` anchors all dates (sessions are spread around it); it defaults to date.today(),
+    so pass a fixed date when rows must be identical across days.
+    """
+    rng = random.Random(seed)
+    today = today or date.today()
+    data = {}
+
+    # --- Locations and teams grow slower than the membership, like a real club ---
+    n_locations = max(6, round(6 * scale ** 0.5))
+    data['locations'] = (
+        ('location_id', 'location_type', 'name', 'address', 'city', 'province', 'postal_code', 'web_address', 'max_capacity'),
+        [(i, 'Head' if i == 1 else 'Branch', f"MVC Location {i}", f"{rng.randrange(1, 9999)} Rue Principale",
+          rng.choice(CITIES), 'Quebec', f"H{rng.randrange(10)}X {rng.randrange(10)}X{rng.randrange(10)}",
+          f"https://mvc-{i}.ca", rng.choice((75, 80, 90, 100, 120, 150)))
+         for i in range(1, n_locations + 1)]
+    )
+    data['location_phone_numbers'] = (
+        ('location_id', 'phone_number'),
+        [(i, f"514-{i // 10000:03d}-{i % 10000:04d}") for i in range(1, n_locations + 1)]
+    )
+    data['hobbies'] = (
+        ('hobby_id', 'hobby_name', 'description'),
+        [(i, name, f"{name} with friends.") for i, name in enumerate(HOBBIES, start=1)]
+    )
+
+    # --- People: members first, then family contacts ---
+    n_people = BASE_PEOPLE * scale
+    n_members = int(n_people * MEMBER_SHARE)
+    people, genders = [], {}
+    for i in range(1, n_people + 1):
+        gender = rng.choice(('Male', 'Female'))
+        is_member = i <= n_members
+        dob = today - timedelta(days=rng.randrange(6 * 365, 50 * 365) if is_member else rng.randrange(25 * 365, 80 * 365))
+        people.append((
+            i, rng.choice(FIRST_NAMES[gender]), rng.choice(LAST_NAMES), dob,
+            f"{i:09d}" if is_member else None, f"SYN{i:09d}" if is_member else None,
+            f"514-{rng.randrange(200, 999)}-{rng.randrange(10000):04d}", f"{rng.randrange(1, 9999)} Rue Saint-Denis",
+            rng.choice(CITIES), 'Quebec', f"H{rng.randrange(10)}A {rng.randrange(10)}B{rng.randrange(10)}",
+            f"person{i}@example.com", gender
+        ))
+        genders[i] = gender
+    data['person'] = (
+        ('person_id', 'first_name', 'last_name', 'dob', 'ssn', 'medicare_number', 'phone_number', 'address',
+         'city', 'province', 'postal_code', 'email_address', 'gender'),
+        people
+    )
+    data['club_member'] = (
+        ('club_member_id', 'height', 'weight', 'activity_status', 'join_date'),
+        [(i, round(rng.uniform(140, 200), 2), round(rng.uniform(35, 100), 2), 'Inactive',
+          today - timedelta(days=rng.randrange(0, 5 * 365)))
+         for i in range(1, n_members + 1)]
+    )
+    relationships = [r.value for r in RelationshipType]
+    data['club_member_family_link'] = (
+        ('club_member_id', 'family_member_id', 'relationship_type', 'contact_priority'),
+        [(member_id, contact_id, rng.choice(relationships), 'Primary')
+         for member_id, contact_id in zip(range(1, n_members + 1), range(n_members + 1, n_people + 1))]
+    )
+
+    # --- Every member is assigned to a location; the first one at each location coaches ---
+    member_location = {i: rng.randrange(1, n_locations + 1) for i in range(1, n_members + 1)}
+    coached = set()
+    assignments = []
+    for assignment_id, (member_id, location_id) in enumerate(member_location.items(), start=1):
+        role, mandate = (None, None)
+        if location_id not in coached:
+            coached.add(location_id)
+            role, mandate = 'Coach', 'Volunteer'
+        assignments.append((assignment_id, member_id, location_id, today - timedelta(days=rng.randrange(30, 700)),
+                            None, role, mandate))
+    data['location_assignment'] = (
+        ('assignment_id', 'person_id', 'location_id', 'start_date', 'end_date', 'personnel_role', 'mandate'),
+        assignments
+    )
+    data['club_member_hobbies'] = (
+        ('club_member_id', 'hobby_id'),
+        [(member_id, hobby_id) for member_id in range(1, n_members + 1)
+         for hobby_id in sorted(rng.sample(range(1, len(HOBBIES) + 1), rng.randrange(0, 3)))]
+    )
+
+    # --- One male and one female team per location ---
+    teams = []
+    for location_id in range(1, n_locations + 1):
+        for gender in ('Male', 'Female'):
+            teams.append((len(teams) + 1, location_id, f"{gender} Team {location_id}", gender))
+    data['teams'] = (('team_id', 'home_location_id', 'name', 'team_gender'), teams)
+
+    # --- Payments for the last three years, at most four per member and year ---
+    methods = [m.value for m in PaymentMethod]
+    payments = []
+    for member_id in range(1, n_members + 1):
+        for year in range(today.year - 2, today.year + 1):
+            if rng.random() < 0.2:
+                continue
+            for _ in range(rng.randrange(1, 4)):
+                payments.append((len(payments) + 1, member_id, date(year, rng.randrange(1, 13), rng.randrange(1, 29)),
+                                 rng.choice((50.00, 100.00, 150.00)), rng.choice(methods), year))
+    data['payments'] = (('payment_id', 'club_member_id', 'payment_date', 'amount', 'method', 'membership_year'), payments)
+
+    # --- Sessions within 180 days of today, two teams of the same gender each ---
+    players_by_gender = {g: [i for i in range(1, n_members + 1) if genders[i] == g] for g in ('Male', 'Female')}
+    teams_by_gender = {g: [t for t in teams if t[3] == g] for g in ('Male', 'Female')}
+    positions = [p.value for p in PlayerPosition]
+    sessions, session_teams, formations, emails = [], [], [], []
+    busy_days = set()  # (player_id, date): keeps the 3-hour conflict trigger satisfied
+    booked_days = set()  # (location_id, date): one session per location and evening keeps the double-booking trigger satisfied
+    n_sessions = BASE_SESSIONS * scale
+    for session_id in range(1, n_sessions + 1):
+        session_type = rng.choice(('Game', 'Training'))
+        gender = rng.choice(('Male', 'Female'))
+        pair = rng.sample(teams_by_gender[gender], 2)
+        day = today + timedelta(days=rng.randrange(-180, 181))
+        while (pair[0][1], day) in booked_days:
+            day += timedelta(days=1)
+        booked_days.add((pair[0][1], day))
+        start = datetime(day.year, day.month, day.day, rng.randrange(16, 21), rng.choice((0, 30)))
+        sessions.append((session_id, session_type, start, '3-1' if session_type == 'Game' and day < today else None, pair[0][1]))
+        for team in pair:
+            session_teams.append((session_id, team[0]))
+            pool = players_by_gender[gender]
+            if not pool:
+                continue
+            rostered = 0
+            for player_id in rng.sample(pool, min(len(pool), PLAYERS_PER_TEAM * 3)):
+                if rostered == PLAYERS_PER_TEAM:
+                    break
+                if (player_id, day) in busy_days:
+                    continue
+                busy_days.add((player_id, day))
+                rostered += 1
+                formations.append((len(formations) + 1, session_id, team[0], player_id, rng.choice(positions)))
+                if rng.random() < EMAIL_SHARE:
+                    emails.append((len(emails) + 1, session_id, f"MVC Location {pair[0][1]}", f"person{player_id}@example.com",
+                                   f"{team[2]} {session_type} on {start:%Y-%m-%d %H:%M}",
+                                   f"Hello, you are scheduled for a {session_type} on {start:%A %B %d at %I:%M %p}.",
+                                   start - timedelta(days=rng.randrange(1, 8))))
+    data['sessions'] = (('session_id', 'type', 'date_time', 'final_score', 'location_id'), sessions)
+    data['session_teams'] = (('session_id', 'team_id'), session_teams)
+    data['formations'] = (('formation_id', 'session_id', 'team_id', 'player_id', 'player_position'), formations)
+    data['emails'] = (('email_id', 'session_id', 'sender_name', 'receiver_email', 'email_subject', 'body', 'send_at'), emails)
+
+    return {table: data[table] for table in TABLES}
+
+# =================================================================
+# LOADING
+# =================================================================
+
+def load(data, batch_size=1000, progress=print):
+    """Replaces the database contents with `data`, inserting each table in batches."""
+    conn = mysql.connector.connect(**db_config)
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SET FOREIGN_KEY_CHECKS = 0")
+        for table in reversed(TABLES + DERIVED_TABLES):
+            cursor.execute(f"TRUNCATE TABLE {table}")
+        cursor.execute("SET FOREIGN_KEY_CHECKS = 1")
+
+        for table, (columns, rows) in data.items():
+            started = time.perf_counter()
+            sql = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join(['%s'] * len(columns))})"
+            for i in range(0, len(rows), batch_size):
+                cursor.executemany(sql, rows[i:i + batch_size])
+                conn.commit()
+            progress(f"{table:<24} {len(rows):>9} rows  {time.perf_counter() - started:8.2f} s")
+
+        # The dashboard counters are recomputed from scratch on the next read.
+        cursor.execute("DELETE FROM club_metrics")
+        conn.commit()
+    finally:
+        cursor.close()
+        conn.close()
+
+def row_counts(data):
+    return {table: len(rows) for table, (_, rows) in data.items()}
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Load deterministic synthetic data (replaces all rows).")
+    parser.add_argument('--scale', type=int, default=10, help="Multiple of the seed script's size (10, 100, 1000, ...).")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--dry-run', action='store_true', help="Only generate and print the row counts.")
+    args = parser.parse_args()
+
+    dataset = generate(args.scale, args.seed)
+    if args.dry_run:
+        for table, count in row_counts(dataset).items():
+            print(f"{table:<24} {count:>9} rows")
+    else:
+        load(dataset)
@@ -1,30 +1,324 @@
+import time
 import db_operations as ops
+import db_connector
+import profiling
+import query_cache
+from contextlib import contextmanager
 from mysql.connector import Error as DB_Error
 
 class RuleViolation(Exception):
     pass
 
-def execute_query(query_func, params=None):
-    """A wrapper for all SELECT operations."""
-    try:
-        if params:
-            return query_func(**params)
+# =================================================================
+# UNIT OF WORK
+# =================================================================
+
+class _SharedCursor:
+    """A cursor shared by every ops.* call in a unit of work. close() is a no-op until the unit ends."""
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def close(self):
+        pass
+
+class _UnitConnection:
+    """
+    The connection handed out by get_db_connection() while a unit of work is active.
+    The ops.* functions manage their own transactions, so the calls that would end the
+    unit's transaction early are intercepted:
+    - close() does nothing; the unit commits once when it ends.
+    - start_transaction() sets a savepoint instead, since the unit's transaction is already
+      open; commit() releases it.
+    - rollback() undoes only the current ops.* call (back to its savepoint).
+    prepared_cursor() uses the pooled connection's statement cache, so prepared statements
+    outlive the unit and are reused by later reruns.
+    """
+
+    def __init__(self, unit):
+        self._unit = unit
+
+    def __getattr__(self, name):
+        return getattr(self._unit.raw_connection, name)
+
+    def cursor(self, **kwargs):
+        return self._unit.cursor(**kwargs)
+
+    def prepared_cursor(self, sql, dictionary=False):
+        return self._unit.raw_connection.prepared_cursor(sql, dictionary)
+
+    def close(self):
+        pass
+
+    def commit(self):
+        self._unit.end_call()
+
+    def start_transaction(self, *args, **kwargs):
+        self._unit.begin_call()
+
+    def rollback(self):
+        self._unit.rollback_current_change()
+
+class UnitOfWork:
+    """
+    Shares one pooled connection, one transaction and one cursor per cursor type between
+    every ops.* call made on this thread until the unit ends. Reads see a single consistent
+    snapshot; changes are committed once at the end.
+    Use db.unit_of_work() rather than creating this directly.
+    """
+
+    def __init__(self, read_only=False):
+        self.read_only = read_only
+        self.raw_connection = None
+        self.connection = _UnitConnection(self)
+        self.dirty = False           # True once execute_change has run inside the unit
+        self.rollback_only = False   # Set when a change fails outside a savepoint
+        self.cache_generation = query_cache.cache.generation
+        self.touched_tables = set()  # Tables written in the unit; None if unknown
+        self._cursors = {}
+        self._savepoints = []        # (name, kind): 'change' from execute_change, 'call' from start_transaction()
+
+    def begin(self):
+        started = time.perf_counter()
+        try:
+            self.raw_connection = db_connector.get_pool().acquire()
+        finally:
+            profiling.record_connect(time.perf_counter() - started)
+        try:
+            self.raw_connection.start_transaction(
+                consistent_snapshot=True, isolation_level='REPEATABLE READ', readonly=self.read_only
+            )
+        except BaseException:
+            self.raw_connection.close()
+            raise
+        db_connector.bind_unit_of_work(self)
+
+    def cursor(self, **kwargs):
+        if kwargs.get('buffered') is False:
+            # Asked for explicitly to stream a large result. Rows stay on the server until read,
+            # so the cursor is not shared, and the caller must read or discard them all.
+            return self.raw_connection.cursor(**kwargs)
+        # Buffered cursors can be reused safely even if a caller stops reading early.
+        kwargs.setdefault('buffered', True)
+        key = tuple(sorted(kwargs.items()))
+        if key not in self._cursors:
+            self._cursors[key] = _SharedCursor(self.raw_connection.cursor(**kwargs))
+        return self._cursors[key]
+
+    def _execute(self, sql):
+        cursor = self.raw_connection.cursor()
+        try:
+            cursor.execute(sql)
+        finally:
+            cursor.close()
+
+    def _push_savepoint(self, kind):
+        name = f"uow_{kind}_{len(self._savepoints)}"
+        self._execute(f"SAVEPOINT {name}")
+        self._savepoints.append((name, kind))
+        return name
+
+    def _pop_savepoint(self, name, rollback):
+        # Releasing a savepoint also releases any left above it by a call that never ended.
+        while self._savepoints and self._savepoints.pop()[0] != name:
+            pass
+        if rollback:
+            self._execute(f"ROLLBACK TO SAVEPOINT {name}")
+        self._execute(f"RELEASE SAVEPOINT {name}")
+
+    def begin_change(self):
+        """Sets a savepoint so a failed change can be undone without losing the rest of the unit."""
+        self.dirty = True
+        self._push_savepoint('change')
+
+    def end_change(self, failed=False):
+        name = next(name for name, kind in reversed(self._savepoints) if kind == 'change')
+        self._pop_savepoint(name, rollback=failed)
+
+    def begin_call(self):
+        """
+        Sets a savepoint where an ops.* call starts its own transaction, so that a call made
+        outside execute_change (e.g. a write inside a query function) can still be undone alone.
+        """
+        self._push_savepoint('call')
+
+    def end_call(self):
+        if self._savepoints and self._savepoints[-1][1] == 'call':
+            self._pop_savepoint(self._savepoints[-1][0], rollback=False)
+
+    def rollback_current_change(self):
+        if not self._savepoints:
+            # Statements before the failure may have been applied; only a full rollback is safe.
+            print("Warning: an ops.* call rolled back outside any savepoint; "
+                  "the whole unit of work will be rolled back when it ends.")
+            self.rollback_only = True
+        elif self._savepoints[-1][1] == 'call':
+            self._pop_savepoint(self._savepoints[-1][0], rollback=True)
         else:
-            return query_func()
+            self._execute(f"ROLLBACK TO SAVEPOINT {self._savepoints[-1][0]}")
+
+    def record_writes(self, tables):
+        if tables is None or self.touched_tables is None:
+            self.touched_tables = None
+        else:
+            self.touched_tables.update(tables)
+
+    def end(self, failed=False):
+        db_connector.bind_unit_of_work(None)
+        try:
+            for cursor in self._cursors.values():
+                cursor._cursor.close()
+            if failed or self.rollback_only:
+                if self.rollback_only and not failed:
+                    print("Warning: unit of work rolled back because a change failed outside a savepoint.")
+                self.raw_connection.rollback()
+            else:
+                self.raw_connection.commit()
+        finally:
+            self._cursors = {}
+            self.raw_connection.close()
+            # Other threads may have cached rows between our writes and the commit.
+            if self.dirty:
+                query_cache.cache.invalidate(self.touched_tables)
+
+@contextmanager
+def unit_of_work(read_only=False, label=None):
+    """
+    Opens a unit of work for the current thread. Pages open one per rerun:
+
+        with db.unit_of_work(label="Payments"):
+            ...every db.execute_query / db.execute_change call here shares one connection...
+
+    The unit commits when the block ends and rolls back if it ends with an error.
+    Streamlit's st.rerun() and st.stop() work by raising control-flow exceptions that are
+    not errors, so the unit still commits in that case. Nested units join the outer one.
+    `label` names the page in the profiling data (see profiling.py).
+    """
+    active = db_connector.get_active_unit_of_work()
+    if active is not None:
+        yield active
+        return
+
+    with profiling.track_rerun(label):
+        unit = UnitOfWork(read_only=read_only)
+        unit.begin()
+        try:
+            yield unit
+        except Exception:
+            unit.end(failed=True)
+            raise
+        except BaseException:
+            unit.end()
+            raise
+        else:
+            unit.end()
+
+# =================================================================
+# QUERY WRAPPERS
+# =================================================================
+
+def _run(func, params):
+    if params:
+        return func(**params)
+    else:
+        return func()
+
+def _copy_rows(result):
+    """Cached results are shared, so callers get their own copy of the list and each row."""
+    if isinstance(result, list):
+        return [dict(row) if isinstance(row, dict) else row for row in result]
+    if isinstance(result, tuple):  # A (rows, next_cursor) page
+        return tuple(_copy_rows(part) for part in result)
+    return result
+
+def execute_query(query_func, params=None, as_arrow=False):
+    """
+    A wrapper for all SELECT operations.
+    Reference lookups listed in query_cache are served from the read cache.
+    With as_arrow=True (ops.search only), the rows come back as a typed pyarrow.Table
+    that can be passed straight to st.dataframe.
+    """
+    if as_arrow:
+        params = dict(params or {}, result_format='arrow')
+    with profiling.track_call(query_func.__name__, 'query'):
+        return _execute_query(query_func, params)
+
+def _execute_query(query_func, params):
+    tables = query_cache.tables_read(query_func, params)
+    key = query_cache.make_key(query_func, params) if tables else None
+    if key is None:
+        try:
+            return _run(query_func, params)
+        except DB_Error as e:
+            raise e
+
+    hit, cached = query_cache.cache.get(key)
+    if hit:
+        profiling.mark_cache_hit()
+        return _copy_rows(cached)
+
+    unit = db_connector.get_active_unit_of_work()
+    # Inside a unit the rows come from the unit's snapshot, which is as old as the unit.
+    since_generation = unit.cache_generation if unit is not None else query_cache.cache.generation
+    try:
+        result = _run(query_func, params)
     except DB_Error as e:
         raise e
+    # Rows read after the unit's own uncommitted writes must not leak to other pages.
+    # Empty results are not cached: the ops functions also return [] when a query fails.
+    if result and (unit is None or not unit.dirty):
+        query_cache.cache.put(key, tables, _copy_rows(result), since_generation)
+    return result
 
 def execute_change(operation_func, params=None):
-    """A wrapper for all INSERT, UPDATE, DELETE operations."""
+    """
+    A wrapper for all INSERT, UPDATE, DELETE operations.
+    Cached reads of the tables the change writes are invalidated.
+    """
+    with profiling.track_call(operation_func.__name__, 'change'):
+        return _execute_change(operation_func, params)
+
+def _execute_change(operation_func, params):
+    tables = query_cache.tables_written(operation_func, params)
+    unit = db_connector.get_active_unit_of_work()
+    if unit is not None:
+        unit.begin_change()
+        unit.record_writes(tables)
+    failed = True
     try:
-        if params:
-            return operation_func(**params)
-        else:
-            return operation_func()
+        result = _run(operation_func, params)
+        failed = False
+        return result
     except DB_Error as e:
         raise RuleViolation(str(e)) from e
     except Exception as e:
         raise e
+    finally:
+        if unit is not None:
+            unit.end_change(failed=failed)
+        query_cache.cache.invalidate(tables)
+
+def get_cache_stats():
+    """Returns the read cache's hit/miss counters."""
+    return query_cache.cache.stats()
+
+def get_statement_stats():
+    """Returns how often each prepared statement was executed and prepared."""
+    return db_connector.get_statement_stats()
+
+def get_performance_summary():
+    """Returns p50/p95/p99 timings per ops function and per page, and the slow-query log."""
+    return {
+        'functions': profiling.function_summary(),
+        'pages': profiling.rerun_summary(),
+        'slow_queries': profiling.profiler.snapshot('slow_queries'),
+    }
 
 def execute_raw_sql(sql, params=None):
     """A special function to run raw SQL for complex, one-off reports."""
@@ -41,4 +335,4 @@ def execute_raw_sql(sql, params=None):
     finally:
         if conn.is_connected():
             cursor.close()
-            conn.close()
\ No newline at end of file
+            conn.close()
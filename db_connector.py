@@ -1,5 +1,11 @@
+import threading
+import time
+from collections import Counter, OrderedDict, deque
+from contextlib import contextmanager
 import mysql.connector
 from mysql.connector import Error
+from mysql.connector.errors import PoolError
+import profiling
 
 db_config = {
     'host': 'localhost',
@@ -8,13 +14,318 @@ db_config = {
     'database': 'mvc_db'
 }
 
-def get_db_connection():
-    """Establishes and returns a database connection."""
+# Settings for the process-wide connection pool. Streamlit re-runs the page scripts
+# but keeps this module imported, so every rerun shares the same pool.
+pool_config = {
+    'pool_size': 5,             # Maximum number of open connections
+    'max_age_seconds': 1800,    # Connections older than this are closed and replaced
+    'checkout_timeout': 10,     # Seconds to wait for a free connection before giving up
+    'statement_cache_size': 32  # Prepared statements kept open per connection (least recently used are closed)
+}
+
+# =================================================================
+# PREPARED STATEMENT CACHE
+# =================================================================
+
+# Process-wide counters per SQL text, across every connection's cache.
+_statement_stats = Counter()
+_statement_prepares = Counter()
+_statement_stats_lock = threading.Lock()
+
+class PreparedStatement:
+    """
+    A server-side prepared statement for one SQL text, owned by a connection's StatementCache.
+    It is used like a cursor, but close() leaves it prepared for the next call.
+    """
+
+    def __init__(self, sql, cursor):
+        self.sql = sql
+        self._cursor = cursor
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def execute(self, operation, params=()):
+        if operation != self.sql:
+            raise ValueError("A prepared statement can only execute the SQL it was prepared for.")
+        with _statement_stats_lock:
+            _statement_stats[self.sql] += 1
+        # Always pass the same string object so the cursor reuses its prepared handle.
+        return self._cursor.execute(self.sql, params)
+
+    def close(self):
+        """Discards any unread rows so the connection is free for the next statement."""
+        try:
+            if self._cursor.with_rows:
+                self._cursor.fetchall()
+        except Error:
+            pass
+
+class StatementCache:
+    """
+    The prepared statements of one MySQL connection, keyed by SQL text.
+    The server re-parses a statement only the first time it is seen on the connection;
+    beyond `max_statements` the least recently used one is closed on the server.
+    """
+
+    def __init__(self, max_statements=32):
+        self.max_statements = max_statements
+        self._statements = OrderedDict()  # (sql, dictionary) -> PreparedStatement
+
+    def get(self, raw_conn, sql, dictionary=False):
+        key = (sql, dictionary)
+        statement = self._statements.get(key)
+        if statement is not None:
+            self._statements.move_to_end(key)
+            return statement
+        statement = PreparedStatement(sql, raw_conn.cursor(prepared=True, dictionary=dictionary))
+        with _statement_stats_lock:
+            _statement_prepares[sql] += 1
+        self._statements[key] = statement
+        while len(self._statements) > self.max_statements:
+            _, evicted = self._statements.popitem(last=False)
+            try:
+                evicted._cursor.close()  # Deallocates the statement on the server
+            except Error:
+                pass
+        return statement
+
+    def __len__(self):
+        return len(self._statements)
+
+def get_statement_stats():
+    """
+    Returns one dict per SQL text with how often it was executed and how often it had to be
+    prepared (once per connection that ran it, plus once after each eviction), busiest first.
+    """
+    with _statement_stats_lock:
+        stats = [
+            {'sql': ' '.join(sql.split()), 'executions': count, 'prepares': _statement_prepares[sql]}
+            for sql, count in _statement_stats.items()
+        ]
+    return sorted(stats, key=lambda row: row['executions'], reverse=True)
+
+# =================================================================
+# CONNECTION POOL
+# =================================================================
+
+class PooledConnection:
+    """
+    A connection checked out of the pool. It behaves like a normal MySQL connection,
+    except that close() hands it back to the pool instead of disconnecting.
+    Can also be used as a context manager: `with pool.acquire() as conn: ...`
+    """
+
+    def __init__(self, pool, raw_conn, created_at, statements):
+        self._pool = pool
+        self._raw = raw_conn
+        self.created_at = created_at
+        self.statements = statements
+        self._validated_batch = False
+
+    def __getattr__(self, name):
+        if self._raw is None:
+            raise PoolError("This connection has already been returned to the pool.")
+        return getattr(self._raw, name)
+
+    def cursor(self, **kwargs):
+        """A cursor on the connection, timed by the profiling module."""
+        if self._raw is None:
+            raise PoolError("This connection has already been returned to the pool.")
+        return profiling.wrap_cursor(self._raw.cursor(**kwargs))
+
+    def prepared_cursor(self, sql, dictionary=False):
+        """
+        Returns the server-side prepared statement for `sql` on this connection, preparing it
+        on first use. It stays prepared across checkouts until evicted from the cache.
+        """
+        if self._raw is None:
+            raise PoolError("This connection has already been returned to the pool.")
+        return profiling.wrap_cursor(self.statements.get(self._raw, sql, dictionary))
+
+    @contextmanager
+    def validated_batch(self):
+        """
+        Sets the @mvc_validated_batch session flag, under which the formations triggers skip
+        their per-row checks (see migration 006), and clears it on exit. Only for rows that
+        were already validated as a set. If the flag cannot be cleared, the connection is
+        closed on release instead of going back to the pool.
+        """
+        if self._raw is None:
+            raise PoolError("This connection has already been returned to the pool.")
+        cursor = self._raw.cursor()
+        try:
+            cursor.execute("SET @mvc_validated_batch = 1")
+            self._validated_batch = True
+            yield
+        finally:
+            cursor.execute("SET @mvc_validated_batch = NULL")
+            self._validated_batch = False
+            cursor.close()
+
+    def close(self):
+        """Returns the connection to the pool. Calling it twice is harmless."""
+        if self._raw is not None:
+            raw, self._raw = self._raw, None
+            self._pool.release(raw, self.created_at, self.statements, reusable=not self._validated_batch)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+class ConnectionPool:
+    """
+    A fixed-size pool of MySQL connections.
+    - At most `pool_size` connections are checked out at once.
+    - Idle connections are health-checked (pinged) before being handed out.
+    - Connections older than `max_age_seconds` are recycled.
+    - Each connection keeps a StatementCache of up to `statement_cache_size` prepared statements.
+    """
+
+    def __init__(self, config, pool_size=5, max_age_seconds=1800, checkout_timeout=10, statement_cache_size=32):
+        self.config = dict(config)
+        self.pool_size = pool_size
+        self.max_age_seconds = max_age_seconds
+        self.checkout_timeout = checkout_timeout
+        self.statement_cache_size = statement_cache_size
+        self._idle = deque()  # (raw_conn, created_at, statements), most recently used on the right
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(pool_size)
+
+    def _connect(self):
+        conn = mysql.connector.connect(**self.config)
+        print('Connected to MySQL database')
+        return conn, time.monotonic(), StatementCache(self.statement_cache_size)
+
+    def _is_expired(self, created_at):
+        return self.max_age_seconds is not None and time.monotonic() - created_at > self.max_age_seconds
+
+    def _is_healthy(self, raw_conn):
+        try:
+            raw_conn.ping(reconnect=False)
+            return True
+        except Error:
+            return False
+
+    def _discard(self, raw_conn):
+        try:
+            raw_conn.close()
+        except Error:
+            pass
+
+    def acquire(self):
+        """Checks out a healthy connection, opening a new one if no idle connection is usable."""
+        if not self._slots.acquire(timeout=self.checkout_timeout):
+            raise PoolError(f"No free connection in the pool after {self.checkout_timeout}s (pool_size={self.pool_size}).")
+        try:
+            while True:
+                with self._lock:
+                    if not self._idle:
+                        break
+                    raw_conn, created_at, statements = self._idle.pop()
+                if self._is_expired(created_at) or not self._is_healthy(raw_conn):
+                    self._discard(raw_conn)
+                    continue
+                return PooledConnection(self, raw_conn, created_at, statements)
+
+            return PooledConnection(self, *self._connect())
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def release(self, raw_conn, created_at, statements, reusable=True):
+        """
+        Puts a connection back into the idle set, ending any transaction left open on it.
+        Connections marked not `reusable` (e.g. with session state that could not be reset) are closed.
+        """
+        try:
+            if not reusable or self._is_expired(created_at) or not raw_conn.is_connected():
+                self._discard(raw_conn)
+                return
+            # Never hand a half-finished transaction (or a stale read snapshot) to the next caller.
+            if raw_conn.in_transaction:
+                raw_conn.rollback()
+            with self._lock:
+                self._idle.append((raw_conn, created_at, statements))
+        except Error:
+            self._discard(raw_conn)
+        finally:
+            self._slots.release()
+
+    def close_all(self):
+        """Closes every idle connection. Checked-out connections are closed when they are released."""
+        with self._lock:
+            idle, self._idle = list(self._idle), deque()
+        for raw_conn, _, _ in idle:
+            self._discard(raw_conn)
+
+_pool = None
+_pool_lock = threading.Lock()
+
+# The unit of work (see db.unit_of_work) active on the current thread, if any.
+# Streamlit runs each script rerun on its own thread, so this is per-rerun state.
+_local = threading.local()
+
+def bind_unit_of_work(unit):
+    """Makes get_db_connection() hand out the unit's shared connection on this thread."""
+    _local.unit = unit
+
+def get_active_unit_of_work():
+    """Returns the unit of work bound to the current thread, or None."""
+    return getattr(_local, 'unit', None)
+
+def get_pool():
+    """Returns the process-wide connection pool, creating it on first use."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool(db_config, **pool_config)
+    return _pool
+
+def configure_pool(**settings):
+    """
+    Changes the pool settings (pool_size, max_age_seconds, checkout_timeout, statement_cache_size).
+    The current pool is drained and a new one is built on the next checkout.
+    """
+    global _pool
+    pool_config.update(settings)
+    with _pool_lock:
+        old_pool, _pool = _pool, None
+    if old_pool is not None:
+        old_pool.close_all()
+
+def get_db_connection(exclusive=False):
+    """
+    Checks out a connection from the pool. Call close() on it to return it.
+    Inside a unit of work, the unit's shared connection is returned instead, unless
+    exclusive=True: bulk jobs that commit in batches of their own need a private connection.
+    """
+    unit = get_active_unit_of_work()
+    if unit is not None and not exclusive:
+        return unit.connection
+    started = time.perf_counter()
     try:
-        conn = mysql.connector.connect(**db_config)
-        if conn.is_connected():
-            print('Connected to MySQL database')
-            return conn
+        return get_pool().acquire()
     except Error as e:
         print(f"Error connecting to MySQL: {e}")
-        return None
\ No newline at end of file
+        return None
+    finally:
+        profiling.record_connect(time.perf_counter() - started)
+
+def pooled_connection():
+    """
+    Context-manager form of get_db_connection():
+
+        with pooled_connection() as conn:
+            ...
+
+    Unlike get_db_connection(), a failure to connect raises instead of returning None.
+    """
+    return get_pool().acquire()
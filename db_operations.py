@@ -1,50 +1,211 @@
+import base64
+import json
+from datetime import date, datetime, timedelta
+from decimal import Decimal
 import mysql.connector
 from mysql.connector import Error
 from db_connector import get_db_connection
+import row_mapping
 
 # =================================================================
 # GENERIC INSERT, UPDATE, AND DELETE FUNCTION
 # =================================================================
 
-def search(table_name, **criteria):
+# Primary key of each table, used to order and page through generic search results.
+PRIMARY_KEYS = {
+    'person': ('person_id',),
+    'club_member': ('club_member_id',),
+    'club_member_family_link': ('club_member_id', 'family_member_id'),
+    'locations': ('location_id',),
+    'location_phone_numbers': ('location_id', 'phone_number'),
+    'location_assignment': ('assignment_id',),
+    'hobbies': ('hobby_id',),
+    'club_member_hobbies': ('club_member_id', 'hobby_id'),
+    'payments': ('payment_id',),
+    'teams': ('team_id',),
+    'sessions': ('session_id',),
+    'session_teams': ('session_id', 'team_id'),
+    'formations': ('formation_id',),
+    'emails': ('email_id',),
+}
+
+# Rows fetched per round trip (and per Arrow record batch) by search(result_format='arrow').
+ARROW_FETCH_SIZE = 1000
+
+def _encode_cursor(values):
+    """Packs the sort-key values of the last row on a page into an opaque cursor string."""
+    def encode(value):
+        if isinstance(value, datetime):
+            return {'dt': value.isoformat()}
+        if isinstance(value, date):
+            return {'d': value.isoformat()}
+        if isinstance(value, Decimal):
+            return {'dec': str(value)}
+        return value
+    packed = json.dumps([encode(v) for v in values], separators=(',', ':'))
+    return base64.urlsafe_b64encode(packed.encode()).decode()
+
+def _decode_cursor(cursor):
+    """Reverses _encode_cursor()."""
+    def decode(value):
+        if isinstance(value, dict):
+            if 'dt' in value: return datetime.fromisoformat(value['dt'])
+            if 'd' in value: return date.fromisoformat(value['d'])
+            if 'dec' in value: return Decimal(value['dec'])
+        return value
+    return [decode(v) for v in json.loads(base64.urlsafe_b64decode(cursor.encode()))]
+
+def _keyset_clause(columns, values, descending=False):
+    """
+    Builds a WHERE fragment selecting rows strictly after `values` in the order of `columns`,
+    e.g. (a > %s) OR (a = %s AND b > %s). Expanded this way, MySQL can seek on an index.
+    """
+    op = '<' if descending else '>'
+    clauses, params = [], []
+    for i, column in enumerate(columns):
+        parts = [f"{c} = %s" for c in columns[:i]] + [f"{column} {op} %s"]
+        clauses.append("(" + " AND ".join(parts) + ")")
+        params.extend(values[:i + 1])
+    return "(" + " OR ".join(clauses) + ")", params
+
+def _next_page(rows, page_size, key_columns, column_names=None):
+    """
+    Trims the extra look-ahead row and returns (rows, next_cursor).
+    Rows are dicts, or tuples laid out as `column_names`.
+    """
+    if len(rows) <= page_size:
+        return rows, None
+    rows = rows[:page_size]
+    if column_names is not None:
+        key_columns = [column_names.index(c) for c in key_columns]
+    return rows, _encode_cursor([rows[-1][c] for c in key_columns])
+
+def search(table_name, page_size=None, cursor=None, descending=False, result_format='dict', **criteria):
     """
     Performs a generic SELECT query on a table based on a set of criteria.
     
     Args:
         table_name (str): The name of the table to query.
+        page_size (int): Optional. Return at most this many rows, ordered by primary key.
+        cursor (str): Optional. The next_cursor from the previous page.
+        descending (bool): Page from the highest primary key down (e.g. newest emails first).
+        result_format (str): 'dict' for a list of dicts, 'model' for a list of the table's
+            models.py dataclasses, 'frame' for a pandas DataFrame, or 'arrow' for a typed
+            pyarrow.Table built batch by batch from the cursor (see row_mapping).
         **criteria: Keyword arguments representing the WHERE clause (e.g., last_name='Smith').
         
     Returns:
-        A list of dictionaries representing the matching rows.
+        The matching rows in the requested format.
+        When page_size is given, a (rows, next_cursor) tuple instead; next_cursor is None on the last page.
     """
+    if result_format not in ('dict', 'model', 'frame', 'arrow'):
+        raise ValueError(f"Unknown result_format '{result_format}'.")
+
     conn = get_db_connection()
-    if not conn: return []
+    if not conn:
+        if result_format == 'arrow':
+            results = row_mapping.record_batches_to_table((), [])
+        else:
+            results = _format_rows(table_name, result_format, (), [])
+        return results if page_size is None else (results, None)
 
     # Start with a base query
     query = f"SELECT * FROM {table_name}"
     params = []
     
     # Dynamically build the WHERE clause if criteria are provided
-    if criteria:
-        where_clauses = []
-        for key, value in criteria.items():
-            where_clauses.append(f"{key} = %s")
-            params.append(value)
+    where_clauses = []
+    for key, value in criteria.items():
+        where_clauses.append(f"{key} = %s")
+        params.append(value)
+
+    # Keyset pagination: seek past the last row of the previous page instead of using OFFSET
+    if page_size is not None:
+        key_columns = PRIMARY_KEYS[table_name]
+        if cursor:
+            keyset_sql, keyset_params = _keyset_clause(key_columns, _decode_cursor(cursor), descending)
+            where_clauses.append(keyset_sql)
+            params.extend(keyset_params)
+
+    if where_clauses:
         query += " WHERE " + " AND ".join(where_clauses)
+
+    if page_size is not None:
+        direction = " DESC" if descending else ""
+        query += " ORDER BY " + ", ".join(f"{c}{direction}" for c in key_columns)
+        query += " LIMIT %s"
+        params.append(page_size + 1)  # One extra row tells us whether another page exists
     
+    if result_format == 'arrow':
+        return _search_arrow(conn, table_name, query, params, page_size, key_columns if page_size is not None else None)
+
     results = []
+    column_names = ()
+    as_dicts = result_format == 'dict'
     try:
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute(query, tuple(params))
-        results = cursor.fetchall()
+        cursor_obj = conn.cursor(dictionary=as_dicts)
+        cursor_obj.execute(query, tuple(params))
+        results = cursor_obj.fetchall()
+        column_names = tuple(cursor_obj.column_names)
     except Error as e:
         print(f"Error searching table {table_name}: {e}")
     finally:
-        cursor.close()
+        cursor_obj.close()
         conn.close()
         
+    next_cursor = None
+    if page_size is not None:
+        results, next_cursor = _next_page(results, page_size, key_columns, None if as_dicts else column_names)
+    results = _format_rows(table_name, result_format, column_names, results)
+    if page_size is not None:
+        return results, next_cursor
     return results
 
+def _search_arrow(conn, table_name, query, params, page_size, key_columns):
+    """
+    The result_format='arrow' path of search(): tuples are fetched ARROW_FETCH_SIZE at a time
+    and each batch is turned into typed Arrow columns, so no dict or DataFrame is built per row.
+    The cursor is unbuffered, also inside a unit of work, so only one batch of tuples is held
+    in client memory at a time.
+    """
+    plan = None
+    batches = []
+    cursor_obj = None
+    try:
+        cursor_obj = conn.cursor(buffered=False)
+        cursor_obj.execute(query, tuple(params))
+        plan = row_mapping.arrow_column_plan(table_name, tuple(cursor_obj.column_names))
+        while True:
+            rows = cursor_obj.fetchmany(ARROW_FETCH_SIZE)
+            if not rows:
+                break
+            batches.append(row_mapping.rows_to_record_batch(plan, rows))
+    except Error as e:
+        print(f"Error searching table {table_name}: {e}")
+    finally:
+        if cursor_obj is not None:
+            try:
+                cursor_obj.close()
+            except Error:
+                conn.consume_results()  # Rows left unread after a failure mid-stream
+        conn.close()
+
+    table = row_mapping.record_batches_to_table(plan or (), batches)
+    if page_size is None:
+        return table
+    if table.num_rows <= page_size:
+        return table, None
+    table = table.slice(0, page_size)
+    return table, _encode_cursor([table.column(c)[page_size - 1].as_py() for c in key_columns])
+
+def _format_rows(table_name, result_format, column_names, rows):
+    """Converts tuple rows from search() into models or a DataFrame; dict rows are returned as-is."""
+    if result_format == 'model':
+        return row_mapping.map_table_rows(table_name, column_names, rows)
+    if result_format == 'frame':
+        return row_mapping.table_rows_to_frame(table_name, column_names, rows)
+    return rows
+
 # --- Example Usage ---
 # smiths_in_quebec = search('person', last_name='Smith', province='Quebec')
 # all_locations = search('locations') # No criteria returns all rows
@@ -62,11 +223,13 @@ def update(table_name, criteria, new_data):
     Returns:
         True on success, False on failure.
     """
-    conn = get_db_connection()
     # --- CRITICAL SAFETY CHECKS ---
-    if not conn or not new_data or not criteria:
+    # Checked before a pooled connection is taken, so an early return cannot hold one.
+    if not new_data or not criteria:
         print("Error: Update function requires criteria and new_data to proceed.")
         return False
+    conn = get_db_connection()
+    if not conn: return False
 
     # Build the SET part of the query
     set_clauses = [f"{key} = %s" for key in new_data.keys()]
@@ -115,11 +278,13 @@ def delete(table_name, **criteria):
     Returns:
         True on success, False on failure.
     """
-    conn = get_db_connection()
     # --- CRITICAL SAFETY CHECK ---
-    if not conn or not criteria:
+    # Checked before a pooled connection is taken, so an early return cannot hold one.
+    if not criteria:
         print("Error: Delete function requires criteria to proceed to prevent deleting all rows.")
         return False
+    conn = get_db_connection()
+    if not conn: return False
     
     query = f"DELETE FROM {table_name}"
     
@@ -166,7 +331,7 @@ def add_person(first_name, last_name, dob, gender, ssn=None, medicare_number=Non
     data = (first_name, last_name, dob, gender, ssn, medicare_number, phone_number, address, city, province, postal_code, email_address)
     
     try:
-        cursor = conn.cursor()
+        cursor = conn.prepared_cursor(sql)
         cursor.execute(sql, data)
         conn.commit()
         new_id = cursor.lastrowid
@@ -190,7 +355,7 @@ def add_club_member(club_member_id, join_date, height=None, weight=None, activit
     data = (club_member_id, height, weight, activity_status, join_date)
 
     try:
-        cursor = conn.cursor()
+        cursor = conn.prepared_cursor(sql)
         cursor.execute(sql, data)
         conn.commit()
         print(f"Successfully converted Person ID: {club_member_id} into a Club Member.")
@@ -213,7 +378,7 @@ def add_location(name, location_type, address=None, city=None, province=None, po
     data = (name, location_type, address, city, province, postal_code, web_address, max_capacity)
 
     try:
-        cursor = conn.cursor()
+        cursor = conn.prepared_cursor(sql)
         cursor.execute(sql, data)
         conn.commit()
         new_id = cursor.lastrowid
@@ -236,7 +401,7 @@ def add_hobby(hobby_name, description=None):
     data = (hobby_name, description)
     
     try:
-        cursor = conn.cursor()
+        cursor = conn.prepared_cursor(sql)
         cursor.execute(sql, data)
         conn.commit()
         new_id = cursor.lastrowid
@@ -260,7 +425,7 @@ def add_payment(club_member_id, payment_date, amount, method, membership_year):
     data = (club_member_id, payment_date, amount, method, membership_year)
     
     try:
-        cursor = conn.cursor()
+        cursor = conn.prepared_cursor(sql)
         cursor.execute(sql, data)
         conn.commit()
         new_id = cursor.lastrowid
@@ -283,7 +448,7 @@ def add_team(name, home_location_id, team_gender):
     data = (name, home_location_id, team_gender)
     
     try:
-        cursor = conn.cursor()
+        cursor = conn.prepared_cursor(sql)
         cursor.execute(sql, data)
         conn.commit()
         new_id = cursor.lastrowid
@@ -297,16 +462,75 @@ def add_team(name, home_location_id, team_gender):
         cursor.close()
         conn.close()
 
+# A session occupies its location, and its players, for this long (see migrations 008 and 009).
+SESSION_BLOCK = timedelta(minutes=180)
+
+def _occupancy_buckets(date_time):
+    """The hour buckets of location_occupancy that a session starting at `date_time` occupies."""
+    bucket = date_time.replace(minute=0, second=0, microsecond=0)
+    buckets = []
+    while bucket < date_time + SESSION_BLOCK:
+        buckets.append(bucket)
+        bucket += timedelta(hours=1)
+    return buckets
+
+def _location_booked(cursor, location_id, date_time):
+    """True if another session already occupies one of the session's hour buckets (primary-key lookups)."""
+    buckets = _occupancy_buckets(date_time)
+    sql = f"""
+        SELECT 1 FROM location_occupancy
+        WHERE location_id = %s AND bucket_start IN ({', '.join(['%s'] * len(buckets))}) AND session_count > 0
+        LIMIT 1;
+    """
+    cursor.execute(sql, (location_id, *buckets))
+    return bool(cursor.fetchall())
+
+def _sessions_capacity_left(cursor, session_ids, lock=False):
+    """
+    Returns {session_id: places left} from the location's max_capacity and the headcount
+    of the session's hour buckets. Sessions at locations without a max_capacity are absent.
+    With lock=True the buckets are read with FOR UPDATE: the latest committed headcount is
+    read and other writers to those buckets wait until the transaction ends.
+    """
+    sql = f"""
+        SELECT s.session_id, l.max_capacity - COALESCE(MAX(o.headcount), 0)
+        FROM sessions s
+        JOIN locations l ON l.location_id = s.location_id
+        LEFT JOIN location_occupancy o
+            ON o.location_id = s.location_id
+            AND o.bucket_start >= s.date_time - INTERVAL MINUTE(s.date_time) MINUTE - INTERVAL SECOND(s.date_time) SECOND
+            AND o.bucket_start < s.date_time + INTERVAL 180 MINUTE
+        WHERE s.session_id IN ({', '.join(['%s'] * len(session_ids))}) AND l.max_capacity IS NOT NULL
+        GROUP BY s.session_id, l.max_capacity
+        {'FOR UPDATE' if lock else ''};
+    """
+    cursor.execute(sql, tuple(session_ids))
+    return {session_id: places_left for session_id, places_left in cursor.fetchall()}
+
+# SQLSTATE of the rule violations signalled by the triggers.
+RULE_VIOLATION_SQLSTATE = '45000'
+
 def add_session(session_type, date_time, location_id, final_score=None):
-    """Inserts a new session and returns its new session_id."""
+    """
+    Inserts a new session and returns its new session_id, or None on a database error.
+    
+    Raises:
+        Error: With SQLSTATE 45000 when a rule rejects the session, e.g. the location is
+            already booked at that time (see location_occupancy).
+    """
     conn = get_db_connection()
     if not conn: return None
 
     sql = "INSERT INTO sessions (type, date_time, location_id, final_score) VALUES (%s, %s, %s, %s)"
     data = (session_type, date_time, location_id, final_score)
     
+    cursor = check_cursor = None
     try:
-        cursor = conn.cursor()
+        cursor = conn.prepared_cursor(sql)
+        check_cursor = conn.cursor()
+        if _location_booked(check_cursor, location_id, date_time):
+            raise Error(msg="Double booking. Another session already uses this location at this time.",
+                        sqlstate=RULE_VIOLATION_SQLSTATE)
         cursor.execute(sql, data)
         conn.commit()
         new_id = cursor.lastrowid
@@ -315,21 +539,37 @@ def add_session(session_type, date_time, location_id, final_score=None):
     except Error as e:
         print(f"Error adding Session: {e}")
         conn.rollback()
+        if e.sqlstate == RULE_VIOLATION_SQLSTATE:
+            raise e
         return None
     finally:
-        cursor.close()
+        if check_cursor is not None:
+            check_cursor.close()
+        if cursor is not None:
+            cursor.close()
         conn.close()
 
 def add_formation(session_id, team_id, player_id, player_position):
-    """Inserts a new player formation record."""
+    """
+    Inserts a new player formation record. Returns True, or False on a database error.
+    
+    Raises:
+        Error: With SQLSTATE 45000 when a rule rejects the player, e.g. the session's
+            location is full, a time conflict or a gender mismatch (see the formation triggers).
+    """
     conn = get_db_connection()
     if not conn: return False
 
     sql = "INSERT INTO formations (session_id, team_id, player_id, player_position) VALUES (%s, %s, %s, %s)"
     data = (session_id, team_id, player_id, player_position)
     
+    cursor = check_cursor = None
     try:
-        cursor = conn.cursor()
+        cursor = conn.prepared_cursor(sql)
+        check_cursor = conn.cursor()
+        if _sessions_capacity_left(check_cursor, [session_id]).get(session_id, 1) < 1:
+            raise Error(msg="Location is full. The session has reached the location's maximum capacity.",
+                        sqlstate=RULE_VIOLATION_SQLSTATE)
         cursor.execute(sql, data)
         conn.commit()
         print(f"Successfully added Player ID {player_id} to formation for Session ID {session_id}")
@@ -337,11 +577,190 @@ def add_formation(session_id, team_id, player_id, player_position):
     except Error as e:
         print(f"Error adding Formation: {e}")
         conn.rollback()
+        if e.sqlstate == RULE_VIOLATION_SQLSTATE:
+            raise e
         return False
     finally:
-        cursor.close()
+        if check_cursor is not None:
+            check_cursor.close()
+        if cursor is not None:
+            cursor.close()
         conn.close()
         
+# Proposed formations checked per validation query (4 parameters each).
+FORMATION_VALIDATION_CHUNK = 500
+
+def _validate_formation_batch(cursor, proposed):
+    """
+    Checks a batch of proposed formations against the formation rules with one set-based
+    query per FORMATION_VALIDATION_CHUNK rows and one capacity query, instead of one trigger
+    run per row. These are
+    the rules of trg_check_gender_consistency and trg_check_session_time_conflict, plus the
+    checks the triggers leave to constraints:
+    - the player is a club member and the session and team exist;
+    - the player's gender matches the team's;
+    - the player is not already in the session, and has no other session on the same day
+      less than 3 hours away, counting both existing formations and earlier rows of the batch;
+    - the session's location has room left (max_capacity against location_occupancy),
+      counting earlier rows of the batch.
+    The queries are locking reads (FOR SHARE on the formation rules, FOR UPDATE on the
+    occupancy buckets). A plain SELECT would read the transaction's snapshot, which inside
+    a unit of work dates from the start of the page, and miss formations and sessions other
+    users committed since. Locking reads see the latest committed rows, and their locks
+    hold off conflicting writes until the batch is inserted and committed.
+    
+    Args:
+        proposed (list): (session_id, team_id, player_id) tuples, in request order.
+        
+    Returns:
+        A dictionary {index in proposed: reason} for every rejected row. Accepted rows are absent.
+    """
+    found = {}
+    for offset in range(0, len(proposed), FORMATION_VALIDATION_CHUNK):
+        chunk = proposed[offset:offset + FORMATION_VALIDATION_CHUNK]
+        batch_rows = ' UNION ALL '.join(['SELECT %s, %s, %s, %s'] * len(chunk))
+        sql = f"""
+            WITH batch (row_no, session_id, team_id, player_id) AS ({batch_rows})
+            SELECT
+                b.row_no,
+                cm.club_member_id IS NOT NULL AND t.team_id IS NOT NULL AND ns.session_id IS NOT NULL AS is_valid,
+                p.gender,
+                t.team_gender,
+                ns.date_time,
+                MAX(s.session_id = ns.session_id) AS already_in_session,
+                MIN(CASE WHEN s.session_id <> ns.session_id THEN s.session_id END) AS conflicting_session_id
+            FROM batch b
+            LEFT JOIN club_member cm ON cm.club_member_id = b.player_id
+            LEFT JOIN person p ON p.person_id = b.player_id
+            LEFT JOIN teams t ON t.team_id = b.team_id
+            LEFT JOIN sessions ns ON ns.session_id = b.session_id
+            LEFT JOIN player_schedule s
+                ON s.player_id = b.player_id
+                AND s.starts_at >= DATE(ns.date_time)
+                AND s.starts_at < DATE(ns.date_time) + INTERVAL 1 DAY
+                AND s.starts_at > ns.date_time - INTERVAL 180 MINUTE
+                AND s.starts_at < ns.date_time + INTERVAL 180 MINUTE
+            GROUP BY b.row_no, is_valid, p.gender, t.team_gender, ns.date_time
+            FOR SHARE;
+        """
+        params = []
+        for i, (session_id, team_id, player_id) in enumerate(chunk, start=offset):
+            params.extend((i, session_id, team_id, player_id))
+        cursor.execute(sql, tuple(params))
+        for row in cursor.fetchall():
+            found[row[0]] = row
+
+    valid_sessions = list({proposed[i][0] for i, row in found.items() if row[1]})
+    places_left = _sessions_capacity_left(cursor, valid_sessions, lock=True) if valid_sessions else {}
+
+    rejected = {}
+    accepted_times = {}  # player_id -> [(session_id, date_time)] accepted earlier in this batch
+    for i, (session_id, team_id, player_id) in enumerate(proposed):
+        _, is_valid, gender, team_gender, session_time, already_in_session, conflicting_session_id = found[i]
+        if not is_valid:
+            rejected[i] = "Not a club member (or the session/team does not exist)."
+            continue
+        if gender != team_gender:
+            rejected[i] = "Player gender does not match team gender."
+            continue
+        if already_in_session:
+            rejected[i] = "Player is already in this session."
+            continue
+        if conflicting_session_id is not None:
+            rejected[i] = f"Time conflict with session #{conflicting_session_id} (less than 3 hours apart)."
+            continue
+        for other_session_id, other_time in accepted_times.get(player_id, []):
+            if other_session_id == session_id:
+                rejected[i] = "Player appears more than once in the request."
+                break
+            if other_time.date() == session_time.date() and abs(other_time - session_time) < timedelta(minutes=180):
+                rejected[i] = f"Time conflict with session #{other_session_id} in this request (less than 3 hours apart)."
+                break
+        else:
+            if places_left.get(session_id, 1) < 1:
+                rejected[i] = "The session's location is at maximum capacity."
+                continue
+            if session_id in places_left:
+                places_left[session_id] -= 1
+            accepted_times.setdefault(player_id, []).append((session_id, session_time))
+    return rejected
+
+def add_formations_batch(formations):
+    """
+    Adds a batch of formations, possibly across many sessions and teams, in one transaction.
+    The whole batch is validated by _validate_formation_batch with locking reads, then the
+    accepted rows are inserted with a single multi-row INSERT under the validated-batch flag,
+    so the per-row formation triggers do not repeat the checks (see migration 006).
+    
+    Args:
+        formations (list): (session_id, team_id, player_id, player_position) tuples.
+        
+    Returns:
+        A list with one outcome per requested row:
+        {'session_id', 'team_id', 'player_id', 'player_position', 'status': 'added' or 'rejected', 'reason'}.
+        If the database rejects the batch, nothing is added and every row is rejected with the error.
+    """
+    if not formations: return []
+    conn = get_db_connection()
+    if not conn: return []
+
+    outcomes = []
+    accepted = []
+    cursor = None
+    try:
+        cursor = conn.cursor()
+        conn.start_transaction()
+
+        rejected = _validate_formation_batch(cursor, [(sid, tid, pid) for sid, tid, pid, _ in formations])
+        for i, (session_id, team_id, player_id, position) in enumerate(formations):
+            reason = rejected.get(i)
+            if reason is None:
+                accepted.append((session_id, team_id, player_id, position))
+            outcomes.append({
+                'session_id': session_id, 'team_id': team_id, 'player_id': player_id, 'player_position': position,
+                'status': 'rejected' if reason else 'added', 'reason': reason
+            })
+
+        if accepted:
+            sql = "INSERT INTO formations (session_id, team_id, player_id, player_position) VALUES (%s, %s, %s, %s)"
+            with conn.validated_batch():
+                cursor.executemany(sql, accepted)
+        conn.commit()
+        print(f"Added {len(accepted)} of {len(formations)} formations")
+        return outcomes
+    except Error as e:
+        print(f"Error adding formations in batch: {e}")
+        conn.rollback()
+        return [
+            {'session_id': session_id, 'team_id': team_id, 'player_id': player_id, 'player_position': position,
+             'status': 'rejected', 'reason': f"Database error: {e}"}
+            for session_id, team_id, player_id, position in formations
+        ]
+    finally:
+        if cursor is not None:
+            cursor.close()
+        conn.close()
+
+def add_formations_bulk(session_id, team_id, players):
+    """
+    Adds several players to a team's formation for a session in one transaction
+    (add_formations_batch for a single session and team).
+    
+    Args:
+        session_id (int): The session.
+        team_id (int): The team whose roster is being built.
+        players (list): (player_id, player_position) pairs.
+        
+    Returns:
+        A list with one outcome per requested player:
+        {'player_id', 'player_position', 'status': 'added' or 'rejected', 'reason'}.
+    """
+    outcomes = add_formations_batch([(session_id, team_id, player_id, position) for player_id, position in players])
+    return [
+        {key: o[key] for key in ('player_id', 'player_position', 'status', 'reason')}
+        for o in outcomes
+    ]
+
 def add_email(sender_name, receiver_email, subject, body=None, session_id=None):
     """Logs a sent email to the database."""
     conn = get_db_connection()
@@ -351,7 +770,7 @@ def add_email(sender_name, receiver_email, subject, body=None, session_id=None):
     data = (sender_name, receiver_email, subject, body, session_id)
     
     try:
-        cursor = conn.cursor()
+        cursor = conn.prepared_cursor(sql)
         cursor.execute(sql, data)
         conn.commit()
         print(f"Successfully logged email to {receiver_email}")
@@ -378,7 +797,7 @@ def link_family_to_member(club_member_id, family_member_id, relationship_type, c
     data = (club_member_id, family_member_id, relationship_type, contact_priority)
 
     try:
-        cursor = conn.cursor()
+        cursor = conn.prepared_cursor(sql)
         cursor.execute(sql, data)
         conn.commit()
         print(f"Successfully linked Member ID {club_member_id} to Family Member ID {family_member_id}")
@@ -444,7 +863,7 @@ def add_hobby_to_member(club_member_id, hobby_id):
     data = (club_member_id, hobby_id)
     
     try:
-        cursor = conn.cursor()
+        cursor = conn.prepared_cursor(sql)
         cursor.execute(sql, data)
         conn.commit()
         print(f"Successfully linked Hobby ID {hobby_id} to Member ID {club_member_id}")
@@ -466,7 +885,7 @@ def add_team_to_session(session_id, team_id):
     data = (session_id, team_id)
     
     try:
-        cursor = conn.cursor()
+        cursor = conn.prepared_cursor(sql)
         cursor.execute(sql, data)
         conn.commit()
         print(f"Successfully linked Team ID {team_id} to Session ID {session_id}")
@@ -479,6 +898,61 @@ def add_team_to_session(session_id, team_id):
         cursor.close()
         conn.close()
 
+# Sessions looked up per query when add_sessions_bulk reads back the new session_ids.
+SESSION_LOOKUP_CHUNK = 500
+
+def add_sessions_bulk(sessions):
+    """
+    Inserts many sessions and their teams in one transaction, e.g. a schedule from scheduler.py.
+    Sessions go in with one multi-row INSERT; their new ids are read back by (location_id,
+    date_time), which the double-booking trigger keeps unique; then every session_teams row
+    goes in with a second multi-row INSERT.
+    
+    Args:
+        sessions (list): Dictionaries with 'session_type', 'date_time', 'location_id' and
+            'team_ids' (one or two team ids).
+        
+    Returns:
+        The new session_ids, in the order of `sessions`.
+    """
+    if not sessions: return []
+    conn = get_db_connection()
+    if not conn: return []
+
+    try:
+        cursor = conn.cursor()
+        conn.start_transaction()
+
+        sql = "INSERT INTO sessions (type, date_time, location_id) VALUES (%s, %s, %s)"
+        cursor.executemany(sql, [(s['session_type'], s['date_time'], s['location_id']) for s in sessions])
+
+        new_ids = {}
+        for offset in range(0, len(sessions), SESSION_LOOKUP_CHUNK):
+            chunk = sessions[offset:offset + SESSION_LOOKUP_CHUNK]
+            placeholders = ', '.join(['(%s, %s)'] * len(chunk))
+            params = [value for s in chunk for value in (s['location_id'], s['date_time'])]
+            cursor.execute(
+                f"SELECT session_id, location_id, date_time FROM sessions WHERE (location_id, date_time) IN ({placeholders})",
+                tuple(params)
+            )
+            for session_id, location_id, date_time in cursor.fetchall():
+                new_ids[(location_id, date_time)] = session_id
+        session_ids = [new_ids[(s['location_id'], s['date_time'])] for s in sessions]
+
+        links = [(session_id, team_id) for session_id, s in zip(session_ids, sessions) for team_id in s['team_ids']]
+        if links:
+            cursor.executemany("INSERT INTO session_teams (session_id, team_id) VALUES (%s, %s)", links)
+        conn.commit()
+        print(f"Successfully added {len(session_ids)} sessions with {len(links)} team links.")
+        return session_ids
+    except Error as e:
+        print(f"Error adding sessions in bulk: {e}")
+        conn.rollback()
+        raise e
+    finally:
+        cursor.close()
+        conn.close()
+
 def add_location_phone_number(location_id, phone_number):
     """Adds a phone number to a specific location."""
     conn = get_db_connection()
@@ -488,7 +962,7 @@ def add_location_phone_number(location_id, phone_number):
     data = (location_id, phone_number)
 
     try:
-        cursor = conn.cursor()
+        cursor = conn.prepared_cursor(sql)
         cursor.execute(sql, data)
         conn.commit()
         print(f"Successfully added phone number {phone_number} to Location ID {location_id}")
@@ -536,15 +1010,28 @@ def get_all_locations_with_phones():
         cursor.close()
         conn.close()
 
-def get_all_members_with_details():
+def get_all_members_with_details(page_size=None, cursor=None):
     """
     Retrieves a list of all club members with essential person details for display.
     This replaces the UI needing to do a complex JOIN.
+
+    With page_size, returns one page as a (rows, next_cursor) tuple, seeking on
+    (last_name, first_name, club_member_id) rather than reading the whole list.
     """
     conn = get_db_connection()
-    if not conn: return []
+    if not conn: return [] if page_size is None else ([], None)
 
-    sql = """
+    params = []
+    keyset_sql = ""
+    limit_sql = ""
+    if page_size is not None:
+        if cursor:
+            clause, params = _keyset_clause(('p.last_name', 'p.first_name', 'cm.club_member_id'), _decode_cursor(cursor))
+            keyset_sql = "WHERE " + clause
+        limit_sql = "LIMIT %s"
+        params.append(page_size + 1)
+
+    sql = f"""
         SELECT
             cm.club_member_id,
             p.first_name,
@@ -554,18 +1041,64 @@ def get_all_members_with_details():
             l.name AS current_location
         FROM club_member cm
         JOIN person p ON cm.club_member_id = p.person_id
-        LEFT JOIN location_assignment la ON p.person_id = la.person_id AND la.end_date IS NULL
-        LEFT JOIN locations l ON la.location_id = l.location_id
-        ORDER BY p.last_name, p.first_name;
+        LEFT JOIN current_location_assignment ca ON p.person_id = ca.person_id
+        LEFT JOIN locations l ON ca.location_id = l.location_id
+        {keyset_sql}
+        ORDER BY p.last_name, p.first_name, cm.club_member_id
+        {limit_sql};
     """
     
     try:
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute(sql)
-        results = cursor.fetchall()
+        cursor_obj = conn.cursor(dictionary=True)
+        cursor_obj.execute(sql, tuple(params))
+        results = cursor_obj.fetchall()
+        if page_size is not None:
+            return _next_page(results, page_size, ('last_name', 'first_name', 'club_member_id'))
         return results
     except Error as e:
         print(f"Error getting all members: {e}")
+        return [] if page_size is None else ([], None)
+    finally:
+        cursor_obj.close()
+        conn.close()
+
+def _like_prefix(term):
+    """A LIKE pattern matching values that start with `term`, with its wildcards escaped."""
+    return term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+
+def find_members(term, limit=50):
+    """
+    Looks up club members by id or by the start of their first name, last name or full name,
+    for selectors that must reach any member rather than one page of the list.
+    
+    Returns:
+        Up to `limit` rows with club_member_id, first_name and last_name, ordered by name.
+    """
+    term = (term or '').strip()
+    if not term: return []
+    conn = get_db_connection()
+    if not conn: return []
+
+    sql = """
+        SELECT cm.club_member_id, p.first_name, p.last_name
+        FROM club_member cm
+        JOIN person p ON cm.club_member_id = p.person_id
+        WHERE cm.club_member_id = %s
+            OR p.last_name LIKE %s
+            OR p.first_name LIKE %s
+            OR CONCAT(p.first_name, ' ', p.last_name) LIKE %s
+        ORDER BY p.last_name, p.first_name, cm.club_member_id
+        LIMIT %s;
+    """
+    member_id = int(term) if term.isdigit() else None
+    pattern = _like_prefix(term)
+
+    try:
+        cursor = conn.cursor(dictionary=True)
+        cursor.execute(sql, (member_id, pattern, pattern, pattern, limit))
+        return cursor.fetchall()
+    except Error as e:
+        print(f"Error finding members: {e}")
         return []
     finally:
         cursor.close()
@@ -585,13 +1118,13 @@ def get_member_profile(club_member_id):
             l.name AS current_location
         FROM person p
         JOIN club_member cm ON p.person_id = cm.club_member_id
-        LEFT JOIN location_assignment la ON p.person_id = la.person_id AND la.end_date IS NULL
-        LEFT JOIN locations l ON la.location_id = l.location_id
+        LEFT JOIN current_location_assignment ca ON p.person_id = ca.person_id
+        LEFT JOIN locations l ON ca.location_id = l.location_id
         WHERE p.person_id = %s;
     """
     
     try:
-        cursor = conn.cursor(dictionary=True)
+        cursor = conn.prepared_cursor(sql, dictionary=True)
         cursor.execute(sql, (club_member_id,))
         result = cursor.fetchone()
         return result
@@ -638,7 +1171,7 @@ def get_teams_for_session(session_id):
     sql = "SELECT t.* FROM teams t JOIN session_teams st ON t.team_id = st.team_id WHERE st.session_id = %s"
     
     try:
-        cursor = conn.cursor(dictionary=True)
+        cursor = conn.prepared_cursor(sql, dictionary=True)
         cursor.execute(sql, (session_id,))
         results = cursor.fetchall()
         return results
@@ -665,7 +1198,7 @@ def get_roster_for_formation(session_id, team_id):
     """
     
     try:
-        cursor = conn.cursor(dictionary=True)
+        cursor = conn.prepared_cursor(sql, dictionary=True)
         cursor.execute(sql, (session_id, team_id))
         results = cursor.fetchall()
         return results
@@ -676,32 +1209,61 @@ def get_roster_for_formation(session_id, team_id):
         cursor.close()
         conn.close()
 
-def get_eligible_players_for_team(team_id):
+def get_eligible_players_for_team(team_id, session_id=None):
     """
     Finds all active club members whose gender matches the specified team's gender,
     making them eligible to be added to the roster.
+    
+    Args:
+        team_id (int): The team being built.
+        session_id (int): If given, also leaves out players who are already in this session
+            or have another session on the same day less than 3 hours away, so every
+            returned player passes trg_check_session_time_conflict.
     """
     conn = get_db_connection()
     if not conn: return []
     
-    # This query first finds the gender of the target team in a subquery,
-    # then finds all active members who match that gender.
-    sql = """
+    # The busy players are found from the other side: the scheduled intervals inside the
+    # session's 3-hour window (a range scan on player_schedule.idx_schedule_time, see
+    # migration 008). The members are then anti-joined against that set, once.
+    busy_sql = ""
+    busy_filter = ""
+    params = []
+    if session_id is not None:
+        busy_sql = """
+        LEFT JOIN (
+            SELECT DISTINCT ps.player_id
+            FROM sessions ns
+            JOIN player_schedule ps
+                ON ps.starts_at >= DATE(ns.date_time)
+                AND ps.starts_at < DATE(ns.date_time) + INTERVAL 1 DAY
+                AND ps.starts_at > ns.date_time - INTERVAL 180 MINUTE
+                AND ps.starts_at < ns.date_time + INTERVAL 180 MINUTE
+            WHERE ns.session_id = %s
+        ) AS busy ON busy.player_id = p.person_id"""
+        busy_filter = "AND busy.player_id IS NULL"
+        params.append(session_id)
+    params.append(team_id)
+
+    sql = f"""
         SELECT
             p.person_id AS club_member_id,
             p.first_name,
             p.last_name
-        FROM club_member cm
-        JOIN person p ON cm.club_member_id = p.person_id
+        FROM teams t
+        JOIN person p ON p.gender = t.team_gender
+        JOIN club_member cm ON cm.club_member_id = p.person_id
+        {busy_sql}
         WHERE
-            cm.activity_status = 'Active'
-            AND p.gender = (SELECT team_gender FROM teams WHERE team_id = %s)
+            t.team_id = %s
+            AND cm.activity_status = 'Active'
+            {busy_filter}
         ORDER BY p.last_name, p.first_name;
     """
     
     try:
         cursor = conn.cursor(dictionary=True)
-        cursor.execute(sql, (team_id,))
+        cursor.execute(sql, tuple(params))
         results = cursor.fetchall()
         return results
     except Error as e:
@@ -713,34 +1275,19 @@ def get_eligible_players_for_team(team_id):
 
 def get_payments_and_fees_for_member(club_member_id):
     """
-    Calculates the total payments, required fees, and donations for a member
-    across all years they have been active.
+    Returns the total payments, required fees, donations and arrears for a member
+    across all years they have paid for, from the member_year_ledger table.
+    The ledger stores the member's age and fee for each year and is kept up to date
+    by the payment triggers, so nothing is aggregated here.
     """
     conn = get_db_connection()
     if not conn: return []
 
-    # This query is complex. It calculates the required fee based on the member's age
-    # IN THAT SPECIFIC YEAR, then aggregates payments and calculates donations.
     sql = """
-        SELECT
-            p.membership_year,
-            TIMESTAMPDIFF(YEAR, pr.dob, MAKEDATE(p.membership_year, 1)) AS age_in_year,
-            CASE
-                WHEN TIMESTAMPDIFF(YEAR, pr.dob, MAKEDATE(p.membership_year, 1)) >= 18 THEN 200.00
-                ELSE 100.00
-            END AS required_fee,
-            SUM(p.amount) AS total_paid,
-            GREATEST(0, SUM(p.amount) - 
-                CASE
-                    WHEN TIMESTAMPDIFF(YEAR, pr.dob, MAKEDATE(p.membership_year, 1)) >= 18 THEN 200.00
-                    ELSE 100.00
-                END
-            ) AS donation
-        FROM payments p
-        JOIN person pr ON p.club_member_id = pr.person_id
-        WHERE p.club_member_id = %s
-        GROUP BY p.membership_year, pr.dob
-        ORDER BY p.membership_year DESC;
+        SELECT membership_year, age_in_year, required_fee, total_paid, donation, arrears
+        FROM member_year_ledger
+        WHERE club_member_id = %s
+        ORDER BY membership_year DESC;
     """
     
     try:
@@ -755,6 +1302,83 @@ def get_payments_and_fees_for_member(club_member_id):
         cursor.close()
         conn.close()
 
+def get_donations_and_arrears_report(membership_year):
+    """
+    Club-wide donations and arrears for one membership year.
+    Members with ledger rows are read through idx_ledger_year; members who have not paid
+    anything that year have no ledger row and are listed with their full fee in arrears.
+
+    Returns:
+        One dict per member with name, age_in_year, required_fee, total_paid, donation and arrears,
+        sorted by last and first name.
+    """
+    conn = get_db_connection()
+    if not conn: return []
+
+    sql = """
+        SELECT l.club_member_id, pr.first_name, pr.last_name,
+               l.age_in_year, l.required_fee, l.total_paid, l.donation, l.arrears
+        FROM member_year_ledger l
+        JOIN person pr ON l.club_member_id = pr.person_id
+        WHERE l.membership_year = %s
+        UNION ALL
+        SELECT unpaid.club_member_id, unpaid.first_name, unpaid.last_name,
+               unpaid.age_in_year, unpaid.required_fee, 0.00, 0.00, unpaid.required_fee
+        FROM (
+            SELECT cm.club_member_id, pr.first_name, pr.last_name,
+                   TIMESTAMPDIFF(YEAR, pr.dob, MAKEDATE(%s, 1)) AS age_in_year,
+                   IF(TIMESTAMPDIFF(YEAR, pr.dob, MAKEDATE(%s, 1)) >= 18, 200.00, 100.00) AS required_fee
+            FROM club_member cm
+            JOIN person pr ON cm.club_member_id = pr.person_id
+            WHERE NOT EXISTS (
+                SELECT 1 FROM member_year_ledger l
+                WHERE l.club_member_id = cm.club_member_id AND l.membership_year = %s
+            )
+        ) AS unpaid
+        ORDER BY last_name, first_name;
+    """
+
+    try:
+        cursor = conn.cursor(dictionary=True)
+        cursor.execute(sql, (membership_year,) * 4)
+        results = cursor.fetchall()
+        return results
+    except Error as e:
+        print(f"Error getting donations and arrears report: {e}")
+        return []
+    finally:
+        cursor.close()
+        conn.close()
+
+def recalculate_all_member_statuses(membership_year):
+    """
+    Offline repair tool. Member statuses are normally kept current by the payment triggers
+    (migration 004), which only touch members whose yearly total crosses the fee threshold.
+    This rebuilds the member_year_ledger from the payments table and then runs the
+    full sp_recalculate_member_status sweep for the given year.
+    
+    Returns:
+        True on success.
+    """
+    conn = get_db_connection()
+    if not conn: return False
+
+    try:
+        cursor = conn.cursor()
+        conn.start_transaction()
+        cursor.callproc('sp_rebuild_member_year_ledger')
+        cursor.callproc('sp_recalculate_member_status', (membership_year,))
+        conn.commit()
+        print(f"Successfully recalculated member statuses for {membership_year}.")
+        return True
+    except Error as e:
+        print(f"Error recalculating member statuses: {e}")
+        conn.rollback()
+        raise e
+    finally:
+        cursor.close()
+        conn.close()
+
 def register_new_club_member(person_data, member_data):
     """
     Handles the full registration of a new club member within a single database transaction.
@@ -929,16 +1553,28 @@ def get_all_teams_with_details():
         cursor.close()
         conn.close()
         
-def get_all_sessions_for_dashboard():
+def get_all_sessions_for_dashboard(page_size=None, cursor=None):
     """
     Retrieves all sessions with crucial joined data for the main dashboard view.
     Includes team names for quick identification.
+
+    With page_size, returns one page (newest first) as a (rows, next_cursor) tuple.
     """
     conn = get_db_connection()
-    if not conn: return []
+    if not conn: return [] if page_size is None else ([], None)
+
+    params = []
+    keyset_sql = ""
+    limit_sql = ""
+    if page_size is not None:
+        if cursor:
+            clause, params = _keyset_clause(('s.date_time', 's.session_id'), _decode_cursor(cursor), descending=True)
+            keyset_sql = "WHERE " + clause
+        limit_sql = "LIMIT %s"
+        params.append(page_size + 1)
     
     # This query uses GROUP_CONCAT to list the teams involved in each session.
-    sql = """
+    sql = f"""
         SELECT
             s.session_id,
             s.type,
@@ -950,15 +1586,73 @@ def get_all_sessions_for_dashboard():
         JOIN locations l ON s.location_id = l.location_id
         LEFT JOIN session_teams st ON s.session_id = st.session_id
         LEFT JOIN teams t ON st.team_id = t.team_id
+        {keyset_sql}
         GROUP BY s.session_id, l.name
-        ORDER BY s.date_time DESC;
+        ORDER BY s.date_time DESC, s.session_id DESC
+        {limit_sql};
     """
+    try:
+        cursor_obj = conn.cursor(dictionary=True)
+        cursor_obj.execute(sql, tuple(params))
+        results = cursor_obj.fetchall()
+        if page_size is not None:
+            return _next_page(results, page_size, ('date_time', 'session_id'))
+        return results
+    except Error as e:
+        print(f"Error getting sessions for dashboard: {e}")
+        return [] if page_size is None else ([], None)
+    finally:
+        cursor_obj.close()
+        conn.close()
+
+def find_sessions(term, limit=50):
+    """
+    Looks up sessions by id, by day (YYYY-MM-DD) or by the start of a team's name,
+    for selectors that must reach any session rather than one page of the list.
+    
+    Returns:
+        Up to `limit` rows with session_id, date_time and teams_involved, newest first.
+    """
+    term = (term or '').strip()
+    if not term: return []
+    conn = get_db_connection()
+    if not conn: return []
+
+    session_id = int(term) if term.isdigit() else None
+    try:
+        day = date.fromisoformat(term)
+        day_start = datetime(day.year, day.month, day.day)
+        day_end = day_start + timedelta(days=1)
+    except ValueError:
+        day_start = day_end = None
+
+    sql = """
+        SELECT
+            s.session_id,
+            s.date_time,
+            GROUP_CONCAT(t.name ORDER BY t.name SEPARATOR ' vs ') AS teams_involved
+        FROM sessions s
+        LEFT JOIN session_teams st ON s.session_id = st.session_id
+        LEFT JOIN teams t ON st.team_id = t.team_id
+        WHERE s.session_id = %s
+            OR (s.date_time >= %s AND s.date_time < %s)
+            OR s.session_id IN (
+                SELECT st2.session_id
+                FROM session_teams st2
+                JOIN teams t2 ON st2.team_id = t2.team_id
+                WHERE t2.name LIKE %s
+            )
+        GROUP BY s.session_id
+        ORDER BY s.date_time DESC, s.session_id DESC
+        LIMIT %s;
+    """
+
     try:
         cursor = conn.cursor(dictionary=True)
-        cursor.execute(sql)
+        cursor.execute(sql, (session_id, day_start, day_end, _like_prefix(term), limit))
         return cursor.fetchall()
     except Error as e:
-        print(f"Error getting sessions for dashboard: {e}")
+        print(f"Error finding sessions: {e}")
         return []
     finally:
         cursor.close()
@@ -994,29 +1688,155 @@ def detach_team_from_session(session_id, team_id):
         cursor.close()
         conn.close()
         
+RESCHEDULE_CONFLICTS_SQL = """
+    SELECT
+        mine.player_id,
+        p.first_name,
+        p.last_name,
+        other.session_id AS conflicting_session_id,
+        other.starts_at AS conflicting_date_time
+    FROM player_schedule mine
+    JOIN player_schedule other
+        ON other.player_id = mine.player_id
+        AND other.session_id <> mine.session_id
+        AND other.starts_at > %s - INTERVAL 180 MINUTE
+        AND other.starts_at < %s + INTERVAL 180 MINUTE
+        AND other.starts_at >= DATE(%s)
+        AND other.starts_at < DATE(%s) + INTERVAL 1 DAY
+    JOIN person p ON p.person_id = mine.player_id
+    WHERE mine.session_id = %s
+    ORDER BY p.last_name, p.first_name;
+"""
+
+def _reschedule_conflicts(cursor, session_id, new_date_time):
+    cursor.execute(RESCHEDULE_CONFLICTS_SQL, (new_date_time,) * 4 + (session_id,))
+    return cursor.fetchall()
+
+def get_reschedule_conflicts(session_id, new_date_time):
+    """
+    Checks a whole session against a new start time in one query: every player rostered
+    on it is looked up in player_schedule for another session on the new day less than
+    3 hours away.
+    
+    Returns:
+        A list of dictionaries (player_id, first_name, last_name, conflicting_session_id,
+        conflicting_date_time), empty when the session can be moved.
+    """
+    conn = get_db_connection()
+    if not conn: return []
+
+    try:
+        cursor = conn.cursor(dictionary=True)
+        return _reschedule_conflicts(cursor, session_id, new_date_time)
+    except Error as e:
+        print(f"Error checking reschedule conflicts: {e}")
+        return []
+    finally:
+        cursor.close()
+        conn.close()
+
+def reschedule_session(session_id, new_date_time, final_score=None):
+    """
+    Moves a session to a new start time (and sets its score) in one transaction,
+    unless that would put one of its rostered players in a time conflict.
+    The session update is re-checked by trg_session_reschedule_conflict.
+    
+    Returns:
+        The conflicts from get_reschedule_conflicts. The session is only updated when
+        the list is empty.
+    """
+    conn = get_db_connection()
+    if not conn: return []
+
+    try:
+        cursor = conn.cursor(dictionary=True)
+        conn.start_transaction()
+
+        conflicts = _reschedule_conflicts(cursor, session_id, new_date_time)
+        if conflicts:
+            conn.rollback()
+            print(f"Session ID {session_id} not moved: {len(conflicts)} player conflict(s).")
+            return conflicts
+
+        sql = "UPDATE sessions SET date_time = %s, final_score = %s WHERE session_id = %s"
+        cursor.execute(sql, (new_date_time, final_score, session_id))
+        conn.commit()
+        print(f"Successfully rescheduled Session ID {session_id} to {new_date_time}.")
+        return []
+    except Error as e:
+        print(f"Error rescheduling session: {e}")
+        conn.rollback()
+        raise e
+    finally:
+        cursor.close()
+        conn.close()
+
+def get_free_slots(location_id, week_start, first_hour=8, last_hour=22):
+    """
+    Lists the start times in the 7 days from `week_start` at which a session can be booked
+    at a location: on the hour, between first_hour and last_hour, with none of the
+    session's hour buckets already used by another session. Reads the week's occupied
+    buckets from location_occupancy with one primary-key range scan.
+    
+    Returns:
+        A sorted list of datetimes.
+    """
+    conn = get_db_connection()
+    if not conn: return []
+
+    range_start = datetime(week_start.year, week_start.month, week_start.day)
+    range_end = range_start + timedelta(days=7)
+    sql = """
+        SELECT bucket_start
+        FROM location_occupancy
+        WHERE location_id = %s AND bucket_start >= %s AND bucket_start < %s AND session_count > 0;
+    """
+
+    try:
+        cursor = conn.cursor()
+        cursor.execute(sql, (location_id, range_start, range_end))
+        occupied = {row[0] for row in cursor.fetchall()}
+    except Error as e:
+        print(f"Error getting free slots: {e}")
+        return []
+    finally:
+        cursor.close()
+        conn.close()
+
+    slots = []
+    for day in range(7):
+        for hour in range(first_hour, last_hour):
+            start = range_start + timedelta(days=day, hours=hour)
+            if start + SESSION_BLOCK > range_start + timedelta(days=day, hours=last_hour):
+                break
+            if not any(bucket in occupied for bucket in _occupancy_buckets(start)):
+                slots.append(start)
+    return slots
+
 def get_current_personnel_assignments():
     """
-    Retrieves a list of all current personnel assignments (where end_date is NULL)
-    and joins with person and locations to get user-friendly names.
+    Retrieves a list of all current personnel assignments (read from the
+    current_location_assignment projection) and joins with person and locations
+    to get user-friendly names.
     """
     conn = get_db_connection()
     if not conn: return []
     
     sql = """
         SELECT
-            la.assignment_id,
-            la.person_id,
+            ca.assignment_id,
+            ca.person_id,
             p.first_name,
             p.last_name,
-            la.location_id,
+            ca.location_id,
             l.name AS location_name,
-            la.personnel_role,
-            la.mandate,
-            la.start_date
-        FROM location_assignment la
-        JOIN person p ON la.person_id = p.person_id
-        JOIN locations l ON la.location_id = l.location_id
-        WHERE la.end_date IS NULL AND la.personnel_role IS NOT NULL
+            ca.personnel_role,
+            ca.mandate,
+            ca.start_date
+        FROM current_location_assignment ca
+        JOIN person p ON ca.person_id = p.person_id
+        JOIN locations l ON ca.location_id = l.location_id
+        WHERE ca.personnel_role IS NOT NULL
         ORDER BY l.name, p.last_name;
     """
     
@@ -1052,7 +1872,7 @@ def get_hobbies_for_member(club_member_id):
     """
     
     try:
-        cursor = conn.cursor(dictionary=True)
+        cursor = conn.prepared_cursor(sql, dictionary=True)
         cursor.execute(sql, (club_member_id,))
         results = cursor.fetchall()
         return results
@@ -1063,49 +1883,97 @@ def get_hobbies_for_member(club_member_id):
         cursor.close()
         conn.close()
 
-def generate_and_log_weekly_emails(start_date, end_date):
+WEEKLY_EMAIL_SELECT_SQL = """
+    SELECT
+        p.first_name, p.last_name, p.email_address,
+        f.player_position,
+        s.session_id, s.type AS session_type, s.date_time,
+        loc.name AS location_name,
+        t.name AS team_name,  -- Added team name for the subject
+        hc_person.first_name AS coach_first_name,
+        hc_person.last_name AS coach_last_name,
+        hc_person.email_address AS coach_email
+    FROM formations f
+    JOIN sessions s ON f.session_id = s.session_id
+    JOIN teams t ON f.team_id = t.team_id
+    JOIN person p ON f.player_id = p.person_id
+    JOIN locations loc ON s.location_id = loc.location_id
+    LEFT JOIN (
+        SELECT ca.location_id, ca.person_id
+        FROM current_location_assignment ca
+        WHERE ca.personnel_role = 'Coach'
+    ) AS hc_assign ON t.home_location_id = hc_assign.location_id
+    LEFT JOIN person hc_person ON hc_assign.person_id = hc_person.person_id
+    WHERE s.date_time >= %s AND s.date_time < %s;
+"""
+
+WEEKLY_EMAIL_INSERT_SQL = """
+    INSERT INTO emails (session_id, sender_name, receiver_email, email_subject, body)
+    VALUES (%s, %s, %s, %s, %s)
+"""
+
+def _weekly_email_range(start_date, end_date):
+    """
+    Half-open range [start_date 00:00, day after end_date 00:00). It selects the same rows as
+    DATE(s.date_time) BETWEEN start_date AND end_date, but can use the index on date_time.
+    """
+    range_start = datetime(start_date.year, start_date.month, start_date.day)
+    range_end = datetime(end_date.year, end_date.month, end_date.day) + timedelta(days=1)
+    return range_start, range_end
+
+def _render_weekly_emails(rows):
+    """Generates the emails table row (session_id, sender, receiver, subject, body) for each schedule row."""
+    for row in rows:
+        session_time_str = row['date_time'].strftime("%A %d-%b-%Y %I:%M %p")
+        subject = f"{row['location_name']} {row['team_name']} {session_time_str} {row['session_type']} session"
+        body = (
+            f"Hi {row['first_name']} {row['last_name']},\n\n"
+            f"This is a reminder for your upcoming {row['session_type']} session.\n"
+            f"Your role: {row['player_position']}\n"
+            f"Date & Time: {session_time_str}\n"
+            f"Location: {row['location_name']}\n"
+            f"Head Coach: {row.get('coach_first_name', 'N/A')} {row.get('coach_last_name', '')} ({row.get('coach_email', 'N/A')})\n\n"
+            f"Thank you,\nMVC Admin"
+        )
+        yield (
+            row['session_id'], row['location_name'], row['email_address'],
+            subject, body
+        )
+
+def generate_and_log_weekly_emails(start_date, end_date, stream=False, batch_size=500, progress_callback=None):
     """
     Finds all players scheduled in sessions within a date range, generates
     the email content for each, and logs these emails to the database.
     This is now a single, atomic transaction.
+
+    With stream=True, the schedule is read through an unbuffered cursor and the emails are
+    rendered lazily and inserted in batches of batch_size, each committed on its own.
+    Memory stays bounded and the emails table is never locked for the whole range; the
+    trade-off is that a failure part-way leaves the earlier batches logged.
+    
+    Args:
+        start_date (date): First day of the range.
+        end_date (date): Last day of the range (inclusive).
+        stream (bool): Use the streaming, batched mode.
+        batch_size (int): Emails per INSERT and per commit in streaming mode.
+        progress_callback: Optional function called with the number of emails logged so far (streaming mode).
     
     Returns:
         The number of emails generated and logged.
     """
+    if stream:
+        return _stream_weekly_emails(start_date, end_date, batch_size, progress_callback)
+
     conn = get_db_connection()
     if not conn: return 0
 
-    sql_select = """
-        SELECT
-            p.first_name, p.last_name, p.email_address,
-            f.player_position,
-            s.session_id, s.type AS session_type, s.date_time,
-            loc.name AS location_name,
-            t.name AS team_name,  -- Added team name for the subject
-            hc_person.first_name AS coach_first_name,
-            hc_person.last_name AS coach_last_name,
-            hc_person.email_address AS coach_email
-        FROM formations f
-        JOIN sessions s ON f.session_id = s.session_id
-        JOIN teams t ON f.team_id = t.team_id
-        JOIN person p ON f.player_id = p.person_id
-        JOIN locations loc ON s.location_id = loc.location_id
-        LEFT JOIN (
-            SELECT la.location_id, la.person_id
-            FROM location_assignment la
-            WHERE la.personnel_role = 'Coach' AND la.end_date IS NULL
-        ) AS hc_assign ON t.home_location_id = hc_assign.location_id
-        LEFT JOIN person hc_person ON hc_assign.person_id = hc_person.person_id
-        WHERE DATE(s.date_time) BETWEEN %s AND %s;
-    """
-    
     try:
         cursor = conn.cursor(dictionary=True)
         # --- Start the transaction ONCE at the beginning ---
         conn.start_transaction()
 
         # Step 1: Perform the SELECT to get all necessary data
-        cursor.execute(sql_select, (start_date, end_date))
+        cursor.execute(WEEKLY_EMAIL_SELECT_SQL, _weekly_email_range(start_date, end_date))
         schedule_data = cursor.fetchall()
         
         if not schedule_data:
@@ -1114,30 +1982,10 @@ def generate_and_log_weekly_emails(start_date, end_date):
             return 0
 
         # Step 2: Process data and generate email content in Python
-        email_log_data = []
-        for row in schedule_data:
-            session_time_str = row['date_time'].strftime("%A %d-%b-%Y %I:%M %p")
-            subject = f"{row['location_name']} {row['team_name']} {session_time_str} {row['session_type']} session"
-            body = (
-                f"Hi {row['first_name']} {row['last_name']},\n\n"
-                f"This is a reminder for your upcoming {row['session_type']} session.\n"
-                f"Your role: {row['player_position']}\n"
-                f"Date & Time: {session_time_str}\n"
-                f"Location: {row['location_name']}\n"
-                f"Head Coach: {row.get('coach_first_name', 'N/A')} {row.get('coach_last_name', '')} ({row.get('coach_email', 'N/A')})\n\n"
-                f"Thank you,\nMVC Admin"
-            )
-            email_log_data.append((
-                row['session_id'], row['location_name'], row['email_address'],
-                subject, body[:100]
-            ))
+        email_log_data = list(_render_weekly_emails(schedule_data))
 
         # Step 3: Perform the batch INSERT for all generated emails
-        sql_insert = """
-            INSERT INTO emails (session_id, sender_name, receiver_email, email_subject, body)
-            VALUES (%s, %s, %s, %s, %s)
-        """
-        cursor.executemany(sql_insert, email_log_data)
+        cursor.executemany(WEEKLY_EMAIL_INSERT_SQL, email_log_data)
         
         # --- If ALL steps above succeed, commit the transaction ONCE at the end ---
         conn.commit()
@@ -1152,39 +2000,341 @@ def generate_and_log_weekly_emails(start_date, end_date):
     finally:
         cursor.close()
         conn.close()
+
+def _stream_weekly_emails(start_date, end_date, batch_size, progress_callback):
+    """
+    Streaming mode of generate_and_log_weekly_emails. Two private connections are used:
+    an unbuffered result set cannot share its connection with the INSERTs.
+    """
+    read_conn = get_db_connection(exclusive=True)
+    if not read_conn: return 0
+    write_conn = get_db_connection(exclusive=True)
+    if not write_conn:
+        read_conn.close()
+        return 0
+
+    logged = 0
+    read_cursor = write_cursor = None
+    try:
+        read_cursor = read_conn.cursor(dictionary=True)  # Unbuffered: rows are pulled from the server as we go
+        write_cursor = write_conn.cursor()
+        read_cursor.execute(WEEKLY_EMAIL_SELECT_SQL, _weekly_email_range(start_date, end_date))
+
+        def schedule_rows():
+            while True:
+                rows = read_cursor.fetchmany(batch_size)
+                if not rows:
+                    return
+                yield from rows
+
+        batch = []
+        for email in _render_weekly_emails(schedule_rows()):
+            batch.append(email)
+            if len(batch) >= batch_size:
+                write_cursor.executemany(WEEKLY_EMAIL_INSERT_SQL, batch)
+                write_conn.commit()
+                logged += len(batch)
+                batch = []
+                if progress_callback:
+                    progress_callback(logged)
+        if batch:
+            write_cursor.executemany(WEEKLY_EMAIL_INSERT_SQL, batch)
+            write_conn.commit()
+            logged += len(batch)
+            if progress_callback:
+                progress_callback(logged)
+
+        print(f"Successfully logged {logged} emails to the database in batches of {batch_size}.")
+        return logged
+    except Error as e:
+        print(f"An error occurred during streaming email generation after {logged} emails: {e}")
+        write_conn.rollback()
+        raise e
+    finally:
+        # Each release runs even if an earlier one fails, so neither pool slot is leaked.
+        try:
+            if read_cursor is not None:
+                try:
+                    read_cursor.close()
+                except Error:
+                    read_conn.consume_results()  # Rows left unread after a failure mid-stream
+        finally:
+            try:
+                if write_cursor is not None:
+                    write_cursor.close()
+            finally:
+                try:
+                    read_conn.close()
+                finally:
+                    write_conn.close()
+
+def get_pending_emails(limit=500, after_email_id=0):
+    """
+    Retrieves the next logged emails still waiting to be sent, oldest first, seeking on
+    (delivery_status, email_id) so each batch starts where the previous one ended.
+    """
+    conn = get_db_connection()
+    if not conn: return []
+
+    sql = """
+        SELECT email_id, session_id, sender_name, receiver_email, email_subject, body, attempts
+        FROM emails
+        WHERE delivery_status = 'Pending' AND email_id > %s
+        ORDER BY email_id
+        LIMIT %s;
+    """
+
+    try:
+        cursor = conn.cursor(dictionary=True)
+        cursor.execute(sql, (after_email_id, limit))
+        return cursor.fetchall()
+    except Error as e:
+        print(f"Error getting pending emails: {e}")
+        return []
+    finally:
+        cursor.close()
+        conn.close()
+
+def record_email_deliveries(results):
+    """
+    Records the outcome of sending a batch of emails in one transaction, on a connection
+    of its own: even inside a unit of work, a batch that was sent is recorded at once.
+    
+    Args:
+        results (list): Dictionaries with 'email_id', 'status' ('Sent', 'Failed' or
+            'Pending' to retry later), 'attempts' made in this run, 'sent_at' and 'error'.
         
+    Returns:
+        The number of rows updated.
+    """
+    if not results: return 0
+    conn = get_db_connection(exclusive=True)
+    if not conn: return 0
+
+    sql = """
+        UPDATE emails
+        SET delivery_status = %s, attempts = attempts + %s, sent_at = %s, last_error = %s
+        WHERE email_id = %s
+    """
+    data = [
+        (r['status'], r['attempts'], r['sent_at'], (r['error'] or '')[:255] or None, r['email_id'])
+        for r in results
+    ]
+
+    try:
+        cursor = conn.cursor()
+        conn.start_transaction()
+        cursor.executemany(sql, data)
+        conn.commit()
+        print(f"Recorded the delivery of {len(data)} emails.")
+        return len(data)
+    except Error as e:
+        print(f"Error recording email deliveries: {e}")
+        conn.rollback()
+        raise e
+    finally:
+        cursor.close()
+        conn.close()
+
+# How long the materialized "next 7 days" window may lag behind NOW() before it is re-anchored.
+DASHBOARD_WINDOW_MAX_AGE_SECONDS = 300
+
 def get_dashboard_metrics():
     """
     Retrieves key metrics for the main admin dashboard in a single database call for efficiency.
+    The counters are kept in the club_metrics summary row by triggers (migration 003). When the
+    upcoming-sessions window has gone stale, or the row is missing, all counters are recomputed
+    with one combined INSERT ... SELECT first.
     """
     conn = get_db_connection()
     if not conn:
         return {"active_members": "Error", "total_locations": "Error", "upcoming_sessions": "Error"}
 
-    # Define the queries for each metric
-    sql_members = "SELECT COUNT(*) AS count FROM club_member WHERE activity_status = 'Active';"
-    sql_locations = "SELECT COUNT(*) AS count FROM locations;"
-    sql_sessions = "SELECT COUNT(*) AS count FROM sessions WHERE date_time BETWEEN NOW() AND DATE_ADD(NOW(), INTERVAL 7 DAY);"
+    sql_read = """
+        SELECT active_members, total_locations, upcoming_sessions,
+               TIMESTAMPDIFF(SECOND, window_start, NOW()) AS window_age
+        FROM club_metrics
+        WHERE metric_id = 1;
+    """
+    sql_refresh = """
+        INSERT INTO club_metrics (metric_id, active_members, total_locations, upcoming_sessions, window_start, refreshed_at)
+        SELECT
+            1,
+            (SELECT COUNT(*) FROM club_member WHERE activity_status = 'Active'),
+            (SELECT COUNT(*) FROM locations),
+            (SELECT COUNT(*) FROM sessions WHERE date_time BETWEEN NOW() AND DATE_ADD(NOW(), INTERVAL 7 DAY)),
+            NOW(),
+            NOW()
+        ON DUPLICATE KEY UPDATE
+            active_members = VALUES(active_members),
+            total_locations = VALUES(total_locations),
+            upcoming_sessions = VALUES(upcoming_sessions),
+            window_start = VALUES(window_start),
+            refreshed_at = VALUES(refreshed_at);
+    """
     
-    metrics = {}
     try:
         cursor = conn.cursor(dictionary=True)
+        cursor.execute(sql_read)
+        row = cursor.fetchone()
+
+        if row is None or row['window_age'] > DASHBOARD_WINDOW_MAX_AGE_SECONDS:
+            cursor.execute(sql_refresh)
+            conn.commit()
+            cursor.execute(sql_read)
+            row = cursor.fetchone()
         
-        cursor.execute(sql_members)
-        metrics['active_members'] = cursor.fetchone()['count']
-        
-        cursor.execute(sql_locations)
-        metrics['total_locations'] = cursor.fetchone()['count']
-        
-        cursor.execute(sql_sessions)
-        metrics['upcoming_sessions'] = cursor.fetchone()['count']
-        
-        return metrics
+        return {
+            'active_members': row['active_members'],
+            'total_locations': row['total_locations'],
+            'upcoming_sessions': row['upcoming_sessions']
+        }
     except Error as e:
         print(f"Error getting dashboard metrics: {e}")
         # Return N/A on error so the UI doesn't crash
         return {"active_members": "N/A", "total_locations": "N/A", "upcoming_sessions": "N/A"}
     finally:
-        if conn.is_connected():
-            cursor.close()
-            conn.close()
\ No newline at end of file
+        cursor.close()
+        conn.close()
+
+# =================================================================
+# BULK OPERATIONS
+# =================================================================
+
+MEMBER_IMPORT_PERSON_COLUMNS = ('first_name', 'last_name', 'dob', 'gender', 'ssn', 'medicare_number', 'phone_number',
+                                'address', 'city', 'province', 'postal_code', 'email_address')
+MEMBER_IMPORT_MEMBER_COLUMNS = ('join_date', 'height', 'weight', 'activity_status')
+MEMBER_IMPORT_REQUIRED = ('first_name', 'last_name', 'dob', 'gender', 'ssn', 'join_date')
+
+def _iter_member_file_chunks(source, file_format, batch_size):
+    """
+    Streams a CSV or Parquet file of members as lists of row dictionaries, batch_size rows at a time.
+    `source` may be a path or a binary file object (e.g. a Streamlit upload).
+    """
+    if file_format == 'parquet':
+        import pyarrow.parquet as pq
+        parquet_file = pq.ParquetFile(source)
+        for batch in parquet_file.iter_batches(batch_size=batch_size):
+            yield batch.to_pylist()
+    else:
+        import pandas as pd
+        # Read everything as text; MySQL parses dates and decimals itself.
+        for chunk in pd.read_csv(source, chunksize=batch_size, dtype=str, keep_default_na=False):
+            yield chunk.to_dict('records')
+
+def _clean_member_row(row):
+    """Normalizes one imported row: blank strings become NULL and activity_status defaults to Active."""
+    cleaned = {}
+    for column in MEMBER_IMPORT_PERSON_COLUMNS + MEMBER_IMPORT_MEMBER_COLUMNS:
+        value = row.get(column)
+        if isinstance(value, str):
+            value = value.strip() or None
+        cleaned[column] = value
+    cleaned['activity_status'] = cleaned['activity_status'] or 'Active'
+    if cleaned['ssn'] is not None:
+        cleaned['ssn'] = str(cleaned['ssn'])  # Parquet files may store SSNs as integers
+    return cleaned
+
+def _insert_member_batch(conn, cursor, rows):
+    """
+    Inserts a batch of members with one multi-row INSERT per table, inside one transaction.
+    Returns the new person_ids in the same order as `rows`.
+    """
+    person_sql = f"INSERT INTO person ({', '.join(MEMBER_IMPORT_PERSON_COLUMNS)}) VALUES ({', '.join(['%s'] * len(MEMBER_IMPORT_PERSON_COLUMNS))})"
+    member_sql = f"INSERT INTO club_member (club_member_id, {', '.join(MEMBER_IMPORT_MEMBER_COLUMNS)}) VALUES ({', '.join(['%s'] * (len(MEMBER_IMPORT_MEMBER_COLUMNS) + 1))})"
+
+    conn.start_transaction()
+    # executemany() rewrites a plain INSERT ... VALUES into a single multi-row statement.
+    cursor.executemany(person_sql, [tuple(r[c] for c in MEMBER_IMPORT_PERSON_COLUMNS) for r in rows])
+
+    # A multi-row INSERT reports the first generated id; the rest normally follow consecutively.
+    # Confirm that against the SSNs (unique) rather than assume it.
+    first_id = cursor.lastrowid
+    cursor.execute("SELECT person_id, ssn FROM person WHERE person_id BETWEEN %s AND %s ORDER BY person_id",
+                   (first_id, first_id + len(rows) - 1))
+    id_rows = cursor.fetchall()
+    if [ssn for _, ssn in id_rows] == [r['ssn'] for r in rows]:
+        person_ids = [person_id for person_id, _ in id_rows]
+    else:
+        placeholders = ', '.join(['%s'] * len(rows))
+        cursor.execute(f"SELECT ssn, person_id FROM person WHERE ssn IN ({placeholders})", tuple(r['ssn'] for r in rows))
+        id_by_ssn = dict(cursor.fetchall())
+        person_ids = [id_by_ssn.get(r['ssn']) for r in rows]
+        if None in person_ids:
+            # e.g. a row without an SSN: an Error sends the batch down the row-by-row path,
+            # where each insert's own lastrowid identifies it.
+            raise Error("Could not match the inserted person rows to their SSNs.")
+
+    cursor.executemany(member_sql, [(pid,) + tuple(r[c] for c in MEMBER_IMPORT_MEMBER_COLUMNS) for pid, r in zip(person_ids, rows)])
+    conn.commit()
+    return person_ids
+
+def bulk_import_members(source, file_format=None, batch_size=500, progress_callback=None):
+    """
+    Imports club members from a CSV or Parquet file in batches.
+    Each batch is inserted with multi-row INSERTs in its own transaction. If a batch is
+    rejected (e.g. by the SSN trigger or a duplicate email), it is retried row by row so
+    only the offending rows are skipped.
+    
+    Args:
+        source: A file path or binary file object. Columns are named after the person and
+                club_member columns (first_name, last_name, dob, gender, ssn, ..., join_date, height, weight).
+        file_format (str): 'csv' or 'parquet'. Guessed from the file name if omitted.
+        batch_size (int): Rows per batch and per transaction.
+        progress_callback: Optional function called with the number of rows processed so far.
+        
+    Returns:
+        A dictionary with the 'imported' and 'failed' counts and an 'errors' list of
+        {'row': <1-based data row>, 'error': <message>}.
+    """
+    if file_format is None:
+        name = source if isinstance(source, str) else getattr(source, 'name', '')
+        file_format = 'parquet' if name.lower().endswith(('.parquet', '.pq')) else 'csv'
+
+    report = {'imported': 0, 'failed': 0, 'errors': []}
+
+    # Batches are committed independently, so this must not join the page's unit of work.
+    conn = get_db_connection(exclusive=True)
+    if not conn: return report
+
+    def reject(row_number, message):
+        report['failed'] += 1
+        report['errors'].append({'row': row_number, 'error': message})
+
+    cursor = conn.cursor()
+    try:
+        row_number = 0
+        for chunk in _iter_member_file_chunks(source, file_format, batch_size):
+            batch = []
+            for raw_row in chunk:
+                row_number += 1
+                row = _clean_member_row(raw_row)
+                missing = [c for c in MEMBER_IMPORT_REQUIRED if row[c] is None]
+                if missing:
+                    reject(row_number, f"Missing required field(s): {', '.join(missing)}")
+                else:
+                    batch.append((row_number, row))
+
+            if batch:
+                try:
+                    _insert_member_batch(conn, cursor, [row for _, row in batch])
+                    report['imported'] += len(batch)
+                except Error as e:
+                    conn.rollback()
+                    print(f"Batch ending at row {row_number} was rejected ({e}); retrying row by row.")
+                    for batch_row_number, row in batch:
+                        try:
+                            _insert_member_batch(conn, cursor, [row])
+                            report['imported'] += 1
+                        except Error as row_error:
+                            conn.rollback()
+                            reject(batch_row_number, str(row_error))
+
+            if progress_callback:
+                progress_callback(row_number)
+
+        print(f"Bulk import finished: {report['imported']} imported, {report['failed']} rejected.")
+        return report
+    finally:
+        cursor.close()
+        conn.close()
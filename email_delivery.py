@@ -0,0 +1,334 @@
+"""
+Sends the emails logged in the emails table over SMTP and records each outcome on its row.
+
+- An asyncio worker pool: every SMTP host gets up to delivery_config['connections_per_host']
+  workers, and each worker keeps one SMTP connection open for many messages.
+- Temporary failures (4xx replies, dropped or refused connections) are retried with
+  exponential backoff and jitter; permanent ones (5xx replies) fail at once. A message that
+  is still failing after max_attempts stays Pending for the next run, until it has used
+  max_total_attempts across runs.
+- Outcomes are written back in batches (ops.record_email_deliveries, migration 010).
+
+The backend is pluggable: SMTPBackend sends through a relay, LogBackend only marks the
+emails as sent (the old behaviour). DebugSMTPServer is a local SMTP sink for development
+and for benchmarks/email_throughput.py and tests/test_email_delivery.py.
+
+    python email_delivery.py --debug-server   # run a local SMTP sink on localhost:1025
+    python email_delivery.py                  # send every pending email
+"""
+import argparse
+import asyncio
+import random
+import smtplib
+from collections import Counter
+from datetime import datetime
+from email.message import EmailMessage
+from email.utils import formataddr, make_msgid
+import db_operations as ops
+
+delivery_config = {
+    'host': 'localhost',
+    'port': 1025,                   # DebugSMTPServer's default port
+    'username': None,
+    'password': None,
+    'use_starttls': False,
+    'timeout': 10,                  # Seconds per SMTP command
+    'from_address': 'no-reply@mvc.example',
+    'connections_per_host': 4,      # Workers, and so open SMTP connections, per host
+    'messages_per_connection': 1000, # Reconnect after this many messages
+    'max_attempts': 3,              # Attempts per message in one run
+    'max_total_attempts': 10,       # Across runs; then the email is marked Failed
+    'backoff_seconds': 0.5,         # First retry delay, doubled on each further attempt
+    'max_backoff_seconds': 8,
+    'batch_size': 500               # Emails read, sent and recorded per round
+}
+
+# =================================================================
+# BACKENDS
+# =================================================================
+
+class SMTPBackend:
+    """Sends through one SMTP server. The methods block; the workers run them in threads."""
+
+    def __init__(self, host, port, username=None, password=None, use_starttls=False, timeout=10):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.use_starttls = use_starttls
+        self.timeout = timeout
+
+    def host_for(self, message):
+        """The key concurrency is limited by. Every message goes through the one relay."""
+        return f"{self.host}:{self.port}"
+
+    def open(self):
+        connection = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        if self.use_starttls:
+            connection.starttls()
+        if self.username:
+            connection.login(self.username, self.password)
+        return connection
+
+    def send(self, connection, message):
+        connection.send_message(message)
+
+    def close(self, connection):
+        try:
+            connection.quit()
+        except (smtplib.SMTPException, OSError):
+            connection.close()
+
+class LogBackend:
+    """Sends nothing: every email is recorded as sent, as when the emails table was only a log."""
+
+    def host_for(self, message):
+        return 'log'
+
+    def open(self):
+        return None
+
+    def send(self, connection, message):
+        pass
+
+    def close(self, connection):
+        pass
+
+def default_backend():
+    return SMTPBackend(
+        delivery_config['host'], delivery_config['port'], delivery_config['username'],
+        delivery_config['password'], delivery_config['use_starttls'], delivery_config['timeout']
+    )
+
+# =================================================================
+# DELIVERY
+# =================================================================
+
+def build_message(row, from_address):
+    """An EmailMessage for a row from ops.get_pending_emails."""
+    message = EmailMessage()
+    message['From'] = formataddr((row['sender_name'] or 'MVC', from_address))
+    message['To'] = row['receiver_email']
+    message['Subject'] = row['email_subject'] or ''
+    message['Message-ID'] = make_msgid(domain=from_address.rpartition('@')[2])
+    message['X-MVC-Email-Id'] = str(row['email_id'])
+    message.set_content(row['body'] or '')
+    return message
+
+def _is_temporary(error):
+    """4xx replies and connection problems are worth retrying; 5xx replies are not."""
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return all(400 <= code < 500 for code, _ in error.recipients.values())
+    if isinstance(error, smtplib.SMTPResponseException):
+        return 400 <= error.smtp_code < 500
+    return isinstance(error, (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError, OSError))
+
+def _backoff(attempt, config):
+    delay = min(config['max_backoff_seconds'], config['backoff_seconds'] * 2 ** (attempt - 1))
+    return delay * random.uniform(0.5, 1.0)
+
+class _Host:
+    """The queue of one host's messages, shared by its workers."""
+
+    def __init__(self):
+        self.queue = asyncio.Queue()
+        self.unreachable = None  # The connection error once the host is given up on
+
+async def _close_quietly(backend, connection):
+    try:
+        await asyncio.to_thread(backend.close, connection)
+    except Exception:
+        pass
+
+async def _worker(backend, host, results, config):
+    connection = None
+    sent_on_connection = 0
+    try:
+        while True:
+            try:
+                email_id, previous_attempts, message = host.queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+
+            attempts = 0
+            while True:
+                if host.unreachable is not None:
+                    status, error = 'Pending', host.unreachable
+                    break
+                attempts += 1
+                try:
+                    if connection is None:
+                        try:
+                            connection = await asyncio.to_thread(backend.open)
+                        except Exception as e:
+                            if attempts >= config['max_attempts']:
+                                host.unreachable = f"{type(e).__name__}: {e}"
+                            raise
+                        sent_on_connection = 0
+                    await asyncio.to_thread(backend.send, connection, message)
+                    status, error = 'Sent', None
+                    sent_on_connection += 1
+                    if sent_on_connection >= config['messages_per_connection']:
+                        await _close_quietly(backend, connection)
+                        connection = None
+                    break
+                except Exception as e:
+                    error = f"{type(e).__name__}: {e}"
+                    if not isinstance(e, smtplib.SMTPResponseException) and connection is not None:
+                        await _close_quietly(backend, connection)  # The connection is in an unknown state
+                        connection = None
+                    if not _is_temporary(e):
+                        status = 'Failed'
+                        break
+                    if attempts >= config['max_attempts']:
+                        status = 'Failed' if previous_attempts + attempts >= config['max_total_attempts'] else 'Pending'
+                        break
+                    await asyncio.sleep(_backoff(attempts, config))
+
+            results.append({
+                'email_id': email_id, 'status': status, 'attempts': attempts,
+                'sent_at': datetime.now() if status == 'Sent' else None, 'error': error
+            })
+    finally:
+        if connection is not None:
+            await _close_quietly(backend, connection)
+
+async def deliver(messages, backend, config=None):
+    """
+    Sends messages concurrently, at most connections_per_host at a time per host.
+
+    Args:
+        messages: (email_id, previous_attempts, EmailMessage) tuples.
+        backend: An SMTPBackend, LogBackend or an object with the same methods.
+        config: Overrides for delivery_config.
+
+    Returns:
+        One result dictionary per message, as ops.record_email_deliveries expects.
+    """
+    config = {**delivery_config, **(config or {})}
+    hosts = {}
+    for item in messages:
+        hosts.setdefault(backend.host_for(item[2]), _Host()).queue.put_nowait(item)
+
+    results = []
+    workers = [
+        _worker(backend, host, results, config)
+        for host in hosts.values()
+        for _ in range(min(config['connections_per_host'], host.queue.qsize()))
+    ]
+    await asyncio.gather(*workers)
+    return results
+
+def send_pending_emails(backend=None, limit=None, progress_callback=None):
+    """
+    Sends every Pending email (or the first `limit`) in batches of delivery_config['batch_size'],
+    recording each batch's outcomes before the next batch is read.
+
+    Returns:
+        {'Sent': n, 'Pending': n, 'Failed': n} for this run.
+    """
+    backend = backend or default_backend()
+    batch_size = delivery_config['batch_size']
+    totals = Counter({'Sent': 0, 'Pending': 0, 'Failed': 0})
+    after_email_id = 0
+    processed = 0
+    while limit is None or processed < limit:
+        rows = ops.get_pending_emails(batch_size if limit is None else min(batch_size, limit - processed), after_email_id)
+        if not rows:
+            break
+        after_email_id = rows[-1]['email_id']
+        messages = [(row['email_id'], row['attempts'], build_message(row, delivery_config['from_address'])) for row in rows]
+        results = asyncio.run(deliver(messages, backend))
+        ops.record_email_deliveries(results)
+        totals.update(r['status'] for r in results)
+        processed += len(rows)
+        if progress_callback:
+            progress_callback(dict(totals))
+    return dict(totals)
+
+# =================================================================
+# LOCAL SMTP SINK
+# =================================================================
+
+class DebugSMTPServer:
+    """
+    A minimal SMTP server that accepts and discards every message, for development and
+    benchmarks. With fail_rate, that share of messages is answered with a temporary 451
+    error so retries can be exercised.
+    """
+
+    def __init__(self, host='localhost', port=1025, fail_rate=0.0, print_messages=False):
+        self.host = host
+        self.port = port
+        self.fail_rate = fail_rate
+        self.print_messages = print_messages
+        self.received = 0
+        self.rejected = 0
+        self.connections = 0
+        self._server = None
+
+    async def start(self):
+        """Starts listening. With port=0 a free port is picked and stored in self.port."""
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        self._server.close()
+        await self._server.wait_closed()
+
+    async def serve_forever(self):
+        await self.start()
+        print(f"Debug SMTP server listening on {self.host}:{self.port}")
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def _handle(self, reader, writer):
+        self.connections += 1
+
+        async def reply(line):
+            writer.write(line.encode() + b"\r\n")
+            await writer.drain()
+
+        await reply("220 mvc-debug ESMTP")
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                command = line[:4].upper()
+                if command == b'EHLO':
+                    await reply("250-mvc-debug")
+                    await reply("250 8BITMIME")
+                elif command == b'DATA':
+                    await reply("354 End data with <CR><LF>.<CR><LF>")
+                    data = []
+                    while (chunk := await reader.readline()) not in (b'.\r\n', b''):
+                        data.append(chunk)
+                    if random.random() < self.fail_rate:
+                        self.rejected += 1
+                        await reply("451 Temporary failure, try again later")
+                    else:
+                        self.received += 1
+                        if self.print_messages:
+                            print(b''.join(data).decode('utf-8', 'replace'))
+                        await reply("250 OK")
+                elif command == b'QUIT':
+                    await reply("221 Bye")
+                    break
+                elif command in (b'HELO', b'MAIL', b'RCPT', b'RSET', b'NOOP'):
+                    await reply("250 OK")
+                else:
+                    await reply("502 Command not implemented")
+        finally:
+            writer.close()
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Send pending emails, or run a local SMTP sink.")
+    parser.add_argument('--debug-server', action='store_true', help="Run DebugSMTPServer and print received messages.")
+    parser.add_argument('--limit', type=int, help="Send at most this many emails.")
+    args = parser.parse_args()
+
+    if args.debug_server:
+        asyncio.run(DebugSMTPServer(delivery_config['host'], delivery_config['port'], print_messages=True).serve_forever())
+    else:
+        print(send_pending_emails(limit=args.limit, progress_callback=print))
@@ -0,0 +1,218 @@
+"""
+Whole-club fee, donation and arrears calculations.
+
+The payments table and every member's date of birth are read once into columns, and
+the age-based fee rule is applied to all members and years at once with pandas/NumPy,
+so a year-end report over the whole membership does not need a stored-procedure sweep
+or one query per member. Amounts are handled in integer cents to avoid rounding drift.
+
+    python finance.py    # print the year-end report and check it against the SQL results
+"""
+import numpy as np
+import pandas as pd
+from mysql.connector import Error
+from db_connector import get_db_connection
+
+# The fee rule used by sp_recalculate_member_status and the member_year_ledger triggers:
+# the member's age on January 1st of the year decides.
+ADULT_AGE = 18
+ADULT_FEE_CENTS = 20000
+MINOR_FEE_CENTS = 10000
+
+LEDGER_COLUMNS = ['club_member_id', 'membership_year', 'age_in_year', 'required_fee', 'total_paid', 'donation', 'arrears']
+
+# =================================================================
+# LOADING
+# =================================================================
+
+def load_financial_data():
+    """
+    Reads every payment and every member's date of birth in two queries.
+
+    Returns:
+        (payments, members): DataFrames with columns
+        [club_member_id, membership_year, amount_cents] and [club_member_id, dob].
+    """
+    conn = get_db_connection()
+    if not conn:
+        raise Error("Could not connect to the database.")
+
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT club_member_id, membership_year, amount FROM payments")
+        rows = cursor.fetchall()
+        payments = pd.DataFrame({
+            'club_member_id': np.fromiter((r[0] for r in rows), dtype=np.int64, count=len(rows)),
+            'membership_year': np.fromiter((r[1] for r in rows), dtype=np.int64, count=len(rows)),
+            # DECIMAL(10,2) values are exact, so scaling to cents loses nothing.
+            'amount_cents': np.fromiter((int(r[2] * 100) for r in rows), dtype=np.int64, count=len(rows)),
+        })
+
+        cursor.execute("""
+            SELECT cm.club_member_id, p.dob
+            FROM club_member cm
+            JOIN person p ON cm.club_member_id = p.person_id
+        """)
+        rows = cursor.fetchall()
+        members = pd.DataFrame({
+            'club_member_id': np.fromiter((r[0] for r in rows), dtype=np.int64, count=len(rows)),
+            'dob': pd.to_datetime([r[1] for r in rows]),
+        })
+        return payments, members
+    finally:
+        cursor.close()
+        conn.close()
+
+# =================================================================
+# CALCULATIONS
+# =================================================================
+
+def age_on_january_first(dob, years):
+    """
+    Vectorized TIMESTAMPDIFF(YEAR, dob, MAKEDATE(year, 1)): full years completed on January 1st.
+    Only people born on January 1st have already had their birthday that day.
+    """
+    dob = pd.DatetimeIndex(dob)
+    years = np.asarray(years, dtype=np.int64)
+    born_on_new_year = (dob.month == 1) & (dob.day == 1)
+    return years - dob.year.to_numpy(dtype=np.int64) - np.where(born_on_new_year, 0, 1)
+
+def required_fee_cents(ages):
+    """Vectorized fee rule: 200.00 for members aged 18 or older, 100.00 otherwise."""
+    return np.where(np.asarray(ages) >= ADULT_AGE, ADULT_FEE_CENTS, MINOR_FEE_CENTS)
+
+def compute_member_year_ledger(payments, members, years=None):
+    """
+    Computes fee, total paid, donation and arrears per (member, year).
+
+    Args:
+        payments, members: as returned by load_financial_data().
+        years: If given, every member gets a row for each of these years, so members
+            who paid nothing show their full fee in arrears. Otherwise only the
+            (member, year) pairs with payments are returned, like the ledger table.
+
+    Returns:
+        A DataFrame with LEDGER_COLUMNS; money columns are in dollars.
+    """
+    totals = (
+        payments.groupby(['club_member_id', 'membership_year'], as_index=False)['amount_cents'].sum()
+        .rename(columns={'amount_cents': 'paid_cents'})
+    )
+
+    if years is None:
+        ledger = totals.merge(members, on='club_member_id', how='inner')
+    else:
+        grid = pd.DataFrame({
+            'club_member_id': np.repeat(members['club_member_id'].to_numpy(), len(years)),
+            'membership_year': np.tile(np.asarray(years, dtype=np.int64), len(members)),
+            'dob': np.repeat(members['dob'].to_numpy(), len(years)),
+        })
+        ledger = grid.merge(totals, on=['club_member_id', 'membership_year'], how='left')
+        ledger['paid_cents'] = ledger['paid_cents'].fillna(0).astype(np.int64)
+
+    ages = age_on_january_first(ledger['dob'], ledger['membership_year'])
+    fee_cents = required_fee_cents(ages)
+    paid_cents = ledger['paid_cents'].to_numpy()
+
+    result = pd.DataFrame({
+        'club_member_id': ledger['club_member_id'].to_numpy(),
+        'membership_year': ledger['membership_year'].to_numpy(),
+        'age_in_year': ages,
+        'required_fee': fee_cents / 100,
+        'total_paid': paid_cents / 100,
+        'donation': np.maximum(paid_cents - fee_cents, 0) / 100,
+        'arrears': np.maximum(fee_cents - paid_cents, 0) / 100,
+    })
+    return result.sort_values(['membership_year', 'club_member_id'], ignore_index=True)
+
+def year_end_report(years=None, payments=None, members=None):
+    """
+    Treasurer's summary per membership year: members billed, fees due, total paid,
+    donations, arrears and how many members paid in full.
+
+    Args:
+        years: The years to report on. Defaults to every year with a payment.
+        payments, members: Preloaded data; read from the database if not given.
+    """
+    if payments is None or members is None:
+        payments, members = load_financial_data()
+    if years is None:
+        years = np.unique(payments['membership_year'].to_numpy())
+
+    ledger = compute_member_year_ledger(payments, members, years=years)
+    ledger['paid_in_full'] = ledger['arrears'] == 0
+    report = ledger.groupby('membership_year').agg(
+        members=('club_member_id', 'size'),
+        fees_due=('required_fee', 'sum'),
+        total_paid=('total_paid', 'sum'),
+        donations=('donation', 'sum'),
+        arrears=('arrears', 'sum'),
+        paid_in_full=('paid_in_full', 'sum'),
+    )
+    return report.round(2).reset_index()
+
+# =================================================================
+# PARITY CHECK
+# =================================================================
+
+# The original per-member aggregation, run club-wide.
+SQL_LEDGER = """
+    SELECT
+        p.club_member_id,
+        p.membership_year,
+        TIMESTAMPDIFF(YEAR, pr.dob, MAKEDATE(p.membership_year, 1)) AS age_in_year,
+        CASE
+            WHEN TIMESTAMPDIFF(YEAR, pr.dob, MAKEDATE(p.membership_year, 1)) >= 18 THEN 200.00
+            ELSE 100.00
+        END AS required_fee,
+        SUM(p.amount) AS total_paid
+    FROM payments p
+    JOIN person pr ON p.club_member_id = pr.person_id
+    JOIN club_member cm ON cm.club_member_id = p.club_member_id
+    GROUP BY p.club_member_id, p.membership_year, pr.dob
+"""
+
+def check_parity():
+    """
+    Compares the vectorized ledger with the SQL aggregation over the same data.
+    Run by tests/test_finance.py when a database is available.
+
+    Returns:
+        A DataFrame of mismatching (member, year) rows; empty when both agree.
+    """
+    payments, members = load_financial_data()
+    computed = compute_member_year_ledger(payments, members)
+
+    conn = get_db_connection()
+    if not conn:
+        raise Error("Could not connect to the database.")
+    cursor = conn.cursor(dictionary=True)
+    try:
+        cursor.execute(SQL_LEDGER)
+        expected = pd.DataFrame(cursor.fetchall(), columns=LEDGER_COLUMNS[:5])
+    finally:
+        cursor.close()
+        conn.close()
+
+    for column in ('required_fee', 'total_paid'):
+        expected[column] = expected[column].astype(float)
+    expected['donation'] = (expected['total_paid'] - expected['required_fee']).clip(lower=0)
+    expected['arrears'] = (expected['required_fee'] - expected['total_paid']).clip(lower=0)
+
+    merged = computed.merge(
+        expected, on=['club_member_id', 'membership_year'], how='outer',
+        suffixes=('', '_sql'), indicator=True
+    )
+    mismatch = merged['_merge'] != 'both'
+    for column in LEDGER_COLUMNS[2:]:
+        mismatch |= ~np.isclose(merged[column].astype(float), merged[f'{column}_sql'].astype(float))
+    return merged[mismatch].drop(columns='_merge')
+
+if __name__ == '__main__':
+    print(year_end_report().to_string(index=False))
+    mismatches = check_parity()
+    if mismatches.empty:
+        print("Parity check passed: the vectorized ledger matches the SQL aggregation.")
+    else:
+        print(f"Parity check FAILED for {len(mismatches)} rows:")
+        print(mismatches.to_string(index=False))
@@ -0,0 +1,193 @@
+"""
+Applies the versioned migrations in sql_statements/migrations to the database.
+
+    python migrate.py                        # apply pending migrations
+    python migrate.py --explain explain.txt  # also capture EXPLAIN for the hot queries before and after
+
+Each migration file is named NNN_description.sql and is applied once, in order.
+Applied versions are recorded in the schema_migrations table.
+"""
+import argparse
+import os
+import mysql.connector
+from mysql.connector import Error
+from db_connector import db_config
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'sql_statements', 'migrations')
+
+# Representative instances of the queries in db_operations.py, used to compare plans.
+HOT_QUERIES = {
+    'dashboard_upcoming_sessions':
+        "SELECT COUNT(*) FROM sessions WHERE date_time BETWEEN NOW() AND DATE_ADD(NOW(), INTERVAL 7 DAY)",
+    'weekly_email_sessions':
+        "SELECT s.session_id FROM sessions s WHERE s.date_time >= '2025-01-06' AND s.date_time < '2025-01-13'",
+    'player_conflict_window':
+        "SELECT COUNT(*) FROM formations f JOIN sessions s ON f.session_id = s.session_id "
+        "WHERE f.player_id = 1 AND s.date_time >= '2025-01-06' AND s.date_time < '2025-01-07' "
+        "AND s.date_time > '2025-01-06 15:00:00' AND s.date_time < '2025-01-06 21:00:00'",
+    'current_assignment_for_person':
+        "SELECT la.location_id FROM location_assignment la WHERE la.person_id = 1 AND la.end_date IS NULL",
+    'current_coach_for_location':
+        "SELECT la.person_id FROM location_assignment la "
+        "WHERE la.location_id = 1 AND la.personnel_role = 'Coach' AND la.end_date IS NULL",
+    'current_assignment_projection':
+        "SELECT ca.location_id FROM current_location_assignment ca WHERE ca.person_id = 1",
+    'current_coach_projection':
+        "SELECT ca.person_id FROM current_location_assignment ca WHERE ca.location_id = 1 AND ca.personnel_role = 'Coach'",
+    'player_schedule_window':
+        "SELECT COUNT(*) FROM player_schedule ps WHERE ps.player_id = 1 "
+        "AND ps.starts_at > '2025-01-06 15:00:00' AND ps.starts_at < '2025-01-06 21:00:00'",
+    'player_other_sessions':
+        "SELECT s.date_time FROM formations f JOIN sessions s ON f.session_id = s.session_id WHERE f.player_id = 1",
+    'roster_for_formation':
+        "SELECT f.player_id, f.player_position FROM formations f WHERE f.session_id = 1 AND f.team_id = 1",
+    'member_payments_for_year':
+        "SELECT SUM(amount) FROM payments WHERE club_member_id = 1 AND membership_year = 2025",
+    'pending_emails':
+        "SELECT email_id FROM emails WHERE delivery_status = 'Pending' AND email_id > 0 ORDER BY email_id LIMIT 500",
+    'members_sorted_by_name':
+        "SELECT cm.club_member_id FROM club_member cm JOIN person p ON cm.club_member_id = p.person_id "
+        "ORDER BY p.last_name, p.first_name LIMIT 50",
+}
+
+# The index each hot query must use once every migration is applied, as (table alias, key)
+# in its EXPLAIN plan. Checked by tests/test_migrations.py, so an index that stops being
+# picked fails a test rather than only changing the --explain output.
+EXPECTED_KEYS = {
+    'dashboard_upcoming_sessions': ('sessions', 'idx_sessions_date_time'),
+    'weekly_email_sessions': ('s', 'idx_sessions_date_time'),
+    'player_conflict_window': ('f', 'idx_formations_player_session'),
+    'current_assignment_for_person': ('la', 'idx_assignment_person_open'),
+    'current_coach_for_location': ('la', 'idx_assignment_location_role'),
+    'current_assignment_projection': ('ca', 'PRIMARY'),
+    'current_coach_projection': ('ca', 'idx_current_location_role'),
+    'player_schedule_window': ('ps', 'idx_schedule_player_time'),
+    'player_other_sessions': ('f', 'idx_formations_player_session'),
+    'roster_for_formation': ('f', 'idx_formations_session_team'),
+    'member_payments_for_year': ('payments', 'idx_payments_member_year'),
+    'pending_emails': ('emails', 'idx_emails_delivery'),
+    'members_sorted_by_name': ('p', 'idx_person_name'),
+}
+
+def split_sql_statements(sql_text):
+    """
+    Splits a SQL script into statements, honouring the DELIMITER command used by
+    the trigger and procedure definitions (the connector cannot parse DELIMITER itself).
+    """
+    statements = []
+    delimiter = ';'
+    buffer = []
+    for line in sql_text.splitlines():
+        stripped = line.strip()
+        if stripped.upper().startswith('DELIMITER '):
+            delimiter = stripped.split(None, 1)[1]
+            continue
+        if not buffer and (not stripped or stripped.startswith('--')):
+            continue
+        buffer.append(line)
+        if stripped.endswith(delimiter):
+            statement = '\n'.join(buffer).rstrip()
+            statement = statement[:-len(delimiter)].strip()
+            if statement:
+                statements.append(statement)
+            buffer = []
+    remainder = '\n'.join(buffer).strip()
+    if remainder:
+        statements.append(remainder)
+    return statements
+
+def list_migrations():
+    """Returns (version, path) for every migration file, in order."""
+    migrations = []
+    for filename in sorted(os.listdir(MIGRATIONS_DIR)):
+        if filename.endswith('.sql') and filename[:3].isdigit():
+            migrations.append((filename[:-4], os.path.join(MIGRATIONS_DIR, filename)))
+    return migrations
+
+def get_applied_versions(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version 	VARCHAR(255) PRIMARY KEY,
+            applied_at 	TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    cursor.execute("SELECT version FROM schema_migrations")
+    return {row[0] for row in cursor.fetchall()}
+
+def apply_migration(conn, version, path):
+    """
+    Runs every statement in a migration file, then records the version.
+    Note: MySQL commits DDL implicitly, so a migration that fails halfway is not rolled back.
+    """
+    with open(path, encoding='utf-8') as f:
+        statements = split_sql_statements(f.read())
+    cursor = conn.cursor()
+    try:
+        for statement in statements:
+            cursor.execute(statement)
+            if cursor.with_rows:
+                cursor.fetchall()
+        cursor.execute("INSERT INTO schema_migrations (version) VALUES (%s)", (version,))
+        conn.commit()
+        print(f"Applied migration {version}")
+    finally:
+        cursor.close()
+
+def explain_hot_queries(conn):
+    """Returns {query_name: [EXPLAIN rows]} for the queries in HOT_QUERIES."""
+    plans = {}
+    cursor = conn.cursor(dictionary=True)
+    try:
+        for name, sql in HOT_QUERIES.items():
+            cursor.execute("EXPLAIN " + sql)
+            plans[name] = cursor.fetchall()
+    finally:
+        cursor.close()
+    return plans
+
+def format_plans(title, plans):
+    lines = [f"===== {title} ====="]
+    for name, rows in plans.items():
+        lines.append(f"-- {name}")
+        for row in rows:
+            lines.append(
+                f"   table={row.get('table')} type={row.get('type')} key={row.get('key')} "
+                f"rows={row.get('rows')} extra={row.get('Extra')}"
+            )
+    return '\n'.join(lines)
+
+def migrate(explain_path=None):
+    """Applies all pending migrations. Returns the list of versions applied."""
+    conn = mysql.connector.connect(**db_config)
+    try:
+        before = explain_hot_queries(conn) if explain_path else None
+
+        cursor = conn.cursor()
+        applied = get_applied_versions(cursor)
+        cursor.close()
+
+        newly_applied = []
+        for version, path in list_migrations():
+            if version not in applied:
+                apply_migration(conn, version, path)
+                newly_applied.append(version)
+        if not newly_applied:
+            print("Database is up to date.")
+
+        if explain_path:
+            after = explain_hot_queries(conn)
+            with open(explain_path, 'w', encoding='utf-8') as f:
+                f.write(format_plans("BEFORE", before) + '\n\n' + format_plans("AFTER", after) + '\n')
+            print(f"EXPLAIN output written to {explain_path}")
+        return newly_applied
+    except Error as e:
+        print(f"Migration failed: {e}")
+        raise
+    finally:
+        conn.close()
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Apply pending database migrations.")
+    parser.add_argument('--explain', metavar='FILE', help="Write EXPLAIN plans of the hot queries before and after migrating to FILE.")
+    args = parser.parse_args()
+    migrate(explain_path=args.explain)
@@ -57,6 +57,12 @@ class SessionType(Enum):
     GAME = 'Game'
     TRAINING = 'Training'
     
+class DeliveryStatus(Enum):
+    PENDING = 'Pending'
+    SENT = 'Sent'
+    FAILED = 'Failed'
+    SKIPPED = 'Skipped'
+
 class PlayerPosition(Enum):
     SETTER = 'Setter'
     OUTSIDE_HITTER = 'Outside Hitter'
@@ -69,7 +75,7 @@ class PlayerPosition(Enum):
 # DATACLASS MODELS
 # =================================================================
 
-@dataclass
+@dataclass(slots=True)
 class Person:
     person_id: int
     first_name: str
@@ -85,7 +91,7 @@ class Person:
     email_address: str | None
     gender: Gender | None
 
-@dataclass
+@dataclass(slots=True)
 class ClubMember:
     club_member_id: int
     height: Decimal | None
@@ -94,14 +100,14 @@ class ClubMember:
     join_date: date
     person_details: Person | None = None
 
-@dataclass
+@dataclass(slots=True)
 class ClubMemberFamilyLink:
     club_member_id: int
     family_member_id: int
     relationship_type: RelationshipType
     contact_priority: ContactPriority
 
-@dataclass
+@dataclass(slots=True)
 class Location:
     location_id: int
     location_type: LocationType
@@ -113,12 +119,12 @@ class Location:
     web_address: str | None
     max_capacity: int | None
 
-@dataclass
+@dataclass(slots=True)
 class LocationPhoneNumber:
     location_id: int
     phone_number: str
 
-@dataclass
+@dataclass(slots=True)
 class LocationAssignment:
     assignment_id: int
     person_id: int
@@ -128,18 +134,18 @@ class LocationAssignment:
     personnel_role: PersonnelRole | None
     mandate: PersonnelMandate | None
 
-@dataclass
+@dataclass(slots=True)
 class Hobby:
     hobby_id: int
     hobby_name: str
     description: str | None
 
-@dataclass
+@dataclass(slots=True)
 class ClubMemberHobby:
     club_member_id: int
     hobby_id: int
 
-@dataclass
+@dataclass(slots=True)
 class Payment:
     payment_id: int
     club_member_id: int
@@ -148,14 +154,14 @@ class Payment:
     method: PaymentMethod
     membership_year: int
 
-@dataclass
+@dataclass(slots=True)
 class Team:
     team_id: int
     home_location_id: int
     name: str
     team_gender: Gender
 
-@dataclass
+@dataclass(slots=True)
 class Session:
     session_id: int
     type: SessionType
@@ -163,12 +169,12 @@ class Session:
     final_score: str | None
     location_id: int
 
-@dataclass
+@dataclass(slots=True)
 class SessionTeam:
     session_id: int
     team_id: int
 
-@dataclass
+@dataclass(slots=True)
 class Formation:
     formation_id: int
     session_id: int
@@ -176,7 +182,7 @@ class Formation:
     player_id: int
     player_position: PlayerPosition
 
-@dataclass
+@dataclass(slots=True)
 class Email:
     email_id: int
     sender_name: str
@@ -184,4 +190,8 @@ class Email:
     email_subject: str | None
     body: str | None
     send_at: datetime
-    session_id: int | None
\ No newline at end of file
+    session_id: int | None
+    delivery_status: DeliveryStatus = DeliveryStatus.PENDING
+    attempts: int = 0
+    sent_at: datetime | None = None
+    last_error: str | None = None
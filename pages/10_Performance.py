@@ -0,0 +1,70 @@
+import streamlit as st
+import pandas as pd
+import db
+import profiling
+
+st.set_page_config(layout="wide")
+st.title("Performance")
+
+st.info("Timings of every database call made by the app since it started, collected by the profiling module. Each call and page rerun is also written as one JSON line to the 'mvc_db.performance' log, on the terminal running the app (and to profiling_config['log_path'] when set).", icon="⏱️")
+
+# --- SETTINGS ---
+with st.expander("⚙️ Settings"):
+    profiling.profiling_config['enabled'] = st.toggle("Collect timings", value=profiling.profiling_config['enabled'])
+    profiling.profiling_config['slow_query_ms'] = st.number_input(
+        "Slow-query threshold (ms)", min_value=1, value=int(profiling.profiling_config['slow_query_ms']), step=50,
+        help="Statements slower than this are logged together with their EXPLAIN plan."
+    )
+    if st.button("Clear collected samples"):
+        profiling.profiler.reset()
+        st.rerun()
+
+summary = db.get_performance_summary()
+ms_columns = {c: st.column_config.NumberColumn(format="%.1f") for c in
+              ('p50_ms', 'p95_ms', 'p99_ms', 'avg_connect_ms', 'avg_execute_ms', 'avg_fetch_ms', 'avg_rows', 'avg_bytes')}
+
+# --- PER FUNCTION ---
+st.header("By Database Function")
+st.write("Latency percentiles of each `db_operations` function called through `db.execute_query` / `db.execute_change`, slowest p95 first.")
+if summary['functions']:
+    st.dataframe(pd.DataFrame(summary['functions']), use_container_width=True, hide_index=True, column_config=ms_columns)
+else:
+    st.info("No database calls recorded yet. Browse the other pages to collect timings.")
+
+# --- PER PAGE ---
+st.header("By Page Rerun")
+st.write("Each rerun of a page runs inside one unit of work; these are the totals per rerun.")
+if summary['pages']:
+    st.dataframe(pd.DataFrame(summary['pages']), use_container_width=True, hide_index=True, column_config=ms_columns)
+else:
+    st.info("No page reruns recorded yet.")
+
+# --- SLOW QUERIES ---
+st.header("Slow Queries")
+slow_queries = summary['slow_queries']
+if not slow_queries:
+    st.success(f"No statement took longer than {profiling.profiling_config['slow_query_ms']} ms.")
+else:
+    for entry in reversed(slow_queries):
+        with st.expander(f"{entry['execute_ms']:.0f} ms · {entry['function'] or 'unknown function'} · {entry['label'] or 'no page'}"):
+            st.code(entry['sql'], language="sql")
+            if entry['explain']:
+                st.dataframe(pd.DataFrame(entry['explain']), use_container_width=True, hide_index=True)
+
+st.divider()
+
+# --- CACHES ---
+st.header("Caches")
+col1, col2 = st.columns(2)
+with col1:
+    st.subheader("Read Cache")
+    cache_stats = db.get_cache_stats()
+    st.metric("Hit Rate", f"{cache_stats['hit_rate']:.0%}")
+    st.caption(f"{cache_stats['hits']} hits · {cache_stats['misses']} misses · {cache_stats['entries']} entries · {cache_stats['evictions']} evictions")
+with col2:
+    st.subheader("Prepared Statements")
+    statement_stats = db.get_statement_stats()
+    if statement_stats:
+        st.dataframe(pd.DataFrame(statement_stats), use_container_width=True, hide_index=True)
+    else:
+        st.info("No prepared statements executed yet.")
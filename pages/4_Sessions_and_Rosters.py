@@ -4,163 +4,253 @@ import streamlit as st
 import pandas as pd
 import db
 import db_operations as ops
-from datetime import datetime, date, time
+import scheduler
+from pagination import paged_query
+from datetime import datetime, date, time, timedelta
 
 st.set_page_config(layout="wide")
 st.title("Manage Sessions, Teams, and Rosters")
 
-# --- CREATE NEW SESSION ---
-with st.expander("➕ Create a New Session"):
-    with st.form("new_session_form", clear_on_submit=True):
-        locations = db.execute_query(ops.get_all_locations_with_phones)
-        if not locations:
-            st.error("Cannot create a session without at least one location. Please add a location first.")
-        else:
-            loc_map = {f"{l['name']} ({l['city']})": l['location_id'] for l in locations}
+# One connection and one transaction for the whole rerun.
+with db.unit_of_work(label="Sessions and Rosters"):
+    # --- CREATE NEW SESSION ---
+    with st.expander("➕ Create a New Session"):
+        with st.form("new_session_form", clear_on_submit=True):
+            locations = db.execute_query(ops.get_all_locations_with_phones)
+            if not locations:
+                st.error("Cannot create a session without at least one location. Please add a location first.")
+            else:
+                loc_map = {f"{l['name']} ({l['city']})": l['location_id'] for l in locations}
             
-            col1, col2, col3, col4 = st.columns(4)
-            with col1:
-                session_type = st.selectbox("Session Type", ["Game", "Training"])
-            with col2:
-                loc_label = st.selectbox("Location", loc_map.keys())
-            with col3:
-                start_date_val = st.date_input("Start Date", value=date.today())
-            with col4:
-                start_time_val = st.time_input("Start Time", value=datetime.now().time())
+                col1, col2, col3, col4 = st.columns(4)
+                with col1:
+                    session_type = st.selectbox("Session Type", ["Game", "Training"])
+                with col2:
+                    loc_label = st.selectbox("Location", loc_map.keys())
+                with col3:
+                    start_date_val = st.date_input("Start Date", value=date.today())
+                with col4:
+                    start_time_val = st.time_input("Start Time", value=datetime.now().time())
             
-            date_time = datetime.combine(start_date_val, start_time_val)
+                date_time = datetime.combine(start_date_val, start_time_val)
 
-            submitted = st.form_submit_button("Create Session")
-            if submitted:
+                submitted = st.form_submit_button("Create Session")
+                if submitted:
+                    try:
+                        new_id = db.execute_change(ops.add_session, params={
+                            "session_type": session_type, "date_time": date_time, "location_id": loc_map[loc_label]
+                        })
+                        if new_id is None:
+                            st.error("Could not create session: a database error occurred.")
+                        else:
+                            st.success("Session created successfully! Select it from the list below to manage it.")
+                            st.rerun()
+                    except db.RuleViolation as e:
+                        st.error(f"Could not create session: {e} See the free slots below.")
+
+        if locations:
+            st.write("##### Free Slots at the Selected Location (next 7 days)")
+            free_slots = db.execute_query(ops.get_free_slots, params={
+                "location_id": loc_map[loc_label], "week_start": start_date_val
+            })
+            if free_slots:
+                st.dataframe(pd.DataFrame({"start": free_slots}), use_container_width=True, hide_index=True)
+            else:
+                st.info("No free slots at this location in the next 7 days.")
+
+    # --- GENERATE A SCHEDULE ---
+    with st.expander("🗓️ Generate a Schedule"):
+        st.write("Plans one round of games per gender each weekend and weekday trainings for every team, "
+                 "without double-booking locations, exceeding capacity or giving a team two sessions on one day.")
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            plan_start = st.date_input("From", value=date.today(), key="plan_start")
+        with col2:
+            plan_end = st.date_input("To", value=date.today() + timedelta(weeks=12), key="plan_end")
+        with col3:
+            trainings_per_week = st.number_input("Trainings per team per week", min_value=0, max_value=4, value=1)
+
+        if st.button("Preview Schedule"):
+            st.session_state.planned_schedule = scheduler.generate_schedule(plan_start, plan_end, trainings_per_week=trainings_per_week)
+
+        plan = st.session_state.get("planned_schedule")
+        if plan is not None:
+            st.write(f"**{len(plan.sessions)}** sessions planned, **{len(plan.unscheduled)}** could not be placed.")
+            st.dataframe(pd.DataFrame([s.as_params() for s in plan.sessions]), use_container_width=True, hide_index=True)
+            if plan.unscheduled:
+                st.dataframe(pd.DataFrame(plan.unscheduled, columns=["session_type", "team_ids", "week_start", "reason"]),
+                             use_container_width=True, hide_index=True)
+            if plan.sessions and st.button("Save Schedule"):
                 try:
-                    db.execute_change(ops.add_session, params={
-                        "session_type": session_type, "date_time": date_time, "location_id": loc_map[loc_label]
-                    })
-                    st.success("Session created successfully! Select it from the list below to manage it.")
+                    new_ids = db.execute_change(scheduler.save_schedule, params={"schedule": plan})
+                    del st.session_state.planned_schedule
+                    st.success(f"Created {len(new_ids)} sessions.")
                     st.rerun()
                 except db.RuleViolation as e:
-                    st.error(f"Could not create session: {e}")
+                    st.error(f"Could not save the schedule: {e}")
 
-st.divider()
+    st.divider()
 
-# --- READ (Master List) ---
-st.header("Master Session List")
-sessions = db.execute_query(ops.get_all_sessions_for_dashboard)
-if not sessions:
-    st.info("No sessions found. Use the form above to create one.")
-    st.stop()
+    # --- READ (Master List) ---
+    st.header("Master Session List")
+    sessions = paged_query("sessions", ops.get_all_sessions_for_dashboard, page_size=50)
+    if not sessions:
+        st.info("No sessions found. Use the form above to create one.")
+        st.stop()
 
-st.dataframe(pd.DataFrame(sessions), use_container_width=True, hide_index=True)
+    st.dataframe(pd.DataFrame(sessions), use_container_width=True, hide_index=True)
 
-# --- MANAGE A SPECIFIC SESSION ---
-st.header("Manage a Specific Session")
-session_options = {f"#{s['session_id']} - {s['teams_involved'] or 'No Teams'} @ {s['date_time']}": s['session_id'] for s in sessions}
-selected_label = st.selectbox("Select a Session to Manage", session_options.keys())
-sid = session_options[selected_label]
+    # --- MANAGE A SPECIFIC SESSION ---
+    st.header("Manage a Specific Session")
+    session_search = st.text_input("Find by ID, day (YYYY-MM-DD) or team name", key="session_search", help="Leave empty to choose from the page shown above.")
+    if session_search.strip():
+        choices = db.execute_query(ops.find_sessions, params={"term": session_search})
+        if not choices:
+            st.info(f"No session matches '{session_search}'.")
+            st.stop()
+    else:
+        choices = sessions
+    session_options = {f"#{s['session_id']} - {s['teams_involved'] or 'No Teams'} @ {s['date_time']}": s['session_id'] for s in choices}
+    selected_label = st.selectbox("Select a Session to Manage", session_options.keys())
+    sid = session_options[selected_label]
 
-st.subheader(f"Dashboard for Session #{sid}")
+    st.subheader(f"Dashboard for Session #{sid}")
 
-tab1, tab2, tab3 = st.tabs(["👥 Teams", "📝 Rosters & Formations", "⚙️ Details & Score"])
+    tab1, tab2, tab3 = st.tabs(["👥 Teams", "📝 Rosters & Formations", "⚙️ Details & Score"])
 
-# --- Tab 1: Manage Teams ---
-with tab1:
-    st.write("#### Manage Teams for this Session")
-    teams_in_session = db.execute_query(ops.get_teams_for_session, params={"session_id": sid})
+    # --- Tab 1: Manage Teams ---
+    with tab1:
+        st.write("#### Manage Teams for this Session")
+        teams_in_session = db.execute_query(ops.get_teams_for_session, params={"session_id": sid})
     
-    if not teams_in_session:
-        st.info("No teams are attached to this session yet.")
-    else:
-        for team in teams_in_session:
-            col1, col2 = st.columns([4, 1])
-            with col1:
-                st.write(f"**{team['name']}** ({team['team_gender']})")
-            with col2:
-                if st.button("Detach", key=f"detach_{team['team_id']}"):
-                    try:
-                        db.execute_change(ops.detach_team_from_session, params={"session_id": sid, "team_id": team['team_id']})
-                        st.success(f"Team '{team['name']}' detached.")
-                        st.rerun()
-                    except db.RuleViolation as e:
-                        st.error(f"Could not detach team: {e}")
+        if not teams_in_session:
+            st.info("No teams are attached to this session yet.")
+        else:
+            for team in teams_in_session:
+                col1, col2 = st.columns([4, 1])
+                with col1:
+                    st.write(f"**{team['name']}** ({team['team_gender']})")
+                with col2:
+                    if st.button("Detach", key=f"detach_{team['team_id']}"):
+                        try:
+                            db.execute_change(ops.detach_team_from_session, params={"session_id": sid, "team_id": team['team_id']})
+                            st.success(f"Team '{team['name']}' detached.")
+                            st.rerun()
+                        except db.RuleViolation as e:
+                            st.error(f"Could not detach team: {e}")
     
-    st.write("##### Attach a New Team")
-    all_teams = db.execute_query(ops.get_all_teams_with_details)
-    attached_team_ids = {t['team_id'] for t in teams_in_session}
+        st.write("##### Attach a New Team")
+        all_teams = db.execute_query(ops.get_all_teams_with_details)
+        attached_team_ids = {t['team_id'] for t in teams_in_session}
     
-    available_teams = [t for t in all_teams if t['team_id'] not in attached_team_ids]
+        available_teams = [t for t in all_teams if t['team_id'] not in attached_team_ids]
     
-    if not available_teams:
-        st.warning("No other available teams to attach. Create a new team on the 'Teams' page.")
-    else:
-        team_map = {f"#{t['team_id']} - {t['name']}": t['team_id'] for t in available_teams}
-        team_to_add_label = st.selectbox("Select a team to attach", team_map.keys())
-        
-        if st.button("Attach Team to Session"):
-            try:
-                db.execute_change(ops.add_team_to_session, params={"session_id": sid, "team_id": team_map[team_to_add_label]})
-                st.success("Team attached.")
-                st.rerun()
-            except db.RuleViolation as e:
-                st.error(f"Could not attach team: {e}")
-
-# --- Tab 2: Manage Rosters & Formations ---
-with tab2:
-    st.write("#### Manage Player Formations")
-    teams_in_session = db.execute_query(ops.get_teams_for_session, params={"session_id": sid})
-    if len(teams_in_session) == 0:
-        st.info("You must attach at least one team to manage its roster.")
-    else:
-        team_map = {t['name']: t['team_id'] for t in teams_in_session}
-        team_name = st.selectbox("Select Team Roster", team_map.keys(), key="roster_team_select")
-        tid = team_map[team_name]
-
-        st.write(f"##### Roster for **{team_name}**")
-        roster = db.execute_query(ops.get_roster_for_formation, params={"session_id": sid, "team_id": tid})
-        st.table(roster)
-
-        st.write("##### Add Player to Roster")
-        eligible_players = db.execute_query(ops.get_eligible_players_for_team, params={"team_id": tid})
-        if not eligible_players:
-            st.warning("No eligible players found for this team. Check player gender and member status.")
+        if not available_teams:
+            st.warning("No other available teams to attach. Create a new team on the 'Teams' page.")
         else:
-            player_map = {f"{p['first_name']} {p['last_name']}": p['club_member_id'] for p in eligible_players}
-            player_label = st.selectbox("Select Eligible Player", player_map.keys())
-            position = st.selectbox("Assign Position", ["Setter", "Outside Hitter", "Opposite Hitter", "Middle Blocker", "Defensive Specialist", "Libero"])
-            
-            if st.button("Add Player to Formation"):
+            team_map = {f"#{t['team_id']} - {t['name']}": t['team_id'] for t in available_teams}
+            team_to_add_label = st.selectbox("Select a team to attach", team_map.keys())
+        
+            if st.button("Attach Team to Session"):
                 try:
-                    db.execute_change(ops.add_formation, params={
-                        "session_id": sid, "team_id": tid, "player_id": player_map[player_label], "player_position": position
-                    })
-                    st.success("Player added to formation.")
+                    db.execute_change(ops.add_team_to_session, params={"session_id": sid, "team_id": team_map[team_to_add_label]})
+                    st.success("Team attached.")
                     st.rerun()
                 except db.RuleViolation as e:
-                    st.error(f"Could not add player: {e}")
+                    st.error(f"Could not attach team: {e}")
+
+    # --- Tab 2: Manage Rosters & Formations ---
+    with tab2:
+        st.write("#### Manage Player Formations")
+        teams_in_session = db.execute_query(ops.get_teams_for_session, params={"session_id": sid})
+        if len(teams_in_session) == 0:
+            st.info("You must attach at least one team to manage its roster.")
+        else:
+            team_map = {t['name']: t['team_id'] for t in teams_in_session}
+            team_name = st.selectbox("Select Team Roster", team_map.keys(), key="roster_team_select")
+            tid = team_map[team_name]
+
+            st.write(f"##### Roster for **{team_name}**")
+            roster = db.execute_query(ops.get_roster_for_formation, params={"session_id": sid, "team_id": tid})
+            st.table(roster)
+
+            # The outcome of the last bulk add, shown here so it survives the rerun even
+            # when no eligible players are left.
+            outcomes = st.session_state.pop("last_bulk_add", None)
+            if outcomes is not None:
+                added = sum(1 for o in outcomes if o['status'] == 'added')
+                st.success(f"Added {added} of {len(outcomes)} players.")
+                if added < len(outcomes):
+                    st.dataframe(pd.DataFrame([o for o in outcomes if o['status'] == 'rejected']), use_container_width=True, hide_index=True)
+
+            st.write("##### Add Player to Roster")
+            eligible_players = db.execute_query(ops.get_eligible_players_for_team, params={"team_id": tid, "session_id": sid})
+            if not eligible_players:
+                st.warning("No eligible players found for this team. Check player gender, member status and other sessions within 3 hours.")
+            else:
+                player_map = {f"{p['first_name']} {p['last_name']}": p['club_member_id'] for p in eligible_players}
+                player_label = st.selectbox("Select Eligible Player", player_map.keys())
+                position = st.selectbox("Assign Position", ["Setter", "Outside Hitter", "Opposite Hitter", "Middle Blocker", "Defensive Specialist", "Libero"])
+            
+                if st.button("Add Player to Formation"):
+                    try:
+                        added = db.execute_change(ops.add_formation, params={
+                            "session_id": sid, "team_id": tid, "player_id": player_map[player_label], "player_position": position
+                        })
+                        if added:
+                            st.success("Player added to formation.")
+                            st.rerun()
+                        else:
+                            st.error("Could not add player: a database error occurred.")
+                    except db.RuleViolation as e:
+                        st.error(f"Could not add player: {e}")
+
+                st.write("##### Add Several Players at Once")
+                positions = ["Setter", "Outside Hitter", "Opposite Hitter", "Middle Blocker", "Defensive Specialist", "Libero"]
+                selected_players = st.multiselect("Select Players", player_map.keys(), key="bulk_players")
+                bulk_positions = {}
+                for label in selected_players:
+                    bulk_positions[label] = st.selectbox(f"Position for {label}", positions, key=f"bulk_pos_{player_map[label]}")
 
-# --- Tab 3: Edit Details & Score ---
-with tab3:
-    st.write("#### Edit Session Details")
-    session_data = db.execute_query(ops.search, params={"table_name": "sessions", "session_id": sid})[0]
+                if selected_players and st.button("Add Selected Players to Formation"):
+                    try:
+                        outcomes = db.execute_change(ops.add_formations_bulk, params={
+                            "session_id": sid, "team_id": tid,
+                            "players": [(player_map[label], bulk_positions[label]) for label in selected_players]
+                        })
+                        # Kept across the rerun, which reloads the roster and the eligible players.
+                        # Rerun even when nothing was added: the outcome is shown above this button.
+                        st.session_state.last_bulk_add = outcomes
+                        st.rerun()
+                    except db.RuleViolation as e:
+                        st.error(f"Could not add players: {e}")
+
+    # --- Tab 3: Edit Details & Score ---
+    with tab3:
+        st.write("#### Edit Session Details")
+        session_data = db.execute_query(ops.search, params={"table_name": "sessions", "session_id": sid})[0]
     
-    with st.form("update_session_form"):
-        col_d, col_t = st.columns(2)
-        with col_d:
-            new_date = st.date_input("New Date", value=session_data['date_time'].date())
-        with col_t:
-            new_time = st.time_input("New Time", value=session_data['date_time'].time())
-        new_datetime = datetime.combine(new_date, new_time)
+        with st.form("update_session_form"):
+            col_d, col_t = st.columns(2)
+            with col_d:
+                new_date = st.date_input("New Date", value=session_data['date_time'].date())
+            with col_t:
+                new_time = st.time_input("New Time", value=session_data['date_time'].time())
+            new_datetime = datetime.combine(new_date, new_time)
         
-        final_score = st.text_input("Final Score", value=session_data['final_score'], help="e.g., '3-1' or '25-23, 25-21'")
+            final_score = st.text_input("Final Score", value=session_data['final_score'], help="e.g., '3-1' or '25-23, 25-21'")
         
-        submitted = st.form_submit_button("Save Session Details")
-        if submitted:
-            try:
-                db.execute_change(ops.update, params={
-                    "table_name": "sessions",
-                    "criteria": {"session_id": sid},
-                    "new_data": {"date_time": new_datetime, "final_score": final_score}
-                })
-                st.success("Session details updated.")
-                st.rerun()
-            except db.RuleViolation as e:
-                st.error(f"Could not update details: {e}")
\ No newline at end of file
+            submitted = st.form_submit_button("Save Session Details")
+            if submitted:
+                try:
+                    conflicts = db.execute_change(ops.reschedule_session, params={
+                        "session_id": sid, "new_date_time": new_datetime, "final_score": final_score
+                    })
+                    if conflicts:
+                        st.error("Session not moved: these players have another session within 3 hours of the new time.")
+                        st.dataframe(pd.DataFrame(conflicts), use_container_width=True, hide_index=True)
+                    else:
+                        st.success("Session details updated.")
+                        st.rerun()
+                except db.RuleViolation as e:
+                    st.error(f"Could not update details: {e}")
\ No newline at end of file
@@ -1,51 +1,82 @@
 import streamlit as st
-import pandas as pd
 import db
 import db_operations as ops
+import email_delivery
+from pagination import paged_query
 from datetime import date, timedelta
 
 st.set_page_config(layout="wide")
 st.title("Email Generation and Log")
 
-st.header("Generate Weekly Schedule Emails")
-st.info("This tool finds all players scheduled for sessions in the selected date range, generates the reminder emails, and logs them to the database. For this demo, emails are not actually sent but are displayed in the log below.", icon="📧")
-
-# --- UI for Triggering Email Generation ---
-col1, col2 = st.columns(2)
-with col1:
-    start_date = st.date_input("Start of Week", value=date.today())
-with col2:
-    end_date = st.date_input("End of Week", value=date.today() + timedelta(days=7))
-
-if st.button("Generate and Log Weekly Emails"):
-    with st.spinner("Finding sessions, generating content, and logging emails..."):
-        try:
-            num_generated = db.execute_change(ops.generate_and_log_weekly_emails, params={
-                "start_date": start_date,
-                "end_date": end_date
-            })
+# One connection and one transaction for the whole rerun.
+with db.unit_of_work(label="Emails"):
+    st.header("Generate Weekly Schedule Emails")
+    st.info("This tool finds all players scheduled for sessions in the selected date range, generates the reminder emails, and logs them to the database. Logged emails are then sent with 'Send Pending Emails' below, through the SMTP server set in email_delivery.delivery_config.", icon="📧")
+
+    # --- UI for Triggering Email Generation ---
+    col1, col2 = st.columns(2)
+    with col1:
+        start_date = st.date_input("Start of Week", value=date.today())
+    with col2:
+        end_date = st.date_input("End of Week", value=date.today() + timedelta(days=7))
+
+    if st.button("Generate and Log Weekly Emails"):
+        with st.spinner("Finding sessions, generating content, and logging emails..."):
+            progress = st.empty()
+            try:
+                # Streaming mode keeps memory flat and commits in batches, so long ranges don't lock the email log.
+                num_generated = db.execute_change(ops.generate_and_log_weekly_emails, params={
+                    "start_date": start_date,
+                    "end_date": end_date,
+                    "stream": True,
+                    "batch_size": 500,
+                    "progress_callback": lambda n: progress.caption(f"Logged {n} emails so far...")
+                })
             
-            if num_generated > 0:
-                st.success(f"Successfully generated and logged {num_generated} emails!")
-                st.balloons()
-            else:
-                st.warning("No scheduled sessions found in this period. No emails were generated.")
+                if num_generated > 0:
+                    st.success(f"Successfully generated and logged {num_generated} emails!")
+                    st.balloons()
+                else:
+                    st.warning("No scheduled sessions found in this period. No emails were generated.")
             
-            st.rerun()
-        except db.RuleViolation as e:
-            st.error(f"An error occurred: {e}")
+                st.rerun()
+            except db.RuleViolation as e:
+                st.error(f"An error occurred: {e}")
+
+    # --- UI for Sending Logged Emails ---
+    st.header("Send Pending Emails")
+    if st.button("Send Pending Emails"):
+        with st.spinner("Sending emails..."):
+            progress = st.empty()
+            try:
+                # Kept across the rerun, which reads the log with the new delivery statuses.
+                st.session_state.last_delivery = db.execute_change(email_delivery.send_pending_emails, params={
+                    "progress_callback": lambda t: progress.caption(f"Sent {t['Sent']}, {t['Pending']} to retry, {t['Failed']} failed so far...")
+                })
+                st.rerun()
+            except db.RuleViolation as e:
+                st.error(f"An error occurred: {e}")
+
+    totals = st.session_state.pop("last_delivery", None)
+    if totals is not None:
+        if totals['Sent'] + totals['Pending'] + totals['Failed'] == 0:
+            st.info("There are no pending emails to send.")
+        elif totals['Pending'] or totals['Failed']:
+            st.warning(f"Sent {totals['Sent']} emails. {totals['Pending']} will be retried on the next run and {totals['Failed']} failed; see last_error in the log.")
+        else:
+            st.success(f"Sent {totals['Sent']} emails.")
 
-st.divider()
+    st.divider()
 
-# --- UI for Viewing the Email Log ---
-st.header("Email Log")
-st.write("This table shows a log of all emails that have been generated by the system.")
+    # --- UI for Viewing the Email Log ---
+    st.header("Email Log")
+    st.write("This table shows a log of all emails that have been generated by the system.")
 
-email_log = db.execute_query(ops.search, params={"table_name": "emails"})
+    # Newest first; only the visible page is fetched since the log grows without bound.
+    email_log = paged_query("email_log", ops.search, params={"table_name": "emails", "descending": True}, page_size=100, as_arrow=True)
 
-if not email_log:
-    st.info("The email log is empty.")
-else:
-    df = pd.DataFrame(email_log)
-    df = df[['send_at', 'sender_name', 'receiver_email', 'email_subject', 'body', 'session_id', 'email_id']]
-    st.dataframe(df, use_container_width=True, hide_index=True)
\ No newline at end of file
+    if email_log.num_rows == 0:
+        st.info("The email log is empty.")
+    else:
+        email_log = email_log.select(['send_at', 'delivery_status', 'sent_at', 'attempts', 'sender_name', 'receiver_email', 'email_subject', 'body', 'last_error', 'session_id', 'email_id'])
+        st.dataframe(email_log, use_container_width=True, hide_index=True)
\ No newline at end of file
@@ -0,0 +1,33 @@
+import streamlit as st
+import db
+
+def paged_query(key, query_func, params=None, page_size=50, as_arrow=False):
+    """
+    Fetches one page of a keyset-paginated ops function and draws Previous/Next controls.
+    The cursors of the pages visited so far are kept in st.session_state under `key`.
+
+    Returns:
+        The rows of the current page: a list, a DataFrame for result_format='frame',
+        or a pyarrow.Table with as_arrow=True.
+    """
+    cursors = st.session_state.setdefault(f"{key}_cursors", [None])
+    rows, next_cursor = db.execute_query(query_func, params=dict(params or {}, page_size=page_size, cursor=cursors[-1]), as_arrow=as_arrow)
+
+    # The last row of a later page may have been deleted; step back instead of showing nothing.
+    if len(rows) == 0 and len(cursors) > 1:
+        cursors.pop()
+        st.rerun()
+
+    col_prev, col_page, col_next = st.columns([1, 4, 1])
+    with col_prev:
+        if st.button("⬅️ Previous", key=f"{key}_prev", disabled=len(cursors) == 1):
+            cursors.pop()
+            st.rerun()
+    with col_page:
+        st.caption(f"Page {len(cursors)} · {len(rows)} rows")
+    with col_next:
+        if st.button("Next ➡️", key=f"{key}_next", disabled=next_cursor is None):
+            cursors.append(next_cursor)
+            st.rerun()
+
+    return rows
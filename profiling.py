@@ -0,0 +1,315 @@
+"""
+Timing, row and byte counts for every db.execute_query / db.execute_change call and
+every page rerun (unit of work).
+
+- Each call records connect, execute and fetch time, rows returned and an estimate of
+  the bytes transferred, and is logged as one JSON line on the 'mvc_db.performance' logger.
+  The logger is set to INFO and writes to stderr (the terminal running `streamlit run`)
+  unless profiling_config['log_to_stderr'] is False; with 'log_path' the lines are also
+  appended to that file. Slow queries are logged at WARNING.
+- Statements slower than profiling_config['slow_query_ms'] are logged with their EXPLAIN plan.
+- pages/10_Performance.py shows p50/p95/p99 per function and per page.
+
+Cursors handed out by the pool are wrapped in ProfiledCursor, which attributes its time
+to the call running on the current thread. With buffered cursors (the default inside a
+unit of work) rows are transferred during execute, so most of the time shows up there.
+"""
+import json
+import logging
+import math
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+
+profiling_config = {
+    'enabled': True,
+    'slow_query_ms': 200,   # Statements slower than this are logged with their EXPLAIN plan
+    'max_samples': 5000,    # Most recent call and rerun samples kept in memory
+    'max_slow_queries': 100,
+    'log_to_stderr': True,  # Write the JSON log lines to stderr
+    'log_path': None        # If set, the JSON log lines are also appended to this file
+}
+
+logger = logging.getLogger('mvc_db.performance')
+logger.setLevel(logging.INFO)
+logger.propagate = False  # The lines are written by the handlers below, not again by the root logger
+
+# =================================================================
+# SAMPLES
+# =================================================================
+
+class Profiler:
+    """Keeps the most recent call, rerun and slow-query samples for the Performance page."""
+
+    def __init__(self, max_samples=5000, max_slow_queries=100):
+        self.calls = deque(maxlen=max_samples)
+        self.reruns = deque(maxlen=max_samples)
+        self.slow_queries = deque(maxlen=max_slow_queries)
+        self._lock = threading.Lock()
+
+    def add(self, kind, sample):
+        with self._lock:
+            getattr(self, kind).append(sample)
+
+    def snapshot(self, kind):
+        with self._lock:
+            return list(getattr(self, kind))
+
+    def reset(self):
+        with self._lock:
+            self.calls.clear()
+            self.reruns.clear()
+            self.slow_queries.clear()
+
+profiler = Profiler(profiling_config['max_samples'], profiling_config['max_slow_queries'])
+
+_local = threading.local()
+_stream_handler = logging.StreamHandler()  # stderr
+_file_handler = None
+
+def _log(event, sample, level=logging.INFO):
+    global _file_handler
+    if profiling_config['log_to_stderr'] and _stream_handler not in logger.handlers:
+        logger.addHandler(_stream_handler)
+    elif not profiling_config['log_to_stderr'] and _stream_handler in logger.handlers:
+        logger.removeHandler(_stream_handler)
+    path = profiling_config['log_path']
+    if path and (_file_handler is None or _file_handler.baseFilename != os.path.abspath(path)):
+        if _file_handler is not None:
+            logger.removeHandler(_file_handler)
+        _file_handler = logging.FileHandler(os.path.abspath(path), encoding='utf-8')
+        logger.addHandler(_file_handler)
+    logger.log(level, json.dumps(dict(sample, event=event), default=str))
+
+def _new_sample(**fields):
+    sample = {'connect_ms': 0.0, 'execute_ms': 0.0, 'fetch_ms': 0.0, 'statements': 0, 'rows': 0, 'bytes': 0}
+    sample.update(fields)
+    return sample
+
+def _active_samples():
+    """The samples the current thread's database work counts towards: the call and the rerun."""
+    return [s for s in (getattr(_local, 'call', None), getattr(_local, 'rerun', None)) if s is not None]
+
+def _add(field, amount):
+    for sample in _active_samples():
+        sample[field] += amount
+
+# =================================================================
+# TRACKING
+# =================================================================
+
+@contextmanager
+def track_call(function_name, kind):
+    """Measures one db.execute_query / db.execute_change call. Nested calls count towards the outer one."""
+    if not profiling_config['enabled'] or getattr(_local, 'call', None) is not None:
+        yield None
+        return
+    rerun = getattr(_local, 'rerun', None)
+    sample = _new_sample(
+        function=function_name, kind=kind, label=rerun['label'] if rerun else None,
+        cache_hit=False, error=None, started_at=time.time()
+    )
+    _local.call = sample
+    started = time.perf_counter()
+    try:
+        yield sample
+    except BaseException as e:
+        sample['error'] = type(e).__name__
+        raise
+    finally:
+        _local.call = None
+        sample['total_ms'] = (time.perf_counter() - started) * 1000
+        if rerun is not None:
+            rerun['calls'] += 1
+        profiler.add('calls', sample)
+        _log('db_call', sample)
+
+@contextmanager
+def track_rerun(label):
+    """Measures one page rerun, i.e. one unit of work, and everything done inside it."""
+    if not profiling_config['enabled'] or getattr(_local, 'rerun', None) is not None:
+        yield None
+        return
+    sample = _new_sample(label=label or 'unlabelled', calls=0, started_at=time.time())
+    _local.rerun = sample
+    started = time.perf_counter()
+    try:
+        yield sample
+    finally:
+        _local.rerun = None
+        sample['total_ms'] = (time.perf_counter() - started) * 1000
+        profiler.add('reruns', sample)
+        _log('page_rerun', sample)
+
+def record_connect(seconds):
+    """Adds time spent checking a connection out of the pool."""
+    _add('connect_ms', seconds * 1000)
+
+def mark_cache_hit():
+    call = getattr(_local, 'call', None)
+    if call is not None:
+        call['cache_hit'] = True
+
+def _row_bytes(row):
+    """A cheap estimate of a row's size on the wire: string lengths, 8 bytes for anything else."""
+    values = row.values() if isinstance(row, dict) else row
+    total = 0
+    for value in values:
+        if value is None:
+            continue
+        total += len(value) if isinstance(value, (str, bytes, bytearray)) else 8
+    return total
+
+def _record_rows(rows):
+    if rows:
+        _add('rows', len(rows))
+        _add('bytes', sum(_row_bytes(row) for row in rows))
+
+# =================================================================
+# CURSOR WRAPPER
+# =================================================================
+
+class ProfiledCursor:
+    """Times execute/fetch calls on a cursor and counts the rows and bytes returned."""
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __iter__(self):
+        return iter(self.fetchall())
+
+    def _timed_execute(self, method, operation, args, kwargs):
+        started = time.perf_counter()
+        try:
+            return method(operation, *args, **kwargs)
+        finally:
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            _add('execute_ms', elapsed_ms)
+            _add('statements', 1)
+            if elapsed_ms >= profiling_config['slow_query_ms'] and _active_samples():
+                params = args[0] if args else kwargs.get('params')
+                _record_slow_query(operation, params, elapsed_ms)
+
+    def execute(self, operation, *args, **kwargs):
+        return self._timed_execute(self._cursor.execute, operation, args, kwargs)
+
+    def executemany(self, operation, *args, **kwargs):
+        return self._timed_execute(self._cursor.executemany, operation, args, kwargs)
+
+    def callproc(self, procname, *args, **kwargs):
+        return self._timed_execute(self._cursor.callproc, procname, args, kwargs)
+
+    def _timed_fetch(self, method, *args):
+        started = time.perf_counter()
+        result = method(*args)
+        _add('fetch_ms', (time.perf_counter() - started) * 1000)
+        return result
+
+    def fetchone(self):
+        row = self._timed_fetch(self._cursor.fetchone)
+        if row is not None:
+            _record_rows([row])
+        return row
+
+    def fetchmany(self, *args, **kwargs):
+        rows = self._timed_fetch(lambda: self._cursor.fetchmany(*args, **kwargs))
+        _record_rows(rows)
+        return rows
+
+    def fetchall(self):
+        rows = self._timed_fetch(self._cursor.fetchall)
+        _record_rows(rows)
+        return rows
+
+    def close(self):
+        return self._cursor.close()
+
+def wrap_cursor(cursor):
+    """Returns `cursor` wrapped for profiling, or unchanged when profiling is disabled."""
+    return ProfiledCursor(cursor) if profiling_config['enabled'] else cursor
+
+# =================================================================
+# SLOW QUERIES
+# =================================================================
+
+EXPLAINABLE = ('SELECT', 'WITH', 'UPDATE', 'DELETE', 'INSERT', 'REPLACE')
+
+def _explain(operation, params):
+    """Runs EXPLAIN for a statement on a separate pooled connection. Returns the plan rows, or None."""
+    if not isinstance(operation, str) or not operation.lstrip().upper().startswith(EXPLAINABLE):
+        return None
+    import db_connector
+    try:
+        with db_connector.get_pool().acquire() as conn:
+            cursor = conn._raw.cursor(dictionary=True)
+            try:
+                cursor.execute("EXPLAIN " + operation, params or ())
+                return cursor.fetchall()
+            finally:
+                cursor.close()
+    except Exception as e:
+        return [{'error': str(e)}]
+
+def _record_slow_query(operation, params, elapsed_ms):
+    call = getattr(_local, 'call', None)
+    rerun = getattr(_local, 'rerun', None)
+    sample = {
+        'function': call['function'] if call else None,
+        'label': rerun['label'] if rerun else None,
+        'sql': ' '.join(str(operation).split()),
+        'execute_ms': elapsed_ms,
+        'explain': _explain(operation, params),
+        'recorded_at': time.time(),
+    }
+    # Parameters are not logged: they can contain personal data such as SSNs.
+    profiler.add('slow_queries', sample)
+    _log('slow_query', sample, logging.WARNING)
+
+# =================================================================
+# SUMMARIES
+# =================================================================
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+def summarize(samples, group_by):
+    """
+    Groups samples by `group_by` and returns one dict per group with the call count,
+    p50/p95/p99 of total_ms and the mean connect/execute/fetch time, rows and bytes.
+    """
+    groups = defaultdict(list)
+    for sample in samples:
+        groups[sample.get(group_by)].append(sample)
+    summary = []
+    for key, group in groups.items():
+        totals = [s['total_ms'] for s in group]
+        count = len(group)
+        summary.append({
+            group_by: key,
+            'count': count,
+            'p50_ms': percentile(totals, 50),
+            'p95_ms': percentile(totals, 95),
+            'p99_ms': percentile(totals, 99),
+            'avg_connect_ms': sum(s['connect_ms'] for s in group) / count,
+            'avg_execute_ms': sum(s['execute_ms'] for s in group) / count,
+            'avg_fetch_ms': sum(s['fetch_ms'] for s in group) / count,
+            'avg_rows': sum(s['rows'] for s in group) / count,
+            'avg_bytes': sum(s['bytes'] for s in group) / count,
+        })
+    return sorted(summary, key=lambda row: row['p95_ms'], reverse=True)
+
+def function_summary():
+    return summarize(profiler.snapshot('calls'), 'function')
+
+def rerun_summary():
+    return summarize(profiler.snapshot('reruns'), 'label')
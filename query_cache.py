@@ -0,0 +1,192 @@
+import threading
+import time
+from collections import OrderedDict
+
+# =================================================================
+# CONFIGURATION
+# =================================================================
+
+cache_config = {
+    'ttl_seconds': 300,   # Entries are refetched after this long even if nothing changed
+    'max_entries': 256    # Least recently used entries are evicted beyond this
+}
+
+# Read functions whose results are cached, and the tables each one reads.
+# Only slow-changing reference data belongs here.
+CACHED_QUERIES = {
+    'get_all_locations_with_phones': ('locations', 'location_phone_numbers'),
+    'get_all_teams_with_details': ('teams', 'locations'),
+}
+
+# Tables for which ops.search(table_name=...) results are cached.
+CACHED_SEARCH_TABLES = {'hobbies', 'locations', 'location_phone_numbers', 'teams'}
+
+# Tables written by each change function. Changes not listed here clear the whole cache.
+# The generic update/delete functions are resolved from their table_name parameter.
+CHANGE_TABLES = {
+    'add_person': ('person',),
+    'add_club_member': ('club_member',),
+    'add_location': ('locations',),
+    'add_hobby': ('hobbies',),
+    'add_payment': ('payments', 'member_year_ledger', 'club_member'),
+    'add_team': ('teams',),
+    'add_session': ('sessions', 'location_occupancy'),
+    'add_sessions_bulk': ('sessions', 'session_teams', 'location_occupancy'),
+    'save_schedule': ('sessions', 'session_teams', 'location_occupancy'),
+    'add_formation': ('formations', 'player_schedule', 'location_occupancy'),
+    'add_formations_bulk': ('formations', 'player_schedule', 'location_occupancy'),
+    'add_formations_batch': ('formations', 'player_schedule', 'location_occupancy'),
+    'reschedule_session': ('sessions', 'player_schedule', 'location_occupancy'),
+    'add_email': ('emails',),
+    'link_family_to_member': ('club_member_family_link',),
+    'assign_person_to_location': ('location_assignment', 'current_location_assignment'),
+    'add_hobby_to_member': ('club_member_hobbies',),
+    'add_team_to_session': ('session_teams',),
+    'add_location_phone_number': ('location_phone_numbers',),
+    'register_new_club_member': ('person', 'club_member'),
+    'update_member_profile': ('person', 'club_member'),
+    'create_and_link_family_member': ('person', 'club_member_family_link'),
+    'detach_team_from_session': ('formations', 'session_teams', 'player_schedule', 'location_occupancy'),
+    'generate_and_log_weekly_emails': ('emails',),
+    'record_email_deliveries': ('emails',),
+    'send_pending_emails': ('emails',),
+    'bulk_import_members': ('person', 'club_member'),
+    'recalculate_all_member_statuses': ('member_year_ledger', 'club_member'),
+}
+
+# Deleting from these tables also removes rows from others through ON DELETE CASCADE.
+CASCADE_TABLES = {
+    'locations': ('location_phone_numbers', 'location_occupancy'),
+    'teams': ('session_teams', 'formations', 'player_schedule'),
+    'hobbies': ('club_member_hobbies',),
+    'sessions': ('session_teams', 'formations', 'player_schedule'),
+    'formations': ('player_schedule',),
+    'person': ('club_member', 'club_member_family_link', 'location_assignment', 'current_location_assignment', 'club_member_hobbies', 'formations', 'player_schedule', 'member_year_ledger'),
+    'club_member': ('club_member_family_link', 'club_member_hobbies', 'formations', 'player_schedule', 'member_year_ledger'),
+}
+
+# Summary tables kept current by triggers when these tables are updated or deleted from.
+TRIGGER_TABLES = {
+    'payments': ('member_year_ledger', 'club_member'),
+    'person': ('member_year_ledger', 'location_occupancy'),
+    'club_member': ('location_occupancy',),
+    'teams': ('location_occupancy',),
+    'location_assignment': ('current_location_assignment',),
+    'sessions': ('player_schedule', 'location_occupancy'),
+    'formations': ('player_schedule', 'location_occupancy'),
+}
+
+# =================================================================
+# CACHE
+# =================================================================
+
+class QueryCache:
+    """
+    An LRU cache with a time-to-live for query results. Each entry is tagged with the
+    tables it was read from, so a write to a table drops every entry that depends on it.
+    """
+
+    def __init__(self, ttl_seconds=300, max_entries=256):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.generation = 0  # Bumped on every invalidation
+        self._table_generation = {}
+        self._clear_generation = -1
+        self._entries = OrderedDict()  # key -> (expires_at, tables, value)
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Returns (True, value) on a hit and (False, None) on a miss or an expired entry."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return True, entry[2]
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return False, None
+
+    def put(self, key, tables, value, since_generation):
+        """
+        Stores a value read from `tables`. The value is dropped if any of those tables
+        was invalidated after `since_generation`, since it may have been read before that write.
+        """
+        with self._lock:
+            if self._clear_generation > since_generation:
+                return
+            if any(self._table_generation.get(t, -1) > since_generation for t in tables):
+                return
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, frozenset(tables), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, tables=None):
+        """Drops every entry that read from any of `tables`, or everything if tables is None."""
+        with self._lock:
+            self.generation += 1
+            if tables is None:
+                self._entries.clear()
+                self._clear_generation = self.generation
+                return
+            tables = set(tables)
+            for table in tables:
+                self._table_generation[table] = self.generation
+            stale = [key for key, entry in self._entries.items() if entry[1] & tables]
+            for key in stale:
+                del self._entries[key]
+
+    def stats(self):
+        """Returns the hit/miss counters and current size."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'entries': len(self._entries)
+            }
+
+cache = QueryCache(**cache_config)
+
+# =================================================================
+# TABLE LOOKUPS
+# =================================================================
+
+def tables_read(query_func, params):
+    """Returns the tables a cacheable query reads, or None if the query is not cached."""
+    name = query_func.__name__
+    if name == 'search':
+        params = params or {}
+        # Only dict rows are cached: models are mutable and frames cannot be copied cheaply per hit.
+        if params.get('result_format', 'dict') != 'dict':
+            return None
+        table_name = params.get('table_name')
+        return (table_name,) if table_name in CACHED_SEARCH_TABLES else None
+    return CACHED_QUERIES.get(name)
+
+def tables_written(operation_func, params):
+    """Returns the tables a change function writes, or None if they are not known."""
+    name = operation_func.__name__
+    params = params or {}
+    if name in ('update', 'delete') and params.get('table_name'):
+        table_name = params['table_name']
+        cascaded = CASCADE_TABLES.get(table_name, ()) if name == 'delete' else ()
+        return (table_name,) + cascaded + TRIGGER_TABLES.get(table_name, ())
+    return CHANGE_TABLES.get(name)
+
+def make_key(query_func, params):
+    """Builds a cache key from the function and its parameters, or None if they are not hashable."""
+    key = (query_func.__name__, tuple(sorted((params or {}).items())))
+    try:
+        hash(key)
+    except TypeError:
+        return None
+    return key
@@ -0,0 +1,219 @@
+"""
+Maps query results from plain (tuple) cursors onto the models.py dataclasses, or
+straight into a column-oriented DataFrame or pyarrow.Table.
+
+A dictionary cursor builds a new dict with string keys for every row. Here the column
+positions are resolved once per result shape, each row becomes one slotted dataclass
+instance, and ENUM columns are decoded through a lookup table built once per enum.
+"""
+import dataclasses
+import typing
+from datetime import date, datetime
+from decimal import Decimal
+from enum import Enum
+from functools import lru_cache
+import models
+
+# The model each table's rows map onto (see ops.search(result_format='model')).
+TABLE_MODELS = {
+    'person': models.Person,
+    'club_member': models.ClubMember,
+    'club_member_family_link': models.ClubMemberFamilyLink,
+    'locations': models.Location,
+    'location_phone_numbers': models.LocationPhoneNumber,
+    'location_assignment': models.LocationAssignment,
+    'hobbies': models.Hobby,
+    'club_member_hobbies': models.ClubMemberHobby,
+    'payments': models.Payment,
+    'teams': models.Team,
+    'sessions': models.Session,
+    'session_teams': models.SessionTeam,
+    'formations': models.Formation,
+    'emails': models.Email,
+}
+
+# =================================================================
+# ENUM DECODING
+# =================================================================
+
+@lru_cache(maxsize=None)
+def enum_decoder(enum_cls):
+    """
+    Returns a function mapping a database ENUM string (or None) to a member of `enum_cls`.
+    The lookup table is built once per enum; unknown values raise ValueError.
+    """
+    lookup = {member.value: member for member in enum_cls}
+    lookup[None] = None
+
+    def decode(value):
+        try:
+            return lookup[value]
+        except KeyError:
+            return enum_cls(value)
+    return decode
+
+def _enum_type(annotation):
+    """Returns the Enum class in an annotation such as `Gender` or `Gender | None`, else None."""
+    for candidate in typing.get_args(annotation) or (annotation,):
+        if isinstance(candidate, type) and issubclass(candidate, Enum):
+            return candidate
+    return None
+
+@lru_cache(maxsize=None)
+def model_enum_fields(model_cls):
+    """Returns {field_name: Enum class} for the enum-typed fields of a model."""
+    hints = typing.get_type_hints(model_cls)
+    enum_fields = {}
+    for f in dataclasses.fields(model_cls):
+        enum_cls = _enum_type(hints[f.name])
+        if enum_cls is not None:
+            enum_fields[f.name] = enum_cls
+    return enum_fields
+
+# =================================================================
+# ROWS TO MODELS
+# =================================================================
+
+@lru_cache(maxsize=256)
+def _row_plan(model_cls, column_names):
+    """
+    Resolves, once per (model, result columns), which column feeds each constructor
+    argument and which enum decoder applies to it.
+
+    Returns:
+        (direct, plan): direct is True when the columns are exactly the model's fields in
+        order with no enums, so rows can be passed straight to the constructor.
+    """
+    enum_fields = model_enum_fields(model_cls)
+    init_fields = [f for f in dataclasses.fields(model_cls) if f.init]
+    plan = []
+    for f in init_fields:
+        if f.name in column_names:
+            decoder = enum_decoder(enum_fields[f.name]) if f.name in enum_fields else None
+            plan.append((column_names.index(f.name), decoder))
+        elif f.default is dataclasses.MISSING and f.default_factory is dataclasses.MISSING:
+            raise ValueError(f"Column '{f.name}' is required to build {model_cls.__name__}.")
+        else:
+            break  # Trailing fields with defaults (e.g. ClubMember.person_details) are left unset
+    direct = not enum_fields and tuple(f.name for f in init_fields[:len(plan)]) == column_names
+    return direct, tuple(plan)
+
+def map_rows(model_cls, column_names, rows):
+    """
+    Builds one `model_cls` instance per row.
+
+    Args:
+        model_cls: A models.py dataclass.
+        column_names: The cursor's column_names, in row order.
+        rows: Tuples from a non-dictionary cursor.
+    """
+    direct, plan = _row_plan(model_cls, tuple(column_names))
+    if direct:
+        return [model_cls(*row) for row in rows]
+    return [
+        model_cls(*[row[i] if decode is None else decode(row[i]) for i, decode in plan])
+        for row in rows
+    ]
+
+def map_table_rows(table_name, column_names, rows):
+    """map_rows() for a `SELECT *` from one of the tables in TABLE_MODELS."""
+    return map_rows(TABLE_MODELS[table_name], column_names, rows)
+
+# =================================================================
+# ROWS TO COLUMNS
+# =================================================================
+
+def rows_to_frame(column_names, rows, enum_columns=None):
+    """
+    Builds a pandas DataFrame column by column from tuple rows, without per-row dicts.
+
+    Args:
+        enum_columns: {column_name: Enum class}. These become categoricals whose categories
+            are the enum's values, so each cell is stored as a small integer code.
+    """
+    import pandas as pd
+
+    enum_columns = enum_columns or {}
+    columns = list(zip(*rows)) if rows else [()] * len(column_names)
+    data = {}
+    for name, values in zip(column_names, columns):
+        if name in enum_columns:
+            data[name] = pd.Categorical(values, categories=[m.value for m in enum_columns[name]])
+        else:
+            data[name] = list(values)
+    return pd.DataFrame(data, columns=list(column_names))
+
+def table_rows_to_frame(table_name, column_names, rows):
+    """rows_to_frame() for a `SELECT *` from a table, with its model's enum columns as categoricals."""
+    model_cls = TABLE_MODELS.get(table_name)
+    enum_columns = model_enum_fields(model_cls) if model_cls else None
+    return rows_to_frame(column_names, rows, enum_columns)
+
+# =================================================================
+# ROWS TO ARROW
+# =================================================================
+
+# Every DECIMAL column in the schema (height, weight, amount, ...) has two decimal places.
+ARROW_DECIMAL_PRECISION = 12
+ARROW_DECIMAL_SCALE = 2
+
+@lru_cache(maxsize=None)
+def _enum_indices(enum_cls):
+    """Maps each enum value to its position in the enum, which is its dictionary code in Arrow."""
+    return {member.value: i for i, member in enumerate(enum_cls)}
+
+def _arrow_type(annotation):
+    """The Arrow type for a model field annotation, or None to let pyarrow infer it."""
+    import pyarrow as pa
+
+    enum_cls = _enum_type(annotation)
+    if enum_cls is not None:
+        return pa.dictionary(pa.int8(), pa.string())
+    candidates = [a for a in typing.get_args(annotation) or (annotation,) if a is not type(None)]
+    base = candidates[0] if len(candidates) == 1 else None
+    if base is int: return pa.int64()
+    if base is str: return pa.string()
+    if base is Decimal: return pa.decimal128(ARROW_DECIMAL_PRECISION, ARROW_DECIMAL_SCALE)
+    if base is datetime: return pa.timestamp('us')
+    if base is date: return pa.date32()
+    return None
+
+@lru_cache(maxsize=256)
+def arrow_column_plan(table_name, column_names):
+    """
+    Returns ((column_name, arrow_type or None, Enum class or None), ...) for a `SELECT *`
+    from `table_name`, using the table's model to type each column.
+    """
+    model_cls = TABLE_MODELS.get(table_name)
+    hints = typing.get_type_hints(model_cls) if model_cls else {}
+    plan = []
+    for name in column_names:
+        annotation = hints.get(name)
+        plan.append((name, _arrow_type(annotation) if annotation else None, _enum_type(annotation) if annotation else None))
+    return tuple(plan)
+
+def rows_to_record_batch(plan, rows):
+    """
+    Builds one pyarrow.RecordBatch from tuple rows, column by column.
+    Enum columns become dictionary-encoded arrays over the enum's values.
+    """
+    import pyarrow as pa
+
+    columns = list(zip(*rows)) if rows else [()] * len(plan)
+    arrays = []
+    for (name, arrow_type, enum_cls), values in zip(plan, columns):
+        if enum_cls is not None:
+            indices = _enum_indices(enum_cls)
+            codes = pa.array([None if v is None else indices[v] for v in values], type=pa.int8())
+            arrays.append(pa.DictionaryArray.from_arrays(codes, pa.array([m.value for m in enum_cls])))
+        else:
+            arrays.append(pa.array(values, type=arrow_type))
+    return pa.RecordBatch.from_arrays(arrays, names=[name for name, _, _ in plan])
+
+def record_batches_to_table(plan, batches):
+    """Combines the batches into one pyarrow.Table; an empty result still has its typed columns."""
+    import pyarrow as pa
+
+    if not batches:
+        batches = [rows_to_record_batch(plan, [])]
+    return pa.Table.from_batches(batches)
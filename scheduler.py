@@ -0,0 +1,225 @@
+"""
+Generates a conflict-free schedule of games and trainings for every team over a date range.
+
+Each week, teams of the same gender meet in round-robin order (circle method) and every
+team gets its trainings. Sessions are placed greedily, most constrained first (games,
+which need two free teams, before trainings), into the first slot that passes every
+rule; a slot is pruned as soon as one rule fails:
+- the location is not already used in any hour bucket of the session (location_occupancy);
+- the location's max_capacity can hold the players the session will roster;
+- no team of the session has another session that day (so no rostered player can hit
+  the 3-hour conflict rule through their team).
+A game is tried at the home location of either team. Sessions with no slot left are
+returned as unscheduled rather than breaking a rule.
+
+The plan is built in memory from one read of teams, locations and the booked buckets and
+team days in the range, then saved by ops.add_sessions_bulk in one transaction.
+
+    python scheduler.py 2025-09-01 2025-12-21          # print the plan
+    python scheduler.py 2025-09-01 2025-12-21 --save   # and insert it
+"""
+import argparse
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from mysql.connector import Error
+from db_connector import get_db_connection
+import db_operations as ops
+
+# Weekdays (date.weekday(): Monday is 0) and start hours sessions are placed on.
+GAME_DAYS = (5, 6)
+TRAINING_DAYS = (0, 1, 2, 3)
+START_HOURS = (17, 18, 19, 20)
+
+# Players each team is expected to roster, for the capacity check.
+PLAYERS_PER_TEAM = 6
+
+@dataclass(slots=True)
+class PlannedSession:
+    session_type: str
+    date_time: datetime
+    location_id: int
+    team_ids: tuple
+
+    def as_params(self):
+        """The dictionary ops.add_sessions_bulk expects."""
+        return {'session_type': self.session_type, 'date_time': self.date_time,
+                'location_id': self.location_id, 'team_ids': list(self.team_ids)}
+
+@dataclass(slots=True)
+class Schedule:
+    sessions: list = field(default_factory=list)
+    unscheduled: list = field(default_factory=list)  # (session_type, team_ids, week_start, reason)
+
+# =================================================================
+# LOADING
+# =================================================================
+
+def load_scheduling_data(start_date, end_date):
+    """
+    Reads what the planner needs in four queries.
+
+    Returns:
+        (teams, capacities, booked, team_days):
+        teams: [(team_id, home_location_id, team_gender)], ordered by team_id;
+        capacities: {location_id: max_capacity or None};
+        booked: {(location_id, hour bucket)} already used by a session in the range;
+        team_days: {(team_id, date)} on which the team already has a session.
+    """
+    conn = get_db_connection()
+    if not conn:
+        raise Error("Could not connect to the database.")
+
+    range_start = datetime(start_date.year, start_date.month, start_date.day)
+    range_end = datetime(end_date.year, end_date.month, end_date.day) + timedelta(days=1)
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT team_id, home_location_id, team_gender FROM teams ORDER BY team_id")
+        teams = cursor.fetchall()
+
+        cursor.execute("SELECT location_id, max_capacity FROM locations")
+        capacities = dict(cursor.fetchall())
+
+        # Sessions starting just before the range can still occupy its first buckets.
+        cursor.execute("""
+            SELECT location_id, bucket_start FROM location_occupancy
+            WHERE bucket_start >= %s AND bucket_start < %s AND session_count > 0
+        """, (range_start - timedelta(hours=3), range_end))
+        booked = set(cursor.fetchall())
+
+        cursor.execute("""
+            SELECT st.team_id, DATE(s.date_time)
+            FROM sessions s
+            JOIN session_teams st ON st.session_id = s.session_id
+            WHERE s.date_time >= %s AND s.date_time < %s
+        """, (range_start, range_end))
+        team_days = set(cursor.fetchall())
+        return teams, capacities, booked, team_days
+    finally:
+        cursor.close()
+        conn.close()
+
+# =================================================================
+# PLANNING
+# =================================================================
+
+def round_robin_rounds(team_ids):
+    """
+    Circle-method rounds: every team meets every other team once over len(team_ids) - 1
+    rounds (one more with an odd count, where each team sits out once).
+    """
+    teams = list(team_ids)
+    if len(teams) % 2:
+        teams.append(None)
+    rounds = []
+    for _ in range(len(teams) - 1):
+        half = len(teams) // 2
+        pairs = [(teams[i], teams[-1 - i]) for i in range(half)]
+        rounds.append([pair for pair in pairs if None not in pair])
+        teams = [teams[0], teams[-1]] + teams[1:-1]
+    return rounds
+
+class _Planner:
+    """The greedy placement state: booked hour buckets and busy team days."""
+
+    def __init__(self, capacities, booked, team_days, start_hours):
+        self.capacities = capacities
+        self.booked = set(booked)
+        self.team_days = set(team_days)
+        self.start_hours = start_hours
+
+    def place(self, session_type, team_ids, locations, days, players):
+        """Books the first free slot on `days` at one of `locations`. Returns the session or None."""
+        locations = [l for l in locations if self.capacities.get(l) is None or self.capacities[l] >= players]
+        if not locations:
+            return None
+        for day in days:
+            if any((team_id, day) in self.team_days for team_id in team_ids):
+                continue
+            for hour in self.start_hours:
+                start = datetime(day.year, day.month, day.day, hour)
+                buckets = ops._occupancy_buckets(start)
+                for location_id in locations:
+                    if any((location_id, bucket) in self.booked for bucket in buckets):
+                        continue
+                    self.booked.update((location_id, bucket) for bucket in buckets)
+                    self.team_days.update((team_id, day) for team_id in team_ids)
+                    return PlannedSession(session_type, start, location_id, tuple(team_ids))
+        return None
+
+def plan_schedule(teams, capacities, start_date, end_date, booked=(), team_days=(),
+                  trainings_per_week=1, game_days=GAME_DAYS, training_days=TRAINING_DAYS,
+                  start_hours=START_HOURS, players_per_team=PLAYERS_PER_TEAM):
+    """
+    Plans one round of games per gender and `trainings_per_week` trainings per team for
+    every week (Monday to Sunday) that starts in [start_date, end_date].
+
+    Args:
+        teams, capacities, booked, team_days: as returned by load_scheduling_data().
+
+    Returns:
+        A Schedule.
+    """
+    planner = _Planner(capacities, booked, team_days, start_hours)
+    schedule = Schedule()
+    home = {team_id: location_id for team_id, location_id, _ in teams}
+    rounds_by_gender = {}
+    for gender in ('Male', 'Female'):
+        rounds_by_gender[gender] = round_robin_rounds([t[0] for t in teams if t[2] == gender])
+
+    week_start = start_date - timedelta(days=start_date.weekday())
+    week_number = 0
+    while week_start <= end_date:
+        week = [week_start + timedelta(days=i) for i in range(7)]
+        week = [d for d in week if start_date <= d <= end_date]
+        games_days = [d for d in week if d.weekday() in game_days]
+        trainings_days = [d for d in week if d.weekday() in training_days]
+
+        for gender, rounds in rounds_by_gender.items():
+            if not rounds:
+                continue
+            for team_a, team_b in rounds[week_number % len(rounds)]:
+                # Alternate which team hosts first from week to week.
+                hosts = [home[team_a], home[team_b]] if week_number % 2 == 0 else [home[team_b], home[team_a]]
+                session = planner.place('Game', (team_a, team_b), hosts, games_days, 2 * players_per_team)
+                if session:
+                    schedule.sessions.append(session)
+                else:
+                    schedule.unscheduled.append(('Game', (team_a, team_b), week_start, "No free slot at either home location."))
+
+        for _ in range(trainings_per_week):
+            for team_id, location_id, _ in teams:
+                session = planner.place('Training', (team_id,), [location_id], trainings_days, players_per_team)
+                if session:
+                    schedule.sessions.append(session)
+                else:
+                    schedule.unscheduled.append(('Training', (team_id,), week_start, "No free slot at the home location."))
+
+        week_start += timedelta(days=7)
+        week_number += 1
+
+    schedule.sessions.sort(key=lambda s: (s.date_time, s.location_id))
+    return schedule
+
+def generate_schedule(start_date, end_date, **options):
+    """Loads the current bookings and plans a schedule over them. See plan_schedule() for the options."""
+    teams, capacities, booked, team_days = load_scheduling_data(start_date, end_date)
+    return plan_schedule(teams, capacities, start_date, end_date, booked, team_days, **options)
+
+def save_schedule(schedule):
+    """Inserts every planned session and its teams in one transaction. Returns the new session_ids."""
+    return ops.add_sessions_bulk([s.as_params() for s in schedule.sessions])
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Plan games and trainings for every team.")
+    parser.add_argument('start', type=date.fromisoformat)
+    parser.add_argument('end', type=date.fromisoformat)
+    parser.add_argument('--trainings-per-week', type=int, default=1)
+    parser.add_argument('--save', action='store_true', help="Insert the planned sessions.")
+    args = parser.parse_args()
+
+    plan = generate_schedule(args.start, args.end, trainings_per_week=args.trainings_per_week)
+    for s in plan.sessions:
+        print(f"{s.date_time:%Y-%m-%d %H:%M}  {s.session_type:<8} location {s.location_id:<4} teams {', '.join(map(str, s.team_ids))}")
+    print(f"{len(plan.sessions)} sessions planned, {len(plan.unscheduled)} could not be placed.")
+    if args.save:
+        print(f"Inserted {len(save_schedule(plan))} sessions.")
@@ -1,6 +1,9 @@
 -- =================================================================
 -- SQL CREATE SCRIPT FOR MONTREAL VOLLEYBALL CLUB (MVC)
 -- =================================================================
+-- This is the baseline schema. Run `python migrate.py` after it: the application
+-- relies on the indexes, derived tables and trigger definitions added by
+-- sql_statements/migrations, which are not repeated here.
 
 CREATE DATABASE IF NOT EXISTS mvc_db;
 USE mvc_db;
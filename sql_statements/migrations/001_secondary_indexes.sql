@@ -0,0 +1,33 @@
+-- =================================================================
+-- MIGRATION 001: SECONDARY INDEXES FOR THE HOT WHERE / JOIN COLUMNS
+-- =================================================================
+-- create_database.sql only defines primary keys, UNIQUE constraints and the
+-- indexes InnoDB builds implicitly for foreign keys. These composite indexes
+-- cover the filters, joins and sorts used by db_operations.py.
+-- Apply with: python migrate.py
+
+USE mvc_db;
+
+-- Dashboard "next 7 days" count, weekly email range scan, session master list (ORDER BY date_time DESC)
+CREATE INDEX idx_sessions_date_time ON sessions (date_time, location_id);
+
+-- Current assignment lookups: location_assignment ... ON person_id = ? AND end_date IS NULL
+CREATE INDEX idx_assignment_person_open ON location_assignment (person_id, end_date, location_id);
+
+-- Current coach of a location (weekly emails) and personnel listings
+CREATE INDEX idx_assignment_location_role ON location_assignment (location_id, personnel_role, end_date, person_id);
+
+-- A player's other sessions (time conflict trigger); the FK index only covers player_id
+CREATE INDEX idx_formations_player_session ON formations (player_id, session_id);
+
+-- Roster of one team in one session
+CREATE INDEX idx_formations_session_team ON formations (session_id, team_id, player_id);
+
+-- Per-member, per-year payment totals (fee history, 4-payment trigger, status recalculation)
+CREATE INDEX idx_payments_member_year ON payments (club_member_id, membership_year, amount);
+
+-- Member and people lists sorted by name
+CREATE INDEX idx_person_name ON person (last_name, first_name);
+
+-- Active member counts and eligible-player searches
+CREATE INDEX idx_club_member_status ON club_member (activity_status);
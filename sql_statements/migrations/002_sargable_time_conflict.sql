@@ -0,0 +1,51 @@
+-- =================================================================
+-- MIGRATION 002: SARGABLE TIME CONFLICT CHECK
+-- =================================================================
+-- The old trigger compared DATE(s.date_time) and ABS(TIMESTAMPDIFF(MINUTE, ...)) < 180,
+-- which hides the column inside functions so no index on sessions.date_time can be used.
+-- The same rule is expressed as two half-open ranges on the bare column:
+--   same day:      [DATE(t), DATE(t) + 1 day)
+--   within 3 hrs:  (t - 180 min, t + 180 min)
+-- TIMESTAMP has whole-second precision and TIMESTAMPDIFF truncates toward zero, so
+-- ABS(TIMESTAMPDIFF(MINUTE, a, b)) < 180 holds exactly when |a - b| < 180 minutes:
+-- the new predicate accepts and rejects the same rows as the old one.
+
+USE mvc_db;
+
+DROP TRIGGER IF EXISTS trg_check_session_time_conflict;
+
+DELIMITER $$
+
+CREATE TRIGGER trg_check_session_time_conflict
+BEFORE INSERT ON formations
+FOR EACH ROW
+BEGIN
+    DECLARE v_new_session_datetime TIMESTAMP;
+    DECLARE v_day_start DATETIME;
+    DECLARE v_conflict_count INT;
+
+    SELECT s.date_time INTO v_new_session_datetime
+    FROM sessions s
+    WHERE s.session_id = NEW.session_id;
+
+    SET v_day_start = DATE(v_new_session_datetime);
+
+    -- A conflict is another session of this player on the same day, less than 3 hours away.
+    -- Both conditions are written as ranges on the bare column so the date_time index can be used.
+    SELECT COUNT(*) INTO v_conflict_count
+    FROM formations f
+    JOIN sessions s ON f.session_id = s.session_id
+    WHERE
+        f.player_id = NEW.player_id
+        AND s.date_time >= v_day_start
+        AND s.date_time < v_day_start + INTERVAL 1 DAY
+        AND s.date_time > v_new_session_datetime - INTERVAL 180 MINUTE
+        AND s.date_time < v_new_session_datetime + INTERVAL 180 MINUTE;
+
+    IF v_conflict_count > 0 THEN
+        SIGNAL SQLSTATE '45000'
+        SET MESSAGE_TEXT = 'Error: Time conflict. This player is already assigned to another session within 3 hours of this one.';
+    END IF;
+END$$
+
+DELIMITER ;
@@ -0,0 +1,121 @@
+-- =================================================================
+-- MIGRATION 003: MATERIALIZED DASHBOARD METRICS
+-- =================================================================
+-- A single-row summary of the club-wide counters shown on Home.py, kept up to date
+-- by triggers so the dashboard reads one row by primary key instead of running
+-- three COUNT(*) scans per page load.
+--
+-- upcoming_sessions counts sessions in [window_start, window_start + 7 days]. The window
+-- is re-anchored by get_dashboard_metrics() once it is older than a few minutes, since
+-- sessions move in and out of "the next 7 days" as time passes without any write.
+
+USE mvc_db;
+
+CREATE TABLE club_metrics (
+    metric_id 			TINYINT PRIMARY KEY, -- Always 1
+    active_members 		INT NOT NULL,
+    total_locations 	INT NOT NULL,
+    upcoming_sessions 	INT NOT NULL,
+    window_start 		TIMESTAMP NOT NULL,
+    refreshed_at 		TIMESTAMP NOT NULL
+);
+
+INSERT INTO club_metrics (metric_id, active_members, total_locations, upcoming_sessions, window_start, refreshed_at)
+SELECT
+    1,
+    (SELECT COUNT(*) FROM club_member WHERE activity_status = 'Active'),
+    (SELECT COUNT(*) FROM locations),
+    (SELECT COUNT(*) FROM sessions WHERE date_time BETWEEN NOW() AND DATE_ADD(NOW(), INTERVAL 7 DAY)),
+    NOW(),
+    NOW();
+
+DELIMITER $$
+
+CREATE TRIGGER trg_metrics_club_member_insert
+AFTER INSERT ON club_member
+FOR EACH ROW
+BEGIN
+    IF NEW.activity_status = 'Active' THEN
+        UPDATE club_metrics SET active_members = active_members + 1 WHERE metric_id = 1;
+    END IF;
+END$$
+
+CREATE TRIGGER trg_metrics_club_member_update
+AFTER UPDATE ON club_member
+FOR EACH ROW
+BEGIN
+    IF NOT (NEW.activity_status <=> OLD.activity_status) THEN
+        UPDATE club_metrics
+        SET active_members = active_members + (NEW.activity_status = 'Active') - (OLD.activity_status = 'Active')
+        WHERE metric_id = 1;
+    END IF;
+END$$
+
+CREATE TRIGGER trg_metrics_club_member_delete
+AFTER DELETE ON club_member
+FOR EACH ROW
+BEGIN
+    IF OLD.activity_status = 'Active' THEN
+        UPDATE club_metrics SET active_members = active_members - 1 WHERE metric_id = 1;
+    END IF;
+END$$
+
+-- Rows removed by ON DELETE CASCADE do not fire triggers, so deleting a person
+-- has to account for their club_member row here.
+CREATE TRIGGER trg_metrics_person_delete
+BEFORE DELETE ON person
+FOR EACH ROW
+BEGIN
+    UPDATE club_metrics
+    SET active_members = active_members - (
+        SELECT COUNT(*) FROM club_member WHERE club_member_id = OLD.person_id AND activity_status = 'Active'
+    )
+    WHERE metric_id = 1;
+END$$
+
+CREATE TRIGGER trg_metrics_locations_insert
+AFTER INSERT ON locations
+FOR EACH ROW
+BEGIN
+    UPDATE club_metrics SET total_locations = total_locations + 1 WHERE metric_id = 1;
+END$$
+
+CREATE TRIGGER trg_metrics_locations_delete
+AFTER DELETE ON locations
+FOR EACH ROW
+BEGIN
+    UPDATE club_metrics SET total_locations = total_locations - 1 WHERE metric_id = 1;
+END$$
+
+CREATE TRIGGER trg_metrics_sessions_insert
+AFTER INSERT ON sessions
+FOR EACH ROW
+BEGIN
+    UPDATE club_metrics
+    SET upcoming_sessions = upcoming_sessions + 1
+    WHERE metric_id = 1 AND NEW.date_time BETWEEN window_start AND window_start + INTERVAL 7 DAY;
+END$$
+
+CREATE TRIGGER trg_metrics_sessions_update
+AFTER UPDATE ON sessions
+FOR EACH ROW
+BEGIN
+    IF NEW.date_time <> OLD.date_time THEN
+        UPDATE club_metrics
+        SET upcoming_sessions = upcoming_sessions
+            + (NEW.date_time BETWEEN window_start AND window_start + INTERVAL 7 DAY)
+            - (OLD.date_time BETWEEN window_start AND window_start + INTERVAL 7 DAY)
+        WHERE metric_id = 1;
+    END IF;
+END$$
+
+CREATE TRIGGER trg_metrics_sessions_delete
+AFTER DELETE ON sessions
+FOR EACH ROW
+BEGIN
+    UPDATE club_metrics
+    SET upcoming_sessions = upcoming_sessions - 1
+    WHERE metric_id = 1 AND OLD.date_time BETWEEN window_start AND window_start + INTERVAL 7 DAY;
+END$$
+
+DELIMITER ;
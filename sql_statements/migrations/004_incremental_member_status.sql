@@ -0,0 +1,101 @@
+-- =================================================================
+-- MIGRATION 004: INCREMENTAL MEMBER STATUS
+-- =================================================================
+-- sp_recalculate_member_status re-aggregates every payment and rewrites every
+-- club_member row. Instead, a running total per (member, year) is maintained by
+-- triggers on payments, and a member's activity_status is only touched when a
+-- payment for the current membership year moves their total across the fee
+-- threshold (200.00 for members 18 or older on January 1st, 100.00 otherwise).
+--
+-- sp_recalculate_member_status stays as the offline repair tool, together with
+-- sp_rebuild_member_payment_totals which recomputes the running totals from scratch.
+
+USE mvc_db;
+
+CREATE TABLE member_payment_totals (
+    club_member_id 		INT NOT NULL,
+    membership_year 	INT NOT NULL,
+    total_paid 			DECIMAL(10, 2) NOT NULL DEFAULT 0,
+    PRIMARY KEY 		(club_member_id, membership_year),
+    CONSTRAINT 			fk_payment_totals_member FOREIGN KEY (club_member_id) REFERENCES club_member(club_member_id) ON DELETE CASCADE
+);
+
+INSERT INTO member_payment_totals (club_member_id, membership_year, total_paid)
+SELECT club_member_id, membership_year, SUM(amount)
+FROM payments
+GROUP BY club_member_id, membership_year;
+
+DELIMITER $$
+
+CREATE PROCEDURE sp_apply_payment_delta(IN p_club_member_id INT, IN p_membership_year INT, IN p_delta DECIMAL(10, 2))
+BEGIN
+    DECLARE v_old_total DECIMAL(10, 2);
+    DECLARE v_new_total DECIMAL(10, 2);
+    DECLARE v_required_fee DECIMAL(10, 2);
+
+    SET v_old_total = COALESCE((
+        SELECT total_paid FROM member_payment_totals
+        WHERE club_member_id = p_club_member_id AND membership_year = p_membership_year
+        FOR UPDATE
+    ), 0);
+    SET v_new_total = v_old_total + p_delta;
+
+    INSERT INTO member_payment_totals (club_member_id, membership_year, total_paid)
+    VALUES (p_club_member_id, p_membership_year, p_delta)
+    ON DUPLICATE KEY UPDATE total_paid = total_paid + p_delta;
+
+    -- Only the current membership year decides whether a member is active.
+    IF p_membership_year = YEAR(CURDATE()) THEN
+        SELECT CASE
+                   WHEN TIMESTAMPDIFF(YEAR, dob, MAKEDATE(p_membership_year, 1)) >= 18 THEN 200.00
+                   ELSE 100.00
+               END
+        INTO v_required_fee
+        FROM person
+        WHERE person_id = p_club_member_id;
+
+        IF (v_old_total >= v_required_fee) <> (v_new_total >= v_required_fee) THEN
+            UPDATE club_member
+            SET activity_status = IF(v_new_total >= v_required_fee, 'Active', 'Inactive')
+            WHERE club_member_id = p_club_member_id;
+        END IF;
+    END IF;
+END$$
+
+CREATE PROCEDURE sp_rebuild_member_payment_totals()
+BEGIN
+    DELETE FROM member_payment_totals;
+
+    INSERT INTO member_payment_totals (club_member_id, membership_year, total_paid)
+    SELECT club_member_id, membership_year, SUM(amount)
+    FROM payments
+    GROUP BY club_member_id, membership_year;
+END$$
+
+CREATE TRIGGER trg_payment_totals_insert
+AFTER INSERT ON payments
+FOR EACH ROW
+BEGIN
+    CALL sp_apply_payment_delta(NEW.club_member_id, NEW.membership_year, NEW.amount);
+END$$
+
+CREATE TRIGGER trg_payment_totals_update
+AFTER UPDATE ON payments
+FOR EACH ROW
+BEGIN
+    IF NEW.club_member_id <> OLD.club_member_id
+       OR NEW.membership_year <> OLD.membership_year
+       OR NEW.amount <> OLD.amount THEN
+        CALL sp_apply_payment_delta(OLD.club_member_id, OLD.membership_year, -OLD.amount);
+        CALL sp_apply_payment_delta(NEW.club_member_id, NEW.membership_year, NEW.amount);
+    END IF;
+END$$
+
+CREATE TRIGGER trg_payment_totals_delete
+AFTER DELETE ON payments
+FOR EACH ROW
+BEGIN
+    CALL sp_apply_payment_delta(OLD.club_member_id, OLD.membership_year, -OLD.amount);
+END$$
+
+DELIMITER ;
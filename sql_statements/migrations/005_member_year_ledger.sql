@@ -0,0 +1,112 @@
+-- =================================================================
+-- MIGRATION 005: MEMBER YEAR LEDGER
+-- =================================================================
+-- Extends the running payment totals from migration 004 into a ledger with one row
+-- per (member, membership year): the member's age on January 1st of that year, the
+-- required fee, the total paid, and the donation (paid above the fee) and arrears
+-- (still owed) as stored generated columns.
+--
+-- get_payments_and_fees_for_member reads a member's rows by primary key and the
+-- club-wide donations/arrears report scans one year through idx_ledger_year, instead
+-- of re-aggregating payments and recomputing the age-based fee on every request.
+--
+-- The ledger is kept current by the payment triggers from migration 004 (through the
+-- redefined procedures below) and by a trigger on person for date-of-birth corrections.
+
+USE mvc_db;
+
+RENAME TABLE member_payment_totals TO member_year_ledger;
+
+ALTER TABLE member_year_ledger
+    ADD COLUMN age_in_year 	INT NOT NULL DEFAULT 0 AFTER membership_year,
+    ADD COLUMN required_fee DECIMAL(10, 2) NOT NULL DEFAULT 0 AFTER age_in_year,
+    ADD COLUMN donation 	DECIMAL(10, 2) AS (GREATEST(0, total_paid - required_fee)) STORED,
+    ADD COLUMN arrears 		DECIMAL(10, 2) AS (GREATEST(0, required_fee - total_paid)) STORED,
+    ADD INDEX idx_ledger_year (membership_year, club_member_id);
+
+UPDATE member_year_ledger l
+JOIN person pr ON l.club_member_id = pr.person_id
+SET l.age_in_year = TIMESTAMPDIFF(YEAR, pr.dob, MAKEDATE(l.membership_year, 1)),
+    l.required_fee = IF(TIMESTAMPDIFF(YEAR, pr.dob, MAKEDATE(l.membership_year, 1)) >= 18, 200.00, 100.00);
+
+DROP PROCEDURE IF EXISTS sp_apply_payment_delta;
+DROP PROCEDURE IF EXISTS sp_rebuild_member_payment_totals;
+
+DELIMITER $$
+
+CREATE PROCEDURE sp_apply_payment_delta(IN p_club_member_id INT, IN p_membership_year INT, IN p_delta DECIMAL(10, 2))
+BEGIN
+    DECLARE v_age INT;
+    DECLARE v_required_fee DECIMAL(10, 2);
+    DECLARE v_old_total DECIMAL(10, 2);
+    DECLARE v_new_total DECIMAL(10, 2);
+
+    SELECT TIMESTAMPDIFF(YEAR, dob, MAKEDATE(p_membership_year, 1))
+    INTO v_age
+    FROM person
+    WHERE person_id = p_club_member_id;
+    SET v_required_fee = IF(v_age >= 18, 200.00, 100.00);
+
+    SET v_old_total = COALESCE((
+        SELECT total_paid FROM member_year_ledger
+        WHERE club_member_id = p_club_member_id AND membership_year = p_membership_year
+        FOR UPDATE
+    ), 0);
+    SET v_new_total = v_old_total + p_delta;
+
+    INSERT INTO member_year_ledger (club_member_id, membership_year, age_in_year, required_fee, total_paid)
+    VALUES (p_club_member_id, p_membership_year, v_age, v_required_fee, p_delta)
+    ON DUPLICATE KEY UPDATE total_paid = total_paid + p_delta;
+
+    -- Only the current membership year decides whether a member is active.
+    IF p_membership_year = YEAR(CURDATE())
+       AND (v_old_total >= v_required_fee) <> (v_new_total >= v_required_fee) THEN
+        UPDATE club_member
+        SET activity_status = IF(v_new_total >= v_required_fee, 'Active', 'Inactive')
+        WHERE club_member_id = p_club_member_id;
+    END IF;
+END$$
+
+CREATE PROCEDURE sp_rebuild_member_year_ledger()
+BEGIN
+    DELETE FROM member_year_ledger;
+
+    INSERT INTO member_year_ledger (club_member_id, membership_year, age_in_year, required_fee, total_paid)
+    SELECT
+        totals.club_member_id,
+        totals.membership_year,
+        totals.age_in_year,
+        IF(totals.age_in_year >= 18, 200.00, 100.00),
+        totals.total_paid
+    FROM (
+        SELECT
+            p.club_member_id,
+            p.membership_year,
+            TIMESTAMPDIFF(YEAR, pr.dob, MAKEDATE(p.membership_year, 1)) AS age_in_year,
+            SUM(p.amount) AS total_paid
+        FROM payments p
+        JOIN person pr ON p.club_member_id = pr.person_id
+        GROUP BY p.club_member_id, p.membership_year, pr.dob
+    ) AS totals;
+END$$
+
+CREATE TRIGGER trg_ledger_person_dob_update
+AFTER UPDATE ON person
+FOR EACH ROW
+BEGIN
+    IF NEW.dob <> OLD.dob THEN
+        UPDATE member_year_ledger
+        SET age_in_year = TIMESTAMPDIFF(YEAR, NEW.dob, MAKEDATE(membership_year, 1)),
+            required_fee = IF(TIMESTAMPDIFF(YEAR, NEW.dob, MAKEDATE(membership_year, 1)) >= 18, 200.00, 100.00)
+        WHERE club_member_id = NEW.person_id;
+
+        -- A new fee can move the member across it for the current year.
+        UPDATE club_member cm
+        JOIN member_year_ledger l ON l.club_member_id = cm.club_member_id
+        SET cm.activity_status = IF(l.total_paid >= l.required_fee, 'Active', 'Inactive')
+        WHERE cm.club_member_id = NEW.person_id
+          AND l.membership_year = YEAR(CURDATE());
+    END IF;
+END$$
+
+DELIMITER ;
@@ -0,0 +1,81 @@
+-- =================================================================
+-- MIGRATION 006: VALIDATED-BATCH BYPASS FOR FORMATION TRIGGERS
+-- =================================================================
+-- trg_check_gender_consistency and trg_check_session_time_conflict run their own
+-- lookups against person, teams, sessions and formations for every inserted row, so a
+-- roster load of N rows costs N x (player history) reads.
+--
+-- ops.add_formations_batch checks a whole batch of proposed formations with one
+-- set-based query (plus an in-memory pass for conflicts inside the batch) and then
+-- inserts the accepted rows with the session variable @mvc_validated_batch set to 1.
+-- Under that flag both triggers skip their checks. Every other insert, including any
+-- made directly in SQL, is still checked row by row: the triggers stay as the guard.
+--
+-- The flag is cleared right after the insert (PooledConnection.validated_batch), and a
+-- pooled connection whose flag could not be cleared is closed instead of reused.
+
+USE mvc_db;
+
+DROP TRIGGER IF EXISTS trg_check_gender_consistency;
+DROP TRIGGER IF EXISTS trg_check_session_time_conflict;
+
+DELIMITER $$
+
+CREATE TRIGGER trg_check_gender_consistency
+BEFORE INSERT ON formations
+FOR EACH ROW
+BEGIN
+    DECLARE v_player_gender ENUM('Male', 'Female');
+    DECLARE v_team_gender ENUM('Male', 'Female');
+
+    IF COALESCE(@mvc_validated_batch, 0) = 0 THEN
+        SELECT p.gender INTO v_player_gender
+        FROM person p
+        WHERE p.person_id = NEW.player_id;
+
+        SELECT t.team_gender INTO v_team_gender
+        FROM teams t
+        WHERE t.team_id = NEW.team_id;
+
+        -- Compare the two genders. If they do not match, reject the INSERT.
+        IF v_player_gender <> v_team_gender THEN
+            SIGNAL SQLSTATE '45000'
+            SET MESSAGE_TEXT = 'Error: Player gender does not match team gender. Cannot assign player to this formation.';
+        END IF;
+    END IF;
+END$$
+
+CREATE TRIGGER trg_check_session_time_conflict
+BEFORE INSERT ON formations
+FOR EACH ROW
+BEGIN
+    DECLARE v_new_session_datetime TIMESTAMP;
+    DECLARE v_day_start DATETIME;
+    DECLARE v_conflict_count INT;
+
+    IF COALESCE(@mvc_validated_batch, 0) = 0 THEN
+        SELECT s.date_time INTO v_new_session_datetime
+        FROM sessions s
+        WHERE s.session_id = NEW.session_id;
+
+        SET v_day_start = DATE(v_new_session_datetime);
+
+        -- A conflict is another session of this player on the same day, less than 3 hours away.
+        SELECT COUNT(*) INTO v_conflict_count
+        FROM formations f
+        JOIN sessions s ON f.session_id = s.session_id
+        WHERE
+            f.player_id = NEW.player_id
+            AND s.date_time >= v_day_start
+            AND s.date_time < v_day_start + INTERVAL 1 DAY
+            AND s.date_time > v_new_session_datetime - INTERVAL 180 MINUTE
+            AND s.date_time < v_new_session_datetime + INTERVAL 180 MINUTE;
+
+        IF v_conflict_count > 0 THEN
+            SIGNAL SQLSTATE '45000'
+            SET MESSAGE_TEXT = 'Error: Time conflict. This player is already assigned to another session within 3 hours of this one.';
+        END IF;
+    END IF;
+END$$
+
+DELIMITER ;
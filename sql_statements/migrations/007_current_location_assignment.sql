@@ -0,0 +1,81 @@
+-- =================================================================
+-- MIGRATION 007: CURRENT LOCATION ASSIGNMENT PROJECTION
+-- =================================================================
+-- The member list, the member profile, the personnel list and the weekly emails' coach
+-- lookup all joined location_assignment ... AND la.end_date IS NULL, reading every
+-- assignment row of the person (or location) to find the open one.
+--
+-- current_location_assignment holds exactly one row per person: their open assignment
+-- (the latest one if several are open). Readers join it on its primary key, and the
+-- current coach of a location is found through idx_current_location_role.
+--
+-- Triggers on location_assignment keep it current inside the same transaction as the
+-- change: assign_person_to_location (which closes the old assignment and inserts the new
+-- one), generic updates of end_date, role or location, and deletes. Deleting a person
+-- removes their rows through the foreign key cascade.
+
+USE mvc_db;
+
+CREATE TABLE current_location_assignment (
+    person_id 		INT PRIMARY KEY,
+    assignment_id 	INT NOT NULL UNIQUE,
+    location_id 	INT NOT NULL,
+    start_date	 	DATE NOT NULL,
+    personnel_role 	ENUM('Administrator', 'Captain', 'Coach', 'Assistant Coach', 'Manager', 'General Manager', 'Deputy Manager', 'Treasurer', 'Secretary'),
+    mandate 		ENUM('Volunteer', 'Salaried'),
+    INDEX 			idx_current_location_role (location_id, personnel_role, person_id),
+    CONSTRAINT 		fk_current_assignment FOREIGN KEY (assignment_id) REFERENCES location_assignment(assignment_id) ON DELETE CASCADE
+);
+
+INSERT INTO current_location_assignment (person_id, assignment_id, location_id, start_date, personnel_role, mandate)
+SELECT person_id, assignment_id, location_id, start_date, personnel_role, mandate
+FROM (
+    SELECT la.*, ROW_NUMBER() OVER (PARTITION BY la.person_id ORDER BY la.start_date DESC, la.assignment_id DESC) AS rn
+    FROM location_assignment la
+    WHERE la.end_date IS NULL
+) AS open_assignments
+WHERE rn = 1;
+
+DELIMITER $$
+
+CREATE PROCEDURE sp_refresh_current_assignment(IN p_person_id INT)
+BEGIN
+    DELETE FROM current_location_assignment WHERE person_id = p_person_id;
+
+    INSERT INTO current_location_assignment (person_id, assignment_id, location_id, start_date, personnel_role, mandate)
+    SELECT person_id, assignment_id, location_id, start_date, personnel_role, mandate
+    FROM location_assignment
+    WHERE person_id = p_person_id AND end_date IS NULL
+    ORDER BY start_date DESC, assignment_id DESC
+    LIMIT 1;
+END$$
+
+CREATE TRIGGER trg_current_assignment_insert
+AFTER INSERT ON location_assignment
+FOR EACH ROW
+BEGIN
+    IF NEW.end_date IS NULL THEN
+        CALL sp_refresh_current_assignment(NEW.person_id);
+    END IF;
+END$$
+
+CREATE TRIGGER trg_current_assignment_update
+AFTER UPDATE ON location_assignment
+FOR EACH ROW
+BEGIN
+    CALL sp_refresh_current_assignment(NEW.person_id);
+    IF OLD.person_id <> NEW.person_id THEN
+        CALL sp_refresh_current_assignment(OLD.person_id);
+    END IF;
+END$$
+
+CREATE TRIGGER trg_current_assignment_delete
+AFTER DELETE ON location_assignment
+FOR EACH ROW
+BEGIN
+    IF OLD.end_date IS NULL THEN
+        CALL sp_refresh_current_assignment(OLD.person_id);
+    END IF;
+END$$
+
+DELIMITER ;
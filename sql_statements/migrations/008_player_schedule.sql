@@ -0,0 +1,131 @@
+-- =================================================================
+-- MIGRATION 008: PLAYER SCHEDULE INTERVALS
+-- =================================================================
+-- A player may not be in two sessions on the same day less than 3 hours apart. This
+-- was only checked when a formation was inserted: moving a session with
+-- UPDATE sessions SET date_time = ... re-checked nobody already rostered on it.
+--
+-- player_schedule holds one interval per formation: the block of time the session
+-- occupies in the player's day, [starts_at, ends_at) with ends_at = starts_at + 3 hours.
+-- Two sessions conflict exactly when their blocks overlap on the same day, and
+-- "does player X overlap window W" is a range seek on idx_schedule_player_time.
+--
+-- - Triggers on formations keep it in step with rosters; rows disappear with their
+--   formation through the foreign key cascade (session, team or person deletes).
+-- - trg_check_session_time_conflict now looks the conflict up here.
+-- - trg_session_reschedule_conflict rejects a date_time change that would put any
+--   player of the session in conflict; trg_session_reschedule_sync then moves the
+--   session's intervals.
+-- - ops.reschedule_session checks the whole session with one query before updating.
+
+USE mvc_db;
+
+CREATE TABLE player_schedule (
+    formation_id 	INT PRIMARY KEY,
+    player_id 		INT NOT NULL,
+    session_id 		INT NOT NULL,
+    starts_at 		DATETIME NOT NULL,
+    ends_at 		DATETIME AS (starts_at + INTERVAL 180 MINUTE) STORED,
+    INDEX 			idx_schedule_player_time (player_id, starts_at),
+    INDEX 			idx_schedule_time (starts_at, player_id),
+    INDEX 			idx_schedule_session (session_id, player_id),
+    CONSTRAINT 		fk_schedule_formation FOREIGN KEY (formation_id) REFERENCES formations(formation_id) ON DELETE CASCADE
+);
+
+INSERT INTO player_schedule (formation_id, player_id, session_id, starts_at)
+SELECT f.formation_id, f.player_id, f.session_id, s.date_time
+FROM formations f
+JOIN sessions s ON f.session_id = s.session_id;
+
+DROP TRIGGER IF EXISTS trg_check_session_time_conflict;
+
+DELIMITER $$
+
+CREATE TRIGGER trg_check_session_time_conflict
+BEFORE INSERT ON formations
+FOR EACH ROW
+BEGIN
+    DECLARE v_new_start DATETIME;
+    DECLARE v_conflict_count INT;
+
+    IF COALESCE(@mvc_validated_batch, 0) = 0 THEN
+        SELECT s.date_time INTO v_new_start
+        FROM sessions s
+        WHERE s.session_id = NEW.session_id;
+
+        -- Blocks overlap: starts_at < new end AND ends_at > new start. Every block is 3 hours
+        -- long, so the lower bound on starts_at is implied and keeps the index seek bounded.
+        SELECT COUNT(*) INTO v_conflict_count
+        FROM player_schedule ps
+        WHERE
+            ps.player_id = NEW.player_id
+            AND ps.starts_at > v_new_start - INTERVAL 180 MINUTE
+            AND ps.starts_at < v_new_start + INTERVAL 180 MINUTE
+            AND ps.ends_at > v_new_start
+            AND ps.starts_at >= DATE(v_new_start)
+            AND ps.starts_at < DATE(v_new_start) + INTERVAL 1 DAY;
+
+        IF v_conflict_count > 0 THEN
+            SIGNAL SQLSTATE '45000'
+            SET MESSAGE_TEXT = 'Error: Time conflict. This player is already assigned to another session within 3 hours of this one.';
+        END IF;
+    END IF;
+END$$
+
+CREATE TRIGGER trg_player_schedule_insert
+AFTER INSERT ON formations
+FOR EACH ROW
+BEGIN
+    INSERT INTO player_schedule (formation_id, player_id, session_id, starts_at)
+    SELECT NEW.formation_id, NEW.player_id, NEW.session_id, s.date_time
+    FROM sessions s
+    WHERE s.session_id = NEW.session_id;
+END$$
+
+CREATE TRIGGER trg_player_schedule_update
+AFTER UPDATE ON formations
+FOR EACH ROW
+BEGIN
+    IF OLD.player_id <> NEW.player_id OR OLD.session_id <> NEW.session_id THEN
+        UPDATE player_schedule ps
+        JOIN sessions s ON s.session_id = NEW.session_id
+        SET ps.player_id = NEW.player_id, ps.session_id = NEW.session_id, ps.starts_at = s.date_time
+        WHERE ps.formation_id = NEW.formation_id;
+    END IF;
+END$$
+
+CREATE TRIGGER trg_session_reschedule_conflict
+BEFORE UPDATE ON sessions
+FOR EACH ROW
+BEGIN
+    DECLARE v_conflict_count INT;
+
+    IF NEW.date_time <> OLD.date_time THEN
+        SELECT COUNT(*) INTO v_conflict_count
+        FROM player_schedule mine
+        JOIN player_schedule other
+            ON other.player_id = mine.player_id
+            AND other.session_id <> mine.session_id
+            AND other.starts_at > NEW.date_time - INTERVAL 180 MINUTE
+            AND other.starts_at < NEW.date_time + INTERVAL 180 MINUTE
+            AND other.starts_at >= DATE(NEW.date_time)
+            AND other.starts_at < DATE(NEW.date_time) + INTERVAL 1 DAY
+        WHERE mine.session_id = OLD.session_id;
+
+        IF v_conflict_count > 0 THEN
+            SIGNAL SQLSTATE '45000'
+            SET MESSAGE_TEXT = 'Error: Time conflict. Moving this session would put a rostered player in another session within 3 hours.';
+        END IF;
+    END IF;
+END$$
+
+CREATE TRIGGER trg_session_reschedule_sync
+AFTER UPDATE ON sessions
+FOR EACH ROW
+BEGIN
+    IF NEW.date_time <> OLD.date_time THEN
+        UPDATE player_schedule SET starts_at = NEW.date_time WHERE session_id = NEW.session_id;
+    END IF;
+END$$
+
+DELIMITER ;
@@ -0,0 +1,263 @@
+-- =================================================================
+-- MIGRATION 009: LOCATION OCCUPANCY BUCKETS
+-- =================================================================
+-- locations.max_capacity was never enforced, and nothing stopped two sessions being
+-- booked at the same location at the same time.
+--
+-- location_occupancy has one row per (location, hour) with the number of sessions and
+-- the number of rostered players in that hour. A session occupies every hour bucket
+-- its 3-hour block touches: a 16:30 session occupies 16:00, 17:00, 18:00 and 19:00.
+-- Checks are a few primary-key lookups:
+-- - a session can be booked when none of its buckets holds a session (so at one
+--   location, a session ending at 19:30 blocks a 19:00 start but not a 20:00 start);
+-- - a player can be rostered while the buckets' headcount is below max_capacity.
+--
+-- The buckets are maintained by triggers on sessions and formations. Formations
+-- removed by a cascade (deleting a team, member or person) fire no triggers, so those
+-- deletes subtract their headcount first. session_teams rows carry no players: detaching
+-- a team deletes its formations, which updates the headcount.
+--
+-- ops.add_session / ops.add_formation check the buckets first to report a clear reason,
+-- add_formations_batch checks capacity for the whole batch, and the BEFORE INSERT/UPDATE
+-- triggers below guard every other write (the capacity check honours the validated-batch
+-- flag from migration 006).
+
+USE mvc_db;
+
+CREATE TABLE location_occupancy (
+    location_id 	INT NOT NULL,
+    bucket_start 	DATETIME NOT NULL,
+    session_count 	INT NOT NULL DEFAULT 0,
+    headcount 		INT NOT NULL DEFAULT 0,
+    PRIMARY KEY 	(location_id, bucket_start),
+    CONSTRAINT 		fk_occupancy_location FOREIGN KEY (location_id) REFERENCES locations(location_id) ON DELETE CASCADE
+);
+
+DELIMITER $$
+
+CREATE PROCEDURE sp_apply_occupancy(IN p_location_id INT, IN p_start DATETIME, IN p_sessions INT, IN p_headcount INT)
+BEGIN
+    DECLARE v_bucket DATETIME DEFAULT p_start - INTERVAL MINUTE(p_start) MINUTE - INTERVAL SECOND(p_start) SECOND;
+    DECLARE v_end DATETIME DEFAULT p_start + INTERVAL 180 MINUTE;
+
+    WHILE v_bucket < v_end DO
+        INSERT INTO location_occupancy (location_id, bucket_start, session_count, headcount)
+        VALUES (p_location_id, v_bucket, p_sessions, p_headcount)
+        ON DUPLICATE KEY UPDATE
+            session_count = session_count + p_sessions,
+            headcount = headcount + p_headcount;
+        SET v_bucket = v_bucket + INTERVAL 1 HOUR;
+    END WHILE;
+END$$
+
+-- Subtracts the headcount of the formations a cascade is about to delete (by team or by player).
+CREATE PROCEDURE sp_remove_cascaded_headcount(IN p_team_id INT, IN p_player_id INT)
+BEGIN
+    DECLARE v_done BOOLEAN DEFAULT FALSE;
+    DECLARE v_location_id INT;
+    DECLARE v_start DATETIME;
+    DECLARE v_players INT;
+    DECLARE c_sessions CURSOR FOR
+        SELECT s.location_id, s.date_time, COUNT(*)
+        FROM formations f
+        JOIN sessions s ON f.session_id = s.session_id
+        WHERE f.team_id = p_team_id OR f.player_id = p_player_id
+        GROUP BY s.session_id, s.location_id, s.date_time;
+    DECLARE CONTINUE HANDLER FOR NOT FOUND SET v_done = TRUE;
+
+    OPEN c_sessions;
+    read_loop: LOOP
+        FETCH c_sessions INTO v_location_id, v_start, v_players;
+        IF v_done THEN
+            LEAVE read_loop;
+        END IF;
+        CALL sp_apply_occupancy(v_location_id, v_start, 0, -v_players);
+    END LOOP;
+    CLOSE c_sessions;
+END$$
+
+CREATE PROCEDURE sp_rebuild_location_occupancy()
+BEGIN
+    DECLARE v_done BOOLEAN DEFAULT FALSE;
+    DECLARE v_location_id INT;
+    DECLARE v_start DATETIME;
+    DECLARE v_players INT;
+    DECLARE c_sessions CURSOR FOR
+        SELECT s.location_id, s.date_time, COUNT(f.formation_id)
+        FROM sessions s
+        LEFT JOIN formations f ON f.session_id = s.session_id
+        GROUP BY s.session_id, s.location_id, s.date_time;
+    DECLARE CONTINUE HANDLER FOR NOT FOUND SET v_done = TRUE;
+
+    DELETE FROM location_occupancy;
+    OPEN c_sessions;
+    read_loop: LOOP
+        FETCH c_sessions INTO v_location_id, v_start, v_players;
+        IF v_done THEN
+            LEAVE read_loop;
+        END IF;
+        CALL sp_apply_occupancy(v_location_id, v_start, 1, v_players);
+    END LOOP;
+    CLOSE c_sessions;
+END$$
+
+-- --- Guards ---
+
+CREATE TRIGGER trg_check_location_double_booking
+BEFORE INSERT ON sessions
+FOR EACH ROW
+BEGIN
+    IF EXISTS (
+        SELECT 1 FROM location_occupancy o
+        WHERE o.location_id = NEW.location_id
+            AND o.bucket_start >= NEW.date_time - INTERVAL MINUTE(NEW.date_time) MINUTE - INTERVAL SECOND(NEW.date_time) SECOND
+            AND o.bucket_start < NEW.date_time + INTERVAL 180 MINUTE
+            AND o.session_count > 0
+    ) THEN
+        SIGNAL SQLSTATE '45000'
+        SET MESSAGE_TEXT = 'Error: Double booking. Another session already uses this location at this time.';
+    END IF;
+END$$
+
+CREATE TRIGGER trg_check_location_move
+BEFORE UPDATE ON sessions
+FOR EACH ROW
+BEGIN
+    IF NEW.date_time <> OLD.date_time OR NEW.location_id <> OLD.location_id THEN
+        -- The session's own buckets still count it, so one session is allowed where the old and new blocks meet.
+        IF EXISTS (
+            SELECT 1 FROM location_occupancy o
+            WHERE o.location_id = NEW.location_id
+                AND o.bucket_start >= NEW.date_time - INTERVAL MINUTE(NEW.date_time) MINUTE - INTERVAL SECOND(NEW.date_time) SECOND
+                AND o.bucket_start < NEW.date_time + INTERVAL 180 MINUTE
+                AND o.session_count - (
+                    NEW.location_id = OLD.location_id
+                    AND o.bucket_start >= OLD.date_time - INTERVAL MINUTE(OLD.date_time) MINUTE - INTERVAL SECOND(OLD.date_time) SECOND
+                    AND o.bucket_start < OLD.date_time + INTERVAL 180 MINUTE
+                ) > 0
+        ) THEN
+            SIGNAL SQLSTATE '45000'
+            SET MESSAGE_TEXT = 'Error: Double booking. Another session already uses this location at the new time.';
+        END IF;
+    END IF;
+END$$
+
+CREATE TRIGGER trg_check_location_capacity
+BEFORE INSERT ON formations
+FOR EACH ROW
+BEGIN
+    DECLARE v_capacity INT;
+    DECLARE v_headcount INT;
+
+    IF COALESCE(@mvc_validated_batch, 0) = 0 THEN
+        SELECT l.max_capacity, COALESCE(MAX(o.headcount), 0) INTO v_capacity, v_headcount
+        FROM sessions s
+        JOIN locations l ON l.location_id = s.location_id
+        LEFT JOIN location_occupancy o
+            ON o.location_id = s.location_id
+            AND o.bucket_start >= s.date_time - INTERVAL MINUTE(s.date_time) MINUTE - INTERVAL SECOND(s.date_time) SECOND
+            AND o.bucket_start < s.date_time + INTERVAL 180 MINUTE
+        WHERE s.session_id = NEW.session_id
+        GROUP BY l.max_capacity;
+
+        IF v_capacity IS NOT NULL AND v_headcount >= v_capacity THEN
+            SIGNAL SQLSTATE '45000'
+            SET MESSAGE_TEXT = 'Error: Location is full. The session has reached the location''s maximum capacity.';
+        END IF;
+    END IF;
+END$$
+
+-- --- Maintenance ---
+
+CREATE TRIGGER trg_occupancy_session_insert
+AFTER INSERT ON sessions
+FOR EACH ROW
+BEGIN
+    CALL sp_apply_occupancy(NEW.location_id, NEW.date_time, 1, 0);
+END$$
+
+CREATE TRIGGER trg_occupancy_session_update
+AFTER UPDATE ON sessions
+FOR EACH ROW
+BEGIN
+    DECLARE v_players INT;
+
+    IF NEW.date_time <> OLD.date_time OR NEW.location_id <> OLD.location_id THEN
+        SELECT COUNT(*) INTO v_players FROM formations WHERE session_id = NEW.session_id;
+        CALL sp_apply_occupancy(OLD.location_id, OLD.date_time, -1, -v_players);
+        CALL sp_apply_occupancy(NEW.location_id, NEW.date_time, 1, v_players);
+    END IF;
+END$$
+
+-- BEFORE DELETE: the formations are still there to be counted; the cascade removes them afterwards.
+CREATE TRIGGER trg_occupancy_session_delete
+BEFORE DELETE ON sessions
+FOR EACH ROW
+BEGIN
+    DECLARE v_players INT;
+
+    SELECT COUNT(*) INTO v_players FROM formations WHERE session_id = OLD.session_id;
+    CALL sp_apply_occupancy(OLD.location_id, OLD.date_time, -1, -v_players);
+END$$
+
+CREATE TRIGGER trg_occupancy_formation_insert
+AFTER INSERT ON formations
+FOR EACH ROW
+BEGIN
+    DECLARE v_location_id INT;
+    DECLARE v_start DATETIME;
+
+    SELECT location_id, date_time INTO v_location_id, v_start FROM sessions WHERE session_id = NEW.session_id;
+    CALL sp_apply_occupancy(v_location_id, v_start, 0, 1);
+END$$
+
+CREATE TRIGGER trg_occupancy_formation_update
+AFTER UPDATE ON formations
+FOR EACH ROW
+BEGIN
+    DECLARE v_location_id INT;
+    DECLARE v_start DATETIME;
+
+    IF NEW.session_id <> OLD.session_id THEN
+        SELECT location_id, date_time INTO v_location_id, v_start FROM sessions WHERE session_id = OLD.session_id;
+        CALL sp_apply_occupancy(v_location_id, v_start, 0, -1);
+        SELECT location_id, date_time INTO v_location_id, v_start FROM sessions WHERE session_id = NEW.session_id;
+        CALL sp_apply_occupancy(v_location_id, v_start, 0, 1);
+    END IF;
+END$$
+
+CREATE TRIGGER trg_occupancy_formation_delete
+AFTER DELETE ON formations
+FOR EACH ROW
+BEGIN
+    DECLARE v_location_id INT;
+    DECLARE v_start DATETIME;
+
+    SELECT location_id, date_time INTO v_location_id, v_start FROM sessions WHERE session_id = OLD.session_id;
+    CALL sp_apply_occupancy(v_location_id, v_start, 0, -1);
+END$$
+
+CREATE TRIGGER trg_occupancy_team_delete
+BEFORE DELETE ON teams
+FOR EACH ROW
+BEGIN
+    CALL sp_remove_cascaded_headcount(OLD.team_id, NULL);
+END$$
+
+CREATE TRIGGER trg_occupancy_club_member_delete
+BEFORE DELETE ON club_member
+FOR EACH ROW
+BEGIN
+    CALL sp_remove_cascaded_headcount(NULL, OLD.club_member_id);
+END$$
+
+CREATE TRIGGER trg_occupancy_person_delete
+BEFORE DELETE ON person
+FOR EACH ROW
+BEGIN
+    CALL sp_remove_cascaded_headcount(NULL, OLD.person_id);
+END$$
+
+DELIMITER ;
+
+CALL sp_rebuild_location_occupancy();
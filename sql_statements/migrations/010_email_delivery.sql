@@ -0,0 +1,25 @@
+-- =================================================================
+-- MIGRATION 010: EMAIL DELIVERY STATUS
+-- =================================================================
+-- The emails table was only a log: nothing was sent and bodies were cut to 100
+-- characters. email_delivery.py now sends the logged emails over SMTP and records
+-- each outcome on the row:
+--   delivery_status  Pending until a send succeeds (Sent) or gives up (Failed)
+--   attempts         SMTP attempts made so far
+--   sent_at          when the server accepted the message
+--   last_error       the last SMTP error, for Failed rows and retried ones
+-- The sender picks up Pending rows in email_id order through idx_emails_delivery.
+--
+-- Rows logged before this migration have truncated bodies, so they are marked Skipped
+-- and never sent.
+
+USE mvc_db;
+
+ALTER TABLE emails
+    ADD COLUMN delivery_status 	ENUM('Pending', 'Sent', 'Failed', 'Skipped') NOT NULL DEFAULT 'Pending',
+    ADD COLUMN attempts 		INT NOT NULL DEFAULT 0,
+    ADD COLUMN sent_at 			TIMESTAMP NULL,
+    ADD COLUMN last_error 		VARCHAR(255),
+    ADD INDEX idx_emails_delivery (delivery_status, email_id);
+
+UPDATE emails SET delivery_status = 'Skipped';
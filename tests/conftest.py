@@ -0,0 +1,24 @@
+"""
+Shared pytest fixtures. Tests that need MySQL take the `db_conn` fixture and are skipped
+when the database in db_connector.db_config cannot be reached (with the migrations in
+sql_statements/migrations applied by migrate.py).
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import mysql.connector
+from mysql.connector import Error
+from db_connector import db_config
+
+@pytest.fixture(scope='session')
+def db_conn():
+    try:
+        conn = mysql.connector.connect(**db_config, connection_timeout=2)
+    except Error as e:
+        pytest.skip(f"MySQL is not available: {e}")
+    yield conn
+    conn.close()
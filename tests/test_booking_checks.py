@@ -0,0 +1,90 @@
+"""add_session / add_formation report rule violations apart from database errors (fake connection)."""
+from datetime import datetime
+
+import pytest
+from mysql.connector import Error
+
+import db_operations as ops
+
+class FakeCursor:
+    def __init__(self, rows=(), error=None):
+        self.rows = list(rows)
+        self.error = error
+        self.lastrowid = 7
+        self.closed = False
+
+    def execute(self, sql, params=()):
+        if self.error:
+            raise self.error
+
+    def fetchall(self):
+        return self.rows
+
+    def close(self):
+        self.closed = True
+
+class FakeConnection:
+    def __init__(self, check_rows=(), insert_error=None, cursor_error=None):
+        self.check = FakeCursor(check_rows)
+        self.insert = FakeCursor(error=insert_error)
+        self.cursor_error = cursor_error
+        self.rolled_back = False
+
+    def prepared_cursor(self, sql):
+        return self.insert
+
+    def cursor(self, **kwargs):
+        if self.cursor_error:
+            raise self.cursor_error
+        return self.check
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        self.rolled_back = True
+
+    def close(self):
+        pass
+
+@pytest.fixture
+def connect(monkeypatch):
+    def connect(**kwargs):
+        conn = FakeConnection(**kwargs)
+        monkeypatch.setattr(ops, 'get_db_connection', lambda exclusive=False: conn)
+        return conn
+    return connect
+
+SESSION = ('Training', datetime(2025, 1, 6, 18), 1)
+
+def test_add_session_double_booking_raises_rule_violation(connect):
+    connect(check_rows=[(1,)])
+    with pytest.raises(Error) as info:
+        ops.add_session(*SESSION)
+    assert info.value.sqlstate == ops.RULE_VIOLATION_SQLSTATE
+    assert 'Double booking' in str(info.value)
+
+def test_add_session_database_error_returns_none(connect):
+    conn = connect(insert_error=Error(msg="Lost connection", errno=2013))
+    assert ops.add_session(*SESSION) is None
+    assert conn.rolled_back
+
+def test_add_session_cursor_failure_is_not_masked(connect):
+    conn = connect(cursor_error=Error(msg="Lost connection", errno=2013))
+    assert ops.add_session(*SESSION) is None
+    assert conn.insert.closed
+
+def test_add_formation_full_location_raises_rule_violation(connect):
+    connect(check_rows=[(5, 0)])
+    with pytest.raises(Error) as info:
+        ops.add_formation(5, 1, 2, 'Setter')
+    assert 'Location is full' in str(info.value)
+
+def test_add_formation_trigger_rule_is_passed_on(connect):
+    connect(insert_error=Error(msg="Time conflict.", errno=1644, sqlstate='45000'))
+    with pytest.raises(Error, match="Time conflict"):
+        ops.add_formation(5, 1, 2, 'Setter')
+
+def test_add_formation_database_error_returns_false(connect):
+    connect(insert_error=Error(msg="Lost connection", errno=2013))
+    assert ops.add_formation(5, 1, 2, 'Setter') is False
@@ -0,0 +1,73 @@
+"""bulk_import_members falls back to row-by-row inserts, checked against a scripted fake connection."""
+import io
+
+import db_operations as ops
+
+SSN = ops.MEMBER_IMPORT_PERSON_COLUMNS.index('ssn')
+
+class FakeCursor:
+    """Returns person ids that cannot be matched to a multi-row batch, but can for single rows."""
+
+    def __init__(self):
+        self.next_id = 100
+        self.inserted = []
+        self.members = []
+        self.lastrowid = None
+        self._rows = []
+
+    def executemany(self, sql, data):
+        if sql.startswith('INSERT INTO person'):
+            self.inserted = [row[SSN] for row in data]
+            self.lastrowid = self.next_id
+            self.next_id += len(data)
+        else:
+            self.members.extend(row[0] for row in data)
+
+    def execute(self, sql, params=()):
+        ids = range(self.lastrowid, self.lastrowid + len(self.inserted))
+        if 'BETWEEN' in sql:
+            ssns = self.inserted if len(self.inserted) == 1 else list(reversed(self.inserted))
+            self._rows = list(zip(ids, ssns))
+        else:  # The SSN lookup finds only the first row, e.g. one SSN stored in another format
+            self._rows = [(self.inserted[0], self.lastrowid)]
+
+    def fetchall(self):
+        return self._rows
+
+    def close(self):
+        pass
+
+class FakeConnection:
+    def __init__(self):
+        self.cursor_ = FakeCursor()
+        self.rollbacks = 0
+
+    def cursor(self, **kwargs):
+        return self.cursor_
+
+    def start_transaction(self):
+        pass
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        self.rollbacks += 1
+
+    def close(self):
+        pass
+
+def test_unmatched_ssn_retries_row_by_row(monkeypatch):
+    conn = FakeConnection()
+    monkeypatch.setattr(ops, 'get_db_connection', lambda exclusive=False: conn)
+    source = io.StringIO(
+        "first_name,last_name,dob,gender,ssn,join_date\n"
+        "Ana,Roy,2000-01-01,Female,111111111,2025-01-01\n"
+        "Ben,Roy,2001-01-01,Male,222222222,2025-01-01\n"
+    )
+
+    report = ops.bulk_import_members(source, file_format='csv')
+
+    assert report == {'imported': 2, 'failed': 0, 'errors': []}
+    assert conn.rollbacks == 1
+    assert conn.cursor_.members == [102, 103]
@@ -0,0 +1,139 @@
+"""
+The index-friendly range predicates select exactly the rows the original DATE(...) BETWEEN /
+ABS(TIMESTAMPDIFF(...)) predicates did: ops._weekly_email_range with WEEKLY_EMAIL_SELECT_SQL,
+and trg_check_session_time_conflict as written in create_database.sql and migrations 002 and 008.
+The trigger predicates are read from the SQL files themselves and evaluated by MySQL over
+edge timestamps.
+"""
+import os
+import re
+from datetime import date, datetime, timedelta
+
+import pytest
+
+import db_operations as ops
+import migrate
+
+# --- Weekly email range: DATE(s.date_time) BETWEEN start AND end ---
+
+WEEK_START, WEEK_END = date(2025, 1, 6), date(2025, 1, 12)
+
+WEEK_TIMESTAMPS = [
+    datetime(2025, 1, 5, 23, 59, 59),   # Last second before the range
+    datetime(2025, 1, 6, 0, 0, 0),      # Midnight of the first day
+    datetime(2025, 1, 6, 0, 0, 1),
+    datetime(2025, 1, 9, 12, 0, 0),
+    datetime(2025, 1, 12, 23, 59, 59),  # Last second of the last day
+    datetime(2025, 1, 13, 0, 0, 0),     # Midnight after the last day
+]
+
+def _week_predicate():
+    """The date condition of WEEKLY_EMAIL_SELECT_SQL, on a column named t."""
+    where = ops.WEEKLY_EMAIL_SELECT_SQL.rsplit('WHERE', 1)[1].strip().rstrip(';')
+    return re.sub(r'\bs\.date_time\b', 't', where)
+
+def test_week_range_matches_date_between():
+    range_start, range_end = ops._weekly_email_range(WEEK_START, WEEK_END)
+    old = [WEEK_START <= t.date() <= WEEK_END for t in WEEK_TIMESTAMPS]
+    new = [range_start <= t < range_end for t in WEEK_TIMESTAMPS]
+    assert old == new == [False, True, True, True, True, False]
+
+# --- Time conflict: same day and under 3 hours apart ---
+
+def _around(anchor):
+    """Edge timestamps around a new session starting at `anchor`."""
+    offsets = [timedelta(hours=3), timedelta(hours=2, minutes=59, seconds=59), timedelta(hours=1), timedelta(0)]
+    return [anchor + o for o in offsets] + [anchor - o for o in offsets if o]
+
+CONFLICT_ANCHORS = [
+    datetime(2025, 1, 6, 0, 0, 0),      # Midnight: earlier sessions are on the previous day
+    datetime(2025, 1, 6, 1, 30, 0),     # 3 hours back crosses into the previous day
+    datetime(2025, 1, 6, 12, 0, 0),
+    datetime(2025, 1, 6, 22, 30, 0),    # 3 hours forward crosses into the next day
+    datetime(2025, 1, 6, 23, 59, 59),
+]
+CONFLICT_PAIRS = [(anchor, t) for anchor in CONFLICT_ANCHORS for t in _around(anchor)]
+
+def _read(path):
+    with open(path, encoding='utf-8') as f:
+        return f.read()
+
+def _migration_text(prefix):
+    return next(_read(path) for version, path in migrate.list_migrations() if version.startswith(prefix))
+
+def _trigger_predicate(sql_text, trigger_name, names):
+    """
+    The conflict condition of a trigger's SELECT COUNT(*) INTO v_conflict_count, without the
+    player_id match, with its columns and variables renamed by `names` (new session time n,
+    other session time t).
+    """
+    statement = next(s for s in migrate.split_sql_statements(sql_text)
+                     if s.startswith(f"CREATE TRIGGER {trigger_name}"))
+    where = re.search(r"SELECT COUNT\(\*\) INTO v_conflict_count.*?\bWHERE\b(.*?);", statement, re.S).group(1)
+    conditions = [c.strip() for c in re.split(r'\bAND\b', where) if 'player_id' not in c]
+    predicate = ' AND '.join(conditions)
+    for name, replacement in names.items():
+        predicate = re.sub(rf'(?<![\w.]){re.escape(name)}\b', replacement, predicate)
+    return predicate
+
+def original_conflict_sql():
+    return _trigger_predicate(
+        _read(os.path.join(os.path.dirname(migrate.MIGRATIONS_DIR), 'create_database.sql')),
+        'trg_check_session_time_conflict',
+        {'s.date_time': 't', 'v_new_session_datetime': 'n'})
+
+def migration_002_conflict_sql():
+    text = _migration_text('002')
+    day_start = re.search(r"SET v_day_start = (.*?);", text).group(1)
+    return _trigger_predicate(text, 'trg_check_session_time_conflict', {
+        'v_day_start': f"({day_start})", 's.date_time': 't', 'v_new_session_datetime': 'n'})
+
+def migration_008_conflict_sql():
+    text = _migration_text('008')
+    # player_schedule.ends_at is a generated column; use its definition.
+    ends_at = re.search(r"ends_at\s+DATETIME AS \((.*?)\) STORED", text).group(1)
+    return _trigger_predicate(text, 'trg_check_session_time_conflict', {
+        'ps.ends_at': f"({re.sub(r'starts_at', 'ps.starts_at', ends_at)})", 'ps.starts_at': 't', 'v_new_start': 'n'})
+
+def old_conflict(n, t):
+    # The original predicate; TIMESTAMPDIFF truncates toward zero, as int() does.
+    return t.date() == n.date() and abs(int((n - t).total_seconds() / 60)) < 180
+
+@pytest.mark.parametrize('n,t,expected', [
+    (datetime(2025, 1, 6, 12), datetime(2025, 1, 6, 15), False),                # Exactly 3 hours
+    (datetime(2025, 1, 6, 12), datetime(2025, 1, 6, 14, 59, 59), True),         # 2h59m59s
+    (datetime(2025, 1, 6, 23, 0), datetime(2025, 1, 7, 1, 0), False),           # Next day
+    (datetime(2025, 1, 6, 0, 30), datetime(2025, 1, 5, 22, 0), False),          # Previous day
+])
+def test_conflict_edges(n, t, expected):
+    assert old_conflict(n, t) is expected
+
+@pytest.mark.parametrize('predicate', [original_conflict_sql, migration_002_conflict_sql, migration_008_conflict_sql])
+def test_trigger_predicates_are_read_from_the_sql_files(predicate):
+    sql = predicate()
+    assert 'INTERVAL 180 MINUTE' in sql or 'TIMESTAMPDIFF' in sql
+    # Only the two timestamps are left: no trigger variables, NEW.* or table columns.
+    assert not re.search(r'\bv_\w+|\bNEW\.|\b(s|ps|f)\.\w+', sql), sql
+
+def _matching(cursor, predicate, rows, params=()):
+    """Indexes of the (n, t) rows the predicate accepts, evaluated by MySQL."""
+    derived = ' UNION ALL '.join(['SELECT %s AS i, CAST(%s AS DATETIME) AS n, CAST(%s AS DATETIME) AS t'] * len(rows))
+    values = [v for i, (n, t) in enumerate(rows) for v in (i, n, t)]
+    cursor.execute(f"SELECT i FROM ({derived}) AS x WHERE {predicate} ORDER BY i", tuple(values) + tuple(params))
+    return [row[0] for row in cursor.fetchall()]
+
+def test_week_range_matches_in_mysql(db_conn):
+    cursor = db_conn.cursor()
+    rows = [(t, t) for t in WEEK_TIMESTAMPS]
+    old = _matching(cursor, "DATE(t) BETWEEN %s AND %s", rows, (WEEK_START, WEEK_END))
+    new = _matching(cursor, _week_predicate(), rows, ops._weekly_email_range(WEEK_START, WEEK_END))
+    cursor.close()
+    assert old == new == [1, 2, 3, 4]
+
+def test_conflict_ranges_match_in_mysql(db_conn):
+    cursor = db_conn.cursor()
+    old = _matching(cursor, original_conflict_sql(), CONFLICT_PAIRS)
+    new = _matching(cursor, migration_002_conflict_sql(), CONFLICT_PAIRS)
+    schedule = _matching(cursor, migration_008_conflict_sql(), CONFLICT_PAIRS)
+    cursor.close()
+    assert old == new == schedule == [i for i, (n, t) in enumerate(CONFLICT_PAIRS) if old_conflict(n, t)]
@@ -0,0 +1,154 @@
+"""
+email_delivery's worker pool, run against DebugSMTPServer and scripted backends.
+No database is needed: send_pending_emails is given stand-ins for the two ops functions.
+"""
+import asyncio
+import smtplib
+import threading
+import time
+
+import email_delivery
+
+FAST_RETRIES = {'backoff_seconds': 0.001, 'max_backoff_seconds': 0.002}
+
+def _messages(count, domain='example.com', previous_attempts=0):
+    return [
+        (email_id, previous_attempts, email_delivery.build_message({
+            'email_id': email_id, 'sender_name': 'MVC Location 1', 'receiver_email': f"person{email_id}@{domain}",
+            'email_subject': 'Your schedule', 'body': f"Session reminder #{email_id}"
+        }, 'no-reply@mvc.example'))
+        for email_id in range(1, count + 1)
+    ]
+
+def _deliver_to_debug_server(messages, config, fail_rate=0.0):
+    async def run():
+        server = email_delivery.DebugSMTPServer('localhost', 0, fail_rate=fail_rate)
+        await server.start()
+        try:
+            results = await email_delivery.deliver(messages, email_delivery.SMTPBackend(server.host, server.port), config)
+        finally:
+            await server.stop()
+        return results, server
+    return asyncio.run(run())
+
+def test_workers_reuse_their_connections():
+    results, server = _deliver_to_debug_server(_messages(30), {'connections_per_host': 3})
+    assert server.received == 30
+    assert server.connections == 3
+    assert sorted(r['email_id'] for r in results) == list(range(1, 31))
+    assert all(r['status'] == 'Sent' and r['attempts'] == 1 and r['sent_at'] for r in results)
+
+def test_workers_reconnect_after_messages_per_connection():
+    _, server = _deliver_to_debug_server(_messages(10), {'connections_per_host': 1, 'messages_per_connection': 4})
+    assert server.received == 10
+    assert server.connections == 3
+
+class ConcurrencyBackend(email_delivery.LogBackend):
+    """Counts open connections and sends in flight per recipient domain."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.in_flight = {}
+        self.peak = {}
+        self.opened = {}
+
+    def host_for(self, message):
+        return message['To'].split('@')[1]
+
+    def open(self):
+        return {}
+
+    def send(self, connection, message):
+        host = self.host_for(message)
+        with self.lock:
+            if 'host' not in connection:  # First message on a new connection
+                connection['host'] = host
+                self.opened[host] = self.opened.get(host, 0) + 1
+            assert connection['host'] == host, "A connection was used for two hosts"
+            self.in_flight[host] = self.in_flight.get(host, 0) + 1
+            self.peak[host] = max(self.peak.get(host, 0), self.in_flight[host])
+        time.sleep(0.005)
+        with self.lock:
+            self.in_flight[host] -= 1
+
+def test_concurrency_is_limited_per_host():
+    backend = ConcurrencyBackend()
+    messages = _messages(24, 'a.example') + [(100 + i, 0, m) for i, (_, _, m) in enumerate(_messages(24, 'b.example'))]
+    results = asyncio.run(email_delivery.deliver(messages, backend, {'connections_per_host': 3}))
+    assert len(results) == 48 and all(r['status'] == 'Sent' for r in results)
+    assert backend.peak == {'a.example': 3, 'b.example': 3}
+    assert backend.opened == {'a.example': 3, 'b.example': 3}
+
+def test_temporary_451_is_retried(monkeypatch):
+    # The sink rejects the first DATA of every message once, then accepts the retry.
+    replies = iter([0.0, 1.0] * 5)
+    monkeypatch.setattr(email_delivery.random, 'random', lambda: next(replies))
+    sleeps = []
+    monkeypatch.setattr(email_delivery, '_backoff', lambda attempt, config: sleeps.append(attempt) or 0)
+
+    results, server = _deliver_to_debug_server(_messages(5), {'connections_per_host': 1}, fail_rate=0.5)
+
+    assert server.rejected == 5 and server.received == 5
+    assert all(r['status'] == 'Sent' and r['attempts'] == 2 for r in results)
+    assert sleeps == [1] * 5
+
+def test_repeated_451_stays_pending_then_fails():
+    results, server = _deliver_to_debug_server(
+        _messages(2) + [(9, 9, _messages(1)[0][2])], dict(FAST_RETRIES, connections_per_host=1, max_attempts=3), fail_rate=1.0)
+    by_id = {r['email_id']: r for r in results}
+    assert server.received == 0 and server.rejected == 9
+    assert by_id[1]['status'] == by_id[2]['status'] == 'Pending'
+    assert by_id[1]['attempts'] == 3 and '451' in by_id[1]['error']
+    # 9 earlier attempts + 3 now reach max_total_attempts.
+    assert by_id[9]['status'] == 'Failed'
+
+def test_backoff_doubles_up_to_the_cap(monkeypatch):
+    monkeypatch.setattr(email_delivery.random, 'uniform', lambda low, high: high)
+    config = {'backoff_seconds': 0.5, 'max_backoff_seconds': 3}
+    assert [email_delivery._backoff(a, config) for a in range(1, 6)] == [0.5, 1.0, 2.0, 3, 3]
+
+class ScriptedBackend(email_delivery.LogBackend):
+    """Refuses some recipients, permanently (5xx) or temporarily (4xx)."""
+
+    def send(self, connection, message):
+        recipient = message['To']
+        if recipient.startswith('person2@'):
+            raise smtplib.SMTPRecipientsRefused({recipient: (550, b'No such user')})
+        if recipient.startswith('person3@'):
+            raise smtplib.SMTPRecipientsRefused({recipient: (450, b'Mailbox busy')})
+
+def test_send_pending_emails_records_each_outcome(monkeypatch):
+    rows = [
+        {'email_id': i, 'session_id': 1, 'sender_name': 'MVC', 'receiver_email': f"person{i}@example.com",
+         'email_subject': 'Schedule', 'body': 'Body', 'attempts': 0}
+        for i in range(1, 6)
+    ]
+    reads, recorded = [], []
+
+    def get_pending_emails(limit=500, after_email_id=0):
+        reads.append(after_email_id)
+        return [r for r in rows if r['email_id'] > after_email_id][:limit]
+
+    monkeypatch.setattr(email_delivery.ops, 'get_pending_emails', get_pending_emails)
+    monkeypatch.setattr(email_delivery.ops, 'record_email_deliveries', lambda results: recorded.append(results))
+    monkeypatch.setitem(email_delivery.delivery_config, 'batch_size', 2)
+    for key, value in FAST_RETRIES.items():
+        monkeypatch.setitem(email_delivery.delivery_config, key, value)
+
+    totals = email_delivery.send_pending_emails(backend=ScriptedBackend())
+
+    assert totals == {'Sent': 3, 'Pending': 1, 'Failed': 1}
+    assert reads == [0, 2, 4, 5]  # Seeks past each batch; the last read finds nothing
+    assert [len(batch) for batch in recorded] == [2, 2, 1]
+    outcome = {r['email_id']: r for batch in recorded for r in batch}
+    assert {i: (r['status'], r['attempts']) for i, r in outcome.items()} == {
+        1: ('Sent', 1), 2: ('Failed', 1), 3: ('Pending', 3), 4: ('Sent', 1), 5: ('Sent', 1)
+    }
+    assert outcome[2]['error'].startswith('SMTPRecipientsRefused') and outcome[2]['sent_at'] is None
+    assert outcome[1]['sent_at'] is not None and outcome[1]['error'] is None
+
+def test_unreachable_host_leaves_emails_pending():
+    backend = email_delivery.SMTPBackend('localhost', 1, timeout=1)  # Nothing listens on port 1
+    results = asyncio.run(email_delivery.deliver(_messages(6), backend, dict(FAST_RETRIES, connections_per_host=2)))
+    assert all(r['status'] == 'Pending' and r['sent_at'] is None for r in results)
+    assert all(r['attempts'] <= 3 for r in results)
@@ -0,0 +1,47 @@
+"""The vectorized fee rule in finance.py, and its parity with the SQL aggregation."""
+import numpy as np
+import pandas as pd
+
+import finance
+
+def _ages(dobs, year):
+    return finance.age_on_january_first(pd.to_datetime(dobs), [year] * len(dobs)).tolist()
+
+def test_born_on_january_first_has_had_the_birthday():
+    assert _ages(['2007-01-01', '2000-01-01'], 2025) == [18, 25]
+
+def test_born_on_december_31st_counts_the_year_just_ended():
+    assert _ages(['2006-12-31', '2007-12-31'], 2025) == [18, 17]
+
+def test_eighteenth_birthday_boundary():
+    # Turning 18 on January 1st is an adult for the year; a day later is not.
+    ages = _ages(['2007-01-01', '2007-01-02'], 2025)
+    assert ages == [18, 17]
+    assert finance.required_fee_cents(ages).tolist() == [finance.ADULT_FEE_CENTS, finance.MINOR_FEE_CENTS]
+
+def test_leap_day_birthday():
+    assert _ages(['2004-02-29'], 2024) == [19]
+
+def test_member_without_payments_owes_the_full_fee():
+    payments = pd.DataFrame({
+        'club_member_id': np.array([1], dtype=np.int64),
+        'membership_year': np.array([2025], dtype=np.int64),
+        'amount_cents': np.array([25000], dtype=np.int64),
+    })
+    members = pd.DataFrame({'club_member_id': np.array([1, 2], dtype=np.int64),
+                            'dob': pd.to_datetime(['1990-05-05', '2010-05-05'])})
+
+    ledger = finance.compute_member_year_ledger(payments, members, years=[2025])
+
+    assert ledger.to_dict('records') == [
+        {'club_member_id': 1, 'membership_year': 2025, 'age_in_year': 34,
+         'required_fee': 200.0, 'total_paid': 250.0, 'donation': 50.0, 'arrears': 0.0},
+        {'club_member_id': 2, 'membership_year': 2025, 'age_in_year': 14,
+         'required_fee': 100.0, 'total_paid': 0.0, 'donation': 0.0, 'arrears': 100.0},
+    ]
+    # Without `years`, only the pairs with payments are returned.
+    assert finance.compute_member_year_ledger(payments, members)['club_member_id'].tolist() == [1]
+
+def test_ledger_matches_sql_aggregation(db_conn):
+    mismatches = finance.check_parity()
+    assert mismatches.empty, mismatches.to_string(index=False)
@@ -0,0 +1,87 @@
+"""add_formations_batch against a scripted fake connection: locking validation reads and failure outcomes."""
+from contextlib import contextmanager
+from datetime import datetime
+
+from mysql.connector import Error
+
+import db_operations as ops
+
+SESSION_TIME = datetime(2025, 1, 11, 18, 0)
+
+class FakeCursor:
+    def __init__(self, places_left, fail_insert=False):
+        self.places_left = places_left
+        self.fail_insert = fail_insert
+        self.statements = []
+        self.inserted = []
+        self._rows = []
+
+    def execute(self, sql, params=()):
+        self.statements.append(sql)
+        if 'WITH batch' in sql:
+            row_numbers = params[0::4]
+            self._rows = [(i, 1, 'Male', 'Male', SESSION_TIME, 0, None) for i in row_numbers]
+        else:
+            self._rows = [(session_id, self.places_left) for session_id in params]
+
+    def executemany(self, sql, data):
+        if self.fail_insert:
+            raise Error("Deadlock found when trying to get lock")
+        self.inserted.extend(data)
+
+    def fetchall(self):
+        return self._rows
+
+    def close(self):
+        pass
+
+class FakeConnection:
+    def __init__(self, cursor):
+        self.cursor_ = cursor
+        self.rolled_back = False
+
+    def cursor(self, **kwargs):
+        return self.cursor_
+
+    def start_transaction(self):
+        pass
+
+    @contextmanager
+    def validated_batch(self):
+        yield
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        self.rolled_back = True
+
+    def close(self):
+        pass
+
+FORMATIONS = [(1, 10, 100, 'Setter'), (1, 10, 101, 'Libero'), (1, 10, 102, 'Libero')]
+
+def _run(monkeypatch, cursor):
+    conn = FakeConnection(cursor)
+    monkeypatch.setattr(ops, 'get_db_connection', lambda exclusive=False: conn)
+    return conn, ops.add_formations_batch(FORMATIONS)
+
+def test_validation_reads_lock(monkeypatch):
+    cursor = FakeCursor(places_left=5)
+    _, outcomes = _run(monkeypatch, cursor)
+    validation, capacity = cursor.statements
+    assert validation.rstrip().rstrip(';').endswith('FOR SHARE')
+    assert capacity.rstrip().rstrip(';').endswith('FOR UPDATE')
+    assert [o['status'] for o in outcomes] == ['added'] * 3
+
+def test_capacity_counts_earlier_rows_of_the_batch(monkeypatch):
+    cursor = FakeCursor(places_left=2)
+    _, outcomes = _run(monkeypatch, cursor)
+    assert [o['status'] for o in outcomes] == ['added', 'added', 'rejected']
+    assert len(cursor.inserted) == 2
+
+def test_database_error_rejects_every_row(monkeypatch):
+    conn, outcomes = _run(monkeypatch, FakeCursor(places_left=5, fail_insert=True))
+    assert conn.rolled_back
+    assert [o['status'] for o in outcomes] == ['rejected'] * 3
+    assert all(o['reason'].startswith('Database error') for o in outcomes)
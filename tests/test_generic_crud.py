@@ -0,0 +1,17 @@
+"""The generic update() / delete() safety checks do not hold a pooled connection."""
+import pytest
+
+import db_operations as ops
+
+@pytest.fixture
+def no_connection(monkeypatch):
+    def get_db_connection(exclusive=False):
+        raise AssertionError("A connection was checked out")
+    monkeypatch.setattr(ops, 'get_db_connection', get_db_connection)
+
+@pytest.mark.parametrize('criteria,new_data', [({}, {'city': 'Laval'}), ({'person_id': 1}, {}), (None, None)])
+def test_update_without_criteria_or_data_takes_no_connection(no_connection, criteria, new_data):
+    assert ops.update('person', criteria, new_data) is False
+
+def test_delete_without_criteria_takes_no_connection(no_connection):
+    assert ops.delete('person') is False
@@ -0,0 +1,27 @@
+"""Migration files parse, and the hot queries use their indexes once migrate.py has run."""
+import pytest
+
+import migrate
+
+@pytest.mark.parametrize('version,path', migrate.list_migrations())
+def test_migration_parses(version, path):
+    with open(path, encoding='utf-8') as f:
+        statements = migrate.split_sql_statements(f.read())
+    assert statements[0] == 'USE mvc_db'
+    assert not any(s.upper().startswith('DELIMITER') for s in statements)
+
+def test_every_hot_query_has_an_expected_key():
+    assert set(migrate.EXPECTED_KEYS) == set(migrate.HOT_QUERIES)
+
+def test_hot_queries_use_expected_indexes(db_conn):
+    cursor = db_conn.cursor()
+    applied = migrate.get_applied_versions(cursor)
+    cursor.close()
+    missing = [version for version, _ in migrate.list_migrations() if version not in applied]
+    if missing:
+        pytest.skip(f"Migrations not applied (run migrate.py): {', '.join(missing)}")
+
+    plans = migrate.explain_hot_queries(db_conn)
+    for name, (table, key) in migrate.EXPECTED_KEYS.items():
+        used = {row['table']: row['key'] for row in plans[name]}
+        assert used.get(table) == key, f"{name}: expected {table} to use {key}, plan used {used}"
@@ -0,0 +1,81 @@
+"""The unit of work's savepoints, checked against a fake connection that records its SQL."""
+import pytest
+
+import db
+
+class FakeCursor:
+    def __init__(self, log):
+        self.log = log
+
+    def execute(self, sql, params=None):
+        self.log.append(sql)
+
+    def close(self):
+        pass
+
+class FakeConnection:
+    def __init__(self):
+        self.log = []
+
+    def cursor(self, **kwargs):
+        return FakeCursor(self.log)
+
+    def rollback(self):
+        self.log.append('ROLLBACK')
+
+    def commit(self):
+        self.log.append('COMMIT')
+
+    def close(self):
+        pass
+
+@pytest.fixture
+def unit():
+    unit = db.UnitOfWork()
+    unit.raw_connection = FakeConnection()
+    return unit
+
+def test_failed_call_outside_execute_change_only_undoes_itself(unit):
+    conn = unit.connection
+    conn.start_transaction()
+    conn.rollback()
+    unit.end()
+    assert unit.raw_connection.log == [
+        'SAVEPOINT uow_call_0', 'ROLLBACK TO SAVEPOINT uow_call_0', 'RELEASE SAVEPOINT uow_call_0', 'COMMIT'
+    ]
+
+def test_committed_call_releases_its_savepoint(unit):
+    unit.connection.start_transaction()
+    unit.connection.commit()
+    assert unit.raw_connection.log == ['SAVEPOINT uow_call_0', 'RELEASE SAVEPOINT uow_call_0']
+    assert unit._savepoints == []
+
+def test_call_inside_a_change_nests_in_its_savepoint(unit):
+    unit.begin_change()
+    unit.connection.start_transaction()
+    unit.connection.rollback()
+    unit.end_change(failed=True)
+    assert unit.raw_connection.log == [
+        'SAVEPOINT uow_change_0', 'SAVEPOINT uow_call_1',
+        'ROLLBACK TO SAVEPOINT uow_call_1', 'RELEASE SAVEPOINT uow_call_1',
+        'ROLLBACK TO SAVEPOINT uow_change_0', 'RELEASE SAVEPOINT uow_change_0',
+    ]
+
+def test_end_change_releases_calls_left_open(unit):
+    unit.begin_change()
+    unit.connection.start_transaction()  # A call that returned without commit or rollback
+    unit.end_change()
+    assert unit._savepoints == []
+    assert unit.raw_connection.log[-1] == 'RELEASE SAVEPOINT uow_change_0'
+
+def test_rollback_without_savepoint_warns_and_rolls_back_the_unit(unit, capsys):
+    unit.connection.rollback()
+    unit.end()
+    assert unit.rollback_only
+    assert unit.raw_connection.log == ['ROLLBACK']
+    assert 'Warning' in capsys.readouterr().out
+
+def test_unbuffered_cursors_are_not_shared(unit):
+    assert unit.cursor() is unit.cursor()
+    assert unit.cursor(buffered=False) is not unit.cursor(buffered=False)
+    assert not isinstance(unit.cursor(buffered=False), db._SharedCursor)
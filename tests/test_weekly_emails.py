@@ -0,0 +1,93 @@
+"""Streaming generate_and_log_weekly_emails releases both pooled connections on failure (fake connections)."""
+from datetime import date, datetime
+
+import pytest
+from mysql.connector import Error, InternalError
+
+import db_operations as ops
+
+ROW = {
+    'first_name': 'Ann', 'last_name': 'Lee', 'email_address': 'ann@example.com', 'player_position': 'Setter',
+    'session_id': 1, 'session_type': 'Game', 'date_time': datetime(2025, 1, 6, 18), 'location_name': 'Main',
+    'team_name': 'Falcons', 'coach_first_name': None, 'coach_last_name': None, 'coach_email': None
+}
+
+class FakeCursor:
+    def __init__(self, rows=(), error=None, close_error=None):
+        self.rows = list(rows)
+        self.error = error
+        self.close_error = close_error
+
+    def execute(self, sql, params=()):
+        pass
+
+    def fetchmany(self, size):
+        rows, self.rows = self.rows[:size], self.rows[size:]
+        return rows
+
+    def executemany(self, sql, rows):
+        if self.error:
+            raise self.error
+
+    def close(self):
+        if self.close_error:
+            raise self.close_error
+
+class FakeConnection:
+    def __init__(self, cursor=None, cursor_error=None, close_error=None):
+        self._cursor = cursor
+        self.cursor_error = cursor_error
+        self.close_error = close_error
+        self.consumed = False
+        self.closed = False
+
+    def cursor(self, **kwargs):
+        if self.cursor_error:
+            raise self.cursor_error
+        return self._cursor
+
+    def consume_results(self):
+        self.consumed = True
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        self.closed = True
+        if self.close_error:
+            raise self.close_error
+
+@pytest.fixture
+def connections(monkeypatch):
+    def connections(read, write):
+        pending = [read, write]
+        monkeypatch.setattr(ops, 'get_db_connection', lambda exclusive=False: pending.pop(0))
+        return read, write
+    return connections
+
+def _stream():
+    return ops.generate_and_log_weekly_emails(date(2025, 1, 6), date(2025, 1, 12), stream=True, batch_size=1)
+
+def test_insert_failure_drains_unread_rows_and_closes_both(connections):
+    read, write = connections(
+        FakeConnection(FakeCursor([ROW] * 3, close_error=InternalError(msg="Unread result found"))),
+        FakeConnection(FakeCursor(error=Error(msg="Lock wait timeout exceeded"))))
+    with pytest.raises(Error, match="Lock wait"):
+        _stream()
+    assert read.consumed and read.closed and write.closed
+
+def test_cursor_failure_closes_both(connections):
+    read, write = connections(FakeConnection(cursor_error=Error(msg="Lost connection")), FakeConnection(FakeCursor()))
+    with pytest.raises(Error, match="Lost connection"):
+        _stream()
+    assert read.closed and write.closed
+
+def test_failing_close_still_releases_the_other_connection(connections):
+    read, write = connections(
+        FakeConnection(FakeCursor([ROW]), close_error=Error(msg="Connection reset")), FakeConnection(FakeCursor()))
+    with pytest.raises(Error, match="Connection reset"):
+        _stream()
+    assert write.closed